@@ -0,0 +1,58 @@
+import hashlib
+import json
+import reflex as rx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from app.utils.delivery_receipts import record_callback, verify_twilio_signature
+from app.utils.razorpay_webhooks import (
+    ingest_events,
+    notify_webhook_consumer,
+    verify_signature,
+)
+from app.utils.twilio_transport import TWILIO_STATUS_CALLBACK_URL
+
+
+async def razorpay_webhook(request: Request) -> JSONResponse:
+    """Verify a Razorpay webhook and store it for the reconciliation consumer."""
+    body = await request.body()
+    if not verify_signature(body, request.headers.get("X-Razorpay-Signature", "")):
+        return JSONResponse({"status": "invalid signature"}, status_code=400)
+    try:
+        event = json.loads(body)
+    except ValueError:
+        return JSONResponse({"status": "invalid payload"}, status_code=400)
+    event_id = (
+        request.headers.get("X-Razorpay-Event-Id") or hashlib.sha256(body).hexdigest()
+    )
+    async with rx.asession() as session, session.begin():
+        stored = await ingest_events(session, [(event_id, event)])
+    if stored:
+        notify_webhook_consumer()
+    return JSONResponse({"status": "ok"})
+
+
+async def twilio_status_callback(request: Request) -> JSONResponse:
+    """
+    Accept a Twilio delivery receipt. Receipts are buffered in memory and
+    written to message_deliveries by the flusher, so Twilio gets its answer
+    without waiting on the database.
+    """
+    params = dict(await request.form())
+    url = TWILIO_STATUS_CALLBACK_URL or str(request.url)
+    if not verify_twilio_signature(
+        url, params, request.headers.get("X-Twilio-Signature", "")
+    ):
+        return JSONResponse({"status": "invalid signature"}, status_code=403)
+    if not record_callback(params):
+        return JSONResponse({"status": "ignored"})
+    return JSONResponse({"status": "ok"})
+
+
+api = Starlette(
+    routes=[
+        Route("/api/razorpay/webhook", razorpay_webhook, methods=["POST"]),
+        Route("/api/twilio/status", twilio_status_callback, methods=["POST"]),
+    ]
+)
\ No newline at end of file
@@ -16,6 +16,7 @@ from app.states.referral_state import ReferralState
 from app.states.profit_state import ProfitAnalysisState
 from app.states.purchase_order_state import PurchaseOrderState
 from app.states.report_state import ReportState
+from app.states.failed_message_state import FailedMessageState
 from app.pages.expenses import expenses_page
 from app.pages.alerts import alerts_page
 from app.pages.payments import payments_page
@@ -24,8 +25,17 @@ from app.pages.referrals import referrals_page
 from app.pages.profit_analysis import profit_analysis_page
 from app.pages.purchase_orders import purchase_orders_page
 from app.pages.reports import reports_page
+from app.pages.failed_messages import failed_messages_page
 from app.states.payment_state import payment_success, payment_failure
 from app.components.pwa_install_banner import pwa_install_banner
+from app.utils.outbox import run_outbox_dispatcher
+from app.utils.twilio_transport import twilio_client_lifespan
+from app.utils.razorpay_webhooks import run_webhook_consumer
+from app.utils.message_templates import load_message_templates
+from app.utils.delivery_receipts import run_delivery_receipt_flusher
+from app.utils.dashboard import listen_for_dashboard_changes
+from app.utils.order_rollup import backfill_order_rollup
+from app.api import api
 
 
 def index() -> rx.Component:
@@ -66,6 +76,7 @@ def offline() -> rx.Component:
 
 app = rx.App(
     theme=rx.theme(appearance="light"),
+    api_transformer=api,
     head_components=[
         rx.el.link(rel="preconnect", href="https://fonts.googleapis.com"),
         rx.el.link(rel="preconnect", href="https://fonts.gstatic.com", cross_origin=""),
@@ -85,6 +96,13 @@ app = rx.App(
         ),
     ],
 )
+app.register_lifespan_task(run_outbox_dispatcher)
+app.register_lifespan_task(twilio_client_lifespan)
+app.register_lifespan_task(run_webhook_consumer)
+app.register_lifespan_task(load_message_templates)
+app.register_lifespan_task(run_delivery_receipt_flusher)
+app.register_lifespan_task(listen_for_dashboard_changes)
+app.register_lifespan_task(backfill_order_rollup)
 app.add_page(index, route="/", on_load=DashboardState.get_dashboard_data)
 app.add_page(dashboard, route="/dashboard")
 app.add_page(customers_page, route="/customers", on_load=CustomerState.get_customers)
@@ -113,5 +131,10 @@ app.add_page(
     ],
 )
 app.add_page(reports_page, route="/reports", on_load=ReportState.load_all_reports)
+app.add_page(
+    failed_messages_page,
+    route="/failed-messages",
+    on_load=FailedMessageState.load_failed_messages,
+)
 app.add_page(payment_success)
 app.add_page(payment_failure)
\ No newline at end of file
@@ -1,5 +1,20 @@
 import reflex as rx
 from app.state import CustomerState
+from app.utils.message_templates import SUPPORTED_LANGUAGES
+
+
+def delivery_stat_row(stat: rx.Var[dict]) -> rx.Component:
+    return rx.el.div(
+        rx.el.span(
+            rx.cond(stat["channel"] == "whatsapp", "WhatsApp", "SMS"),
+            class_name="font-medium text-gray-700",
+        ),
+        rx.el.span(
+            f"{stat['delivered']} delivered, {stat['failed']} failed of {stat['messages']} ({stat['delivery_rate']}%)",
+            class_name="text-gray-600",
+        ),
+        class_name="flex justify-between text-sm",
+    )
 
 
 def customer_form() -> rx.Component:
@@ -107,6 +122,33 @@ def customer_form() -> rx.Component:
                     ),
                     class_name="grid grid-cols-2 gap-4 mb-6 items-center",
                 ),
+                rx.el.div(
+                    rx.el.label(
+                        "Message Language",
+                        class_name="block text-sm font-semibold text-gray-700 mb-2",
+                    ),
+                    rx.el.select(
+                        *[
+                            rx.el.option(label, value=code)
+                            for code, label in SUPPORTED_LANGUAGES.items()
+                        ],
+                        name="preferred_language",
+                        default_value=CustomerState.preferred_language,
+                        class_name="w-full p-3 bg-white border border-gray-200 rounded-lg focus:ring-2 focus:ring-purple-500",
+                    ),
+                    class_name="mb-6",
+                ),
+                rx.cond(
+                    CustomerState.delivery_stats.length() > 0,
+                    rx.el.div(
+                        rx.el.p(
+                            "Message Delivery (last 30 days)",
+                            class_name="text-sm font-semibold text-gray-700 mb-2",
+                        ),
+                        rx.foreach(CustomerState.delivery_stats, delivery_stat_row),
+                        class_name="mb-6 p-3 bg-gray-50 rounded-lg border border-gray-100",
+                    ),
+                ),
                 rx.el.div(
                     rx.dialog.close(
                         rx.el.button(
@@ -174,6 +174,16 @@ def order_form() -> rx.Component:
                 rx.el.div(
                     rx.el.div(
                         _form_label("Customer"),
+                        rx.debounce_input(
+                            _form_input(
+                                placeholder="Search by name or phone...",
+                                type="search",
+                                value=OrderState.customer_search_query,
+                                on_change=OrderState.set_customer_search_query,
+                                class_name="mb-2",
+                            ),
+                            debounce_timeout=300,
+                        ),
                         _form_select(
                             rx.el.option("Select a customer", value="", disabled=True),
                             rx.foreach(
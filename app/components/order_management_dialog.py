@@ -58,6 +58,7 @@ def _actions_tab() -> rx.Component:
                 rx.el.option("Finishing", value="finishing"),
                 rx.el.option("Ready", value="ready"),
                 rx.el.option("Delivered", value="delivered"),
+                rx.el.option("Cancelled", value="cancelled"),
                 name="new_status",
                 on_change=OrderManagementState.set_new_status,
                 class_name="w-full p-2 border rounded mb-2",
@@ -30,6 +30,7 @@ NAV_ITEMS = [
     {"text": "Profit Analysis", "href": "/profit-analysis", "icon": "line-chart"},
     {"text": "Reports", "href": "/reports", "icon": "file-text"},
     {"text": "Alerts", "href": "/alerts", "icon": "bell-ring"},
+    {"text": "Failed Messages", "href": "/failed-messages", "icon": "mail-warning"},
 ]
 
 
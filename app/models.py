@@ -13,6 +13,7 @@ class Customer(TypedDict):
     notes: str | None
     opt_in_whatsapp: bool
     prefer_whatsapp: str
+    preferred_language: str | None
 
 
 class Measurement(TypedDict):
@@ -70,10 +71,12 @@ class Order(TypedDict):
     coupon_code: str | None
     discount_amount: float | None
     points_earned: int | None
+    updated_at: datetime.datetime | None
 
 
 class OrderWithCustomerName(Order):
     customer_name: str
+    search_rank: float | None
 
 
 class OrderMaterial(TypedDict):
@@ -134,6 +134,51 @@ def alert_history_row(history: rx.Var[dict]) -> rx.Component:
     )
 
 
+def savings_stat(label: str, value: rx.Var, color: str) -> rx.Component:
+    return rx.el.div(
+        rx.el.p(label, class_name="text-xs text-gray-500"),
+        rx.el.p(value.to_string(), class_name=f"text-2xl font-bold {color}"),
+        class_name="p-4 bg-gray-50 rounded-lg",
+    )
+
+
+def notification_savings_card() -> rx.Component:
+    return rx.el.div(
+        rx.el.h2(
+            "Notification Savings",
+            class_name="text-xl font-semibold text-gray-700",
+        ),
+        rx.el.p(
+            "Customer SMS/WhatsApp messages over the last 30 days.",
+            class_name="text-sm text-gray-500 mt-1 mb-4",
+        ),
+        rx.el.div(
+            savings_stat(
+                "Messages Sent",
+                AlertState.notification_savings["sent"],
+                "text-gray-800",
+            ),
+            savings_stat(
+                "Merged Status Updates",
+                AlertState.notification_savings["coalesced"],
+                "text-purple-600",
+            ),
+            savings_stat(
+                "Duplicates Dropped",
+                AlertState.notification_savings["duplicates"],
+                "text-purple-600",
+            ),
+            savings_stat(
+                "Sends Saved",
+                AlertState.notification_savings["saved"],
+                "text-green-600",
+            ),
+            class_name="grid grid-cols-2 md:grid-cols-4 gap-4",
+        ),
+        class_name="bg-white p-6 rounded-xl shadow-sm mb-8",
+    )
+
+
 def edit_alert_dialog() -> rx.Component:
     return rx.dialog.root(
         rx.dialog.content(
@@ -244,6 +289,7 @@ def alerts_page() -> rx.Component:
                     ),
                     class_name="mb-8",
                 ),
+                notification_savings_card(),
                 rx.el.div(
                     rx.el.h2(
                         "Alert Settings",
@@ -0,0 +1,162 @@
+import reflex as rx
+from app.states.failed_message_state import FailedMessageState
+from app.components.sidebar import sidebar, mobile_header
+
+
+def failed_message_row(message: rx.Var[dict]) -> rx.Component:
+    return rx.el.tr(
+        rx.el.td(
+            rx.el.input(
+                type="checkbox",
+                checked=FailedMessageState.selected_ids.contains(
+                    message["dead_letter_id"]
+                ),
+                on_change=lambda _: FailedMessageState.toggle_selection(
+                    message["dead_letter_id"]
+                ),
+                class_name="h-4 w-4 accent-purple-600",
+            ),
+            class_name="px-4 py-4",
+        ),
+        rx.el.td(
+            rx.el.p(message["customer_name"] | "-", class_name="font-medium"),
+            rx.el.p(message["customer_phone"] | "", class_name="text-xs text-gray-500"),
+            class_name="px-4 py-4",
+        ),
+        rx.el.td(
+            rx.cond(message["order_id"], f"#{message['order_id']}", "-"),
+            class_name="px-4 py-4",
+        ),
+        rx.el.td(
+            message["channel"].upper(),
+            class_name="px-4 py-4 text-sm",
+        ),
+        rx.el.td(
+            message["template"].replace("_", " ").capitalize(),
+            class_name="px-4 py-4 text-sm",
+        ),
+        rx.el.td(message["attempts"], class_name="px-4 py-4 text-center"),
+        rx.el.td(
+            message["last_error"] | "-",
+            class_name="px-4 py-4 text-xs text-red-600 max-w-xs break-words",
+        ),
+        rx.el.td(
+            message["failed_at"].split(".")[0],
+            class_name="px-4 py-4 text-sm text-gray-500",
+        ),
+        class_name="border-b bg-white hover:bg-gray-50/50",
+    )
+
+
+def failed_messages_page() -> rx.Component:
+    return rx.el.div(
+        sidebar(),
+        rx.el.div(
+            mobile_header(),
+            rx.el.main(
+                rx.el.div(
+                    rx.el.div(
+                        rx.el.h1(
+                            "Failed Messages",
+                            class_name="text-3xl font-bold text-gray-800",
+                        ),
+                        rx.el.p(
+                            "Customer messages that could not be delivered after retrying.",
+                            class_name="text-gray-500 mt-1",
+                        ),
+                    ),
+                    rx.el.div(
+                        rx.el.button(
+                            "Discard Selected",
+                            on_click=FailedMessageState.discard_selected,
+                            disabled=FailedMessageState.selected_ids.length() == 0,
+                            class_name="px-4 py-2 text-sm font-medium text-gray-700 bg-white border rounded-lg hover:bg-gray-50 disabled:opacity-50",
+                        ),
+                        rx.el.button(
+                            "Retry Selected",
+                            on_click=FailedMessageState.retry_selected,
+                            disabled=FailedMessageState.selected_ids.length() == 0,
+                            class_name="px-4 py-2 text-sm font-medium text-purple-700 bg-purple-50 border border-purple-200 rounded-lg hover:bg-purple-100 disabled:opacity-50",
+                        ),
+                        rx.el.button(
+                            rx.icon("refresh-cw", class_name="h-4 w-4"),
+                            "Retry All",
+                            on_click=FailedMessageState.retry_all,
+                            disabled=FailedMessageState.failed_messages.length() == 0,
+                            class_name="flex items-center gap-2 px-4 py-2 text-sm font-medium text-white bg-purple-600 rounded-lg hover:bg-purple-700 disabled:opacity-50",
+                        ),
+                        class_name="flex flex-wrap gap-2",
+                    ),
+                    class_name="flex flex-col md:flex-row md:items-center md:justify-between gap-4 mb-8",
+                ),
+                rx.el.div(
+                    rx.cond(
+                        FailedMessageState.failed_messages.length() > 0,
+                        rx.el.div(
+                            rx.el.table(
+                                rx.el.thead(
+                                    rx.el.tr(
+                                        rx.el.th(
+                                            rx.el.input(
+                                                type="checkbox",
+                                                checked=FailedMessageState.all_selected,
+                                                on_change=lambda _: (
+                                                    FailedMessageState.toggle_select_all()
+                                                ),
+                                                class_name="h-4 w-4 accent-purple-600",
+                                            ),
+                                            class_name="px-4 py-3 text-left",
+                                        ),
+                                        rx.el.th(
+                                            "Customer",
+                                            class_name="px-4 py-3 text-left text-xs font-bold uppercase",
+                                        ),
+                                        rx.el.th(
+                                            "Order",
+                                            class_name="px-4 py-3 text-left text-xs font-bold uppercase",
+                                        ),
+                                        rx.el.th(
+                                            "Channel",
+                                            class_name="px-4 py-3 text-left text-xs font-bold uppercase",
+                                        ),
+                                        rx.el.th(
+                                            "Message",
+                                            class_name="px-4 py-3 text-left text-xs font-bold uppercase",
+                                        ),
+                                        rx.el.th(
+                                            "Attempts",
+                                            class_name="px-4 py-3 text-center text-xs font-bold uppercase",
+                                        ),
+                                        rx.el.th(
+                                            "Last Error",
+                                            class_name="px-4 py-3 text-left text-xs font-bold uppercase",
+                                        ),
+                                        rx.el.th(
+                                            "Failed At",
+                                            class_name="px-4 py-3 text-left text-xs font-bold uppercase",
+                                        ),
+                                    )
+                                ),
+                                rx.el.tbody(
+                                    rx.foreach(
+                                        FailedMessageState.failed_messages,
+                                        failed_message_row,
+                                    )
+                                ),
+                                class_name="min-w-full divide-y divide-gray-200",
+                            ),
+                            class_name="overflow-x-auto border border-gray-200 rounded-xl",
+                        ),
+                        rx.el.p(
+                            "No failed messages.",
+                            class_name="text-center text-gray-500 py-12",
+                        ),
+                    ),
+                    class_name="bg-white p-6 rounded-xl shadow-sm",
+                ),
+                class_name="flex-1 p-4 md:p-8 overflow-auto",
+            ),
+            class_name="flex flex-col w-full",
+        ),
+        class_name="flex min-h-screen w-full bg-gray-50 font-['Lato']",
+    )
\ No newline at end of file
@@ -38,6 +38,18 @@ def measurement_form() -> rx.Component:
                 ),
                 rx.el.div(
                     _form_label("Customer"),
+                    rx.el.div(
+                        rx.debounce_input(
+                            _form_input(
+                                placeholder="Search by name or phone...",
+                                type="search",
+                                value=MeasurementState.customer_search_query,
+                                on_change=MeasurementState.set_customer_search_query,
+                            ),
+                            debounce_timeout=300,
+                        ),
+                        class_name="mb-2",
+                    ),
                     _form_select(
                         rx.el.option("Select a customer", value="", disabled=True),
                         rx.foreach(
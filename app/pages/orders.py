@@ -16,6 +16,7 @@ STATUS_COLORS = {
     "finishing": "bg-blue-100 text-blue-800",
     "ready": "bg-green-100 text-green-800",
     "delivered": "bg-gray-100 text-gray-800",
+    "cancelled": "bg-gray-200 text-gray-500 line-through",
 }
 PRIORITY_COLORS = {
     "urgent": "border-red-500 bg-red-50",
@@ -36,6 +37,7 @@ def status_badge(status: rx.Var[str]) -> rx.Component:
             ("finishing", STATUS_COLORS["finishing"] + base_classes),
             ("ready", STATUS_COLORS["ready"] + base_classes),
             ("delivered", STATUS_COLORS["delivered"] + base_classes),
+            ("cancelled", STATUS_COLORS["cancelled"] + base_classes),
             "bg-gray-100 text-gray-800" + base_classes,
         ),
     )
@@ -49,6 +51,17 @@ def order_row(order: rx.Var[dict]) -> rx.Component:
         PRIORITY_COLORS["standard"],
     )
     return rx.el.tr(
+        rx.el.td(
+            rx.el.input(
+                type="checkbox",
+                checked=OrderState.selected_order_ids.contains(order["order_id"]),
+                on_change=lambda _: OrderState.toggle_order_selection(
+                    order["order_id"]
+                ),
+                class_name="h-4 w-4 rounded border-gray-300 text-purple-600 focus:ring-purple-500",
+            ),
+            class_name="pl-6 py-4",
+        ),
         rx.el.td(
             order["customer_name"], class_name="px-6 py-4 font-medium text-gray-900"
         ),
@@ -133,8 +146,22 @@ def order_card(order: rx.Var[dict]) -> rx.Component:
     return rx.el.div(
         rx.el.div(
             rx.el.div(
-                rx.el.p(
-                    f"Order #{order['order_id']}", class_name="font-bold text-gray-800"
+                rx.el.label(
+                    rx.el.input(
+                        type="checkbox",
+                        checked=OrderState.selected_order_ids.contains(
+                            order["order_id"]
+                        ),
+                        on_change=lambda _: OrderState.toggle_order_selection(
+                            order["order_id"]
+                        ),
+                        class_name="h-4 w-4 rounded border-gray-300 text-purple-600 focus:ring-purple-500",
+                    ),
+                    rx.el.p(
+                        f"Order #{order['order_id']}",
+                        class_name="font-bold text-gray-800",
+                    ),
+                    class_name="flex items-center gap-2",
                 ),
                 status_badge(order["status"]),
                 class_name="flex justify-between items-center mb-1",
@@ -225,6 +252,52 @@ def order_card(order: rx.Var[dict]) -> rx.Component:
     )
 
 
+def bulk_action_bar() -> rx.Component:
+    return rx.cond(
+        OrderState.selected_order_ids.length() > 0,
+        rx.el.div(
+            rx.el.p(
+                f"{OrderState.selected_order_ids.length()} selected",
+                class_name="text-sm font-semibold text-purple-800",
+            ),
+            rx.el.div(
+                rx.el.select(
+                    rx.el.option("Move to...", value="", disabled=True),
+                    rx.el.option("Pending", value="pending"),
+                    rx.el.option("Cutting", value="cutting"),
+                    rx.el.option("Stitching", value="stitching"),
+                    rx.el.option("Finishing", value="finishing"),
+                    rx.el.option("Ready", value="ready"),
+                    rx.el.option("Delivered", value="delivered"),
+                    rx.el.option("Cancelled", value="cancelled"),
+                    value=OrderState.bulk_status,
+                    on_change=OrderState.set_bulk_status,
+                    class_name="px-4 py-2 border rounded-lg bg-white focus:ring-purple-500",
+                ),
+                rx.el.button(
+                    rx.cond(
+                        OrderState.is_bulk_updating,
+                        rx.spinner(class_name="h-4 w-4"),
+                        rx.icon("check-check", class_name="h-4 w-4"),
+                    ),
+                    rx.el.span("Apply", class_name="ml-2"),
+                    on_click=OrderState.bulk_update_order_status,
+                    disabled=OrderState.is_bulk_updating,
+                    class_name="flex items-center bg-purple-600 text-white px-4 py-2 rounded-lg font-semibold hover:bg-purple-700",
+                ),
+                rx.el.button(
+                    "Clear",
+                    on_click=OrderState.clear_order_selection,
+                    class_name="text-sm font-medium text-gray-600 px-3 py-2 rounded-lg hover:bg-gray-100",
+                ),
+                class_name="flex items-center gap-2",
+            ),
+            class_name="flex flex-col md:flex-row justify-between items-center gap-3 p-4 bg-purple-50 border border-purple-200 rounded-xl",
+        ),
+        None,
+    )
+
+
 def orders_page() -> rx.Component:
     return rx.el.div(
         sidebar(),
@@ -248,11 +321,15 @@ def orders_page() -> rx.Component:
                             "search",
                             class_name="absolute left-3 top-1/2 -translate-y-1/2 h-5 w-5 text-gray-400",
                         ),
-                        rx.el.input(
-                            placeholder="Search by customer...",
-                            type="search",
-                            on_change=OrderState.set_search_query,
-                            class_name="w-full md:w-80 pl-10 pr-4 py-2 border rounded-lg focus:ring-purple-500 focus:border-purple-500",
+                        rx.debounce_input(
+                            rx.el.input(
+                                placeholder="Search name, phone, order # or notes...",
+                                type="search",
+                                value=OrderState.search_query,
+                                on_change=OrderState.set_search_query,
+                                class_name="w-full md:w-80 pl-10 pr-4 py-2 border rounded-lg focus:ring-purple-500 focus:border-purple-500",
+                            ),
+                            debounce_timeout=300,
                         ),
                         class_name="relative w-full md:w-auto",
                     ),
@@ -266,6 +343,19 @@ def orders_page() -> rx.Component:
                             on_change=OrderState.set_priority_filter,
                             class_name="w-full px-4 py-2 border rounded-lg bg-white focus:ring-purple-500",
                         ),
+                        rx.el.select(
+                            rx.el.option("All Statuses", value="all"),
+                            rx.el.option("Pending", value="pending"),
+                            rx.el.option("Cutting", value="cutting"),
+                            rx.el.option("Stitching", value="stitching"),
+                            rx.el.option("Finishing", value="finishing"),
+                            rx.el.option("Ready", value="ready"),
+                            rx.el.option("Delivered", value="delivered"),
+                            rx.el.option("Cancelled", value="cancelled"),
+                            value=OrderState.status_filter,
+                            on_change=OrderState.set_status_filter,
+                            class_name="w-full px-4 py-2 border rounded-lg bg-white focus:ring-purple-500",
+                        ),
                         rx.el.button(
                             rx.icon("plus", class_name="md:mr-2 h-5 w-5"),
                             rx.el.span("Add Order", class_name="hidden md:inline"),
@@ -276,9 +366,10 @@ def orders_page() -> rx.Component:
                     ),
                     class_name="flex flex-col md:flex-row justify-between items-center mb-6 gap-4",
                 ),
+                bulk_action_bar(),
                 rx.el.div(
                     rx.el.div(
-                        rx.foreach(OrderState.filtered_orders, order_card),
+                        rx.foreach(OrderState.orders, order_card),
                         class_name="grid grid-cols-1 gap-4 md:hidden",
                     ),
                     rx.el.div(
@@ -286,6 +377,18 @@ def orders_page() -> rx.Component:
                             rx.el.table(
                                 rx.el.thead(
                                     rx.el.tr(
+                                        rx.el.th(
+                                            rx.el.input(
+                                                type="checkbox",
+                                                checked=OrderState.all_orders_selected,
+                                                on_change=lambda _: (
+                                                    OrderState.toggle_select_all_orders()
+                                                ),
+                                                class_name="h-4 w-4 rounded border-gray-300 text-purple-600 focus:ring-purple-500",
+                                            ),
+                                            scope="col",
+                                            class_name="pl-6 py-3 text-left",
+                                        ),
                                         rx.el.th(
                                             "Customer",
                                             scope="col",
@@ -323,9 +426,7 @@ def orders_page() -> rx.Component:
                                         ),
                                     )
                                 ),
-                                rx.el.tbody(
-                                    rx.foreach(OrderState.filtered_orders, order_row)
-                                ),
+                                rx.el.tbody(rx.foreach(OrderState.orders, order_row)),
                                 class_name="min-w-full divide-y divide-gray-200",
                             ),
                             class_name="overflow-x-auto",
@@ -333,8 +434,7 @@ def orders_page() -> rx.Component:
                         class_name="hidden md:block border border-gray-200 rounded-xl",
                     ),
                     rx.cond(
-                        (OrderState.filtered_orders.length() == 0)
-                        & ~OrderState.is_loading,
+                        (OrderState.orders.length() == 0) & ~OrderState.is_loading,
                         rx.el.div(
                             rx.icon(
                                 "shopping-cart",
@@ -352,6 +452,24 @@ def orders_page() -> rx.Component:
                         ),
                         None,
                     ),
+                    rx.cond(
+                        OrderState.has_more_orders,
+                        rx.el.div(
+                            rx.el.button(
+                                rx.cond(
+                                    OrderState.is_loading_more,
+                                    rx.spinner(class_name="h-4 w-4"),
+                                    rx.icon("chevrons-down", class_name="h-4 w-4"),
+                                ),
+                                rx.el.span("Load More", class_name="ml-2"),
+                                on_click=OrderState.load_more_orders,
+                                disabled=OrderState.is_loading_more,
+                                class_name="flex items-center justify-center text-sm font-semibold bg-purple-100 text-purple-700 px-4 py-2 rounded-lg hover:bg-purple-200",
+                            ),
+                            class_name="flex justify-center pt-4",
+                        ),
+                        None,
+                    ),
                     class_name="bg-white p-0 md:p-6 rounded-xl md:shadow-sm",
                 ),
                 order_form(),
@@ -73,6 +73,23 @@ def payments_page() -> rx.Component:
                         on_change=PaymentState.set_status_filter,
                         class_name="w-full md:w-48 p-2 border rounded-lg bg-white",
                     ),
+                    rx.el.div(
+                        rx.cond(
+                            PaymentState.is_campaign_running,
+                            rx.el.p(
+                                f"Sending reminders: {PaymentState.campaign_sent} sent, {PaymentState.campaign_queued} queued for retry, {PaymentState.campaign_failed} failed of {PaymentState.campaign_total}",
+                                class_name="text-sm text-gray-600",
+                            ),
+                        ),
+                        rx.el.button(
+                            rx.icon("send", class_name="mr-2 h-4 w-4"),
+                            "Remind All Overdue",
+                            on_click=PaymentState.start_reminder_campaign,
+                            disabled=PaymentState.is_campaign_running,
+                            class_name="flex items-center bg-purple-600 text-white px-4 py-2 rounded-lg hover:bg-purple-700 disabled:opacity-50",
+                        ),
+                        class_name="flex items-center gap-4 md:ml-auto",
+                    ),
                     class_name="flex flex-col md:flex-row gap-4 mb-6",
                 ),
                 rx.el.div(
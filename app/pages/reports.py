@@ -3,6 +3,24 @@ from app.states.report_state import ReportState
 from app.components.sidebar import sidebar, mobile_header
 
 
+def section_loading(label: str) -> rx.Component:
+    return rx.el.div(
+        rx.spinner(),
+        rx.el.span(label, class_name="text-gray-500"),
+        class_name="flex items-center gap-2 py-4",
+    )
+
+
+def report_section(
+    title: str, is_loading: rx.Var, content: rx.Component, class_name: str
+) -> rx.Component:
+    return rx.el.div(
+        rx.el.h2(title, class_name="text-xl font-semibold mb-4"),
+        rx.cond(is_loading, section_loading(f"Loading {title}..."), content),
+        class_name=class_name,
+    )
+
+
 def reports_page() -> rx.Component:
     return rx.el.div(
         sidebar(),
@@ -29,19 +47,16 @@ def reports_page() -> rx.Component:
                     rx.el.button(
                         "Generate Reports",
                         on_click=ReportState.load_all_reports,
-                        class_name="bg-purple-600 text-white px-4 py-2 rounded-lg",
+                        disabled=ReportState.is_loading,
+                        class_name="bg-purple-600 text-white px-4 py-2 rounded-lg disabled:opacity-50",
                     ),
                     class_name="flex items-center gap-4 mb-8",
                 ),
-                rx.cond(
-                    ReportState.is_loading,
-                    rx.el.div(rx.spinner(), "Generating reports..."),
-                    rx.el.div(
+                rx.el.div(
+                    report_section(
+                        "Customer Lifetime Value (CLV) Analysis",
+                        ReportState.clv_loading,
                         rx.el.div(
-                            rx.el.h2(
-                                "Customer Lifetime Value (CLV) Analysis",
-                                class_name="text-xl font-semibold mb-4",
-                            ),
                             rx.el.div(
                                 rx.el.p(
                                     f"Avg. CLV: ₹{ReportState.avg_customer_lifetime_value.to_string()}"
@@ -70,13 +85,13 @@ def reports_page() -> rx.Component:
                                     )
                                 ),
                             ),
-                            class_name="p-6 bg-white rounded-xl shadow-sm mb-6",
                         ),
+                        "p-6 bg-white rounded-xl shadow-sm mb-6",
+                    ),
+                    report_section(
+                        "Material Wastage Analysis",
+                        ReportState.wastage_loading,
                         rx.el.div(
-                            rx.el.h2(
-                                "Material Wastage Analysis",
-                                class_name="text-xl font-semibold mb-4",
-                            ),
                             rx.el.p(
                                 f"Total Wastage Cost: ₹{ReportState.total_wastage_cost.to_string()}"
                             ),
@@ -102,41 +117,36 @@ def reports_page() -> rx.Component:
                                     )
                                 ),
                             ),
-                            class_name="p-6 bg-white rounded-xl shadow-sm mb-6",
                         ),
+                        "p-6 bg-white rounded-xl shadow-sm mb-6",
+                    ),
+                    report_section(
+                        "GST Report",
+                        ReportState.gst_loading,
                         rx.el.div(
-                            rx.el.h2(
-                                "GST Report", class_name="text-xl font-semibold mb-4"
+                            rx.el.p(
+                                f"Taxable Sales: ₹{ReportState.taxable_sales.to_string()}"
                             ),
-                            rx.el.div(
-                                rx.el.p(
-                                    f"Taxable Sales: ₹{ReportState.taxable_sales.to_string()}"
-                                ),
-                                rx.el.p(
-                                    f"Total GST Collected: ₹{ReportState.total_gst_collected.to_string()}"
-                                ),
-                                class_name="flex gap-8 mb-4",
+                            rx.el.p(
+                                f"Total GST Collected: ₹{ReportState.total_gst_collected.to_string()}"
                             ),
-                            class_name="p-6 bg-white rounded-xl shadow-sm mb-6",
+                            class_name="flex gap-8 mb-4",
                         ),
-                        rx.el.div(
-                            rx.el.h2(
-                                "Seasonal Trends",
-                                class_name="text-xl font-semibold mb-4",
-                            ),
-                            rx.recharts.line_chart(
-                                rx.recharts.x_axis(data_key="month"),
-                                rx.recharts.y_axis(),
-                                rx.recharts.line(data_key="revenue", stroke="#8884d8"),
-                                rx.recharts.line(
-                                    data_key="order_count", stroke="#82ca9d"
-                                ),
-                                data=ReportState.monthly_order_trends,
-                                width="100%",
-                                height=300,
-                            ),
-                            class_name="p-6 bg-white rounded-xl shadow-sm",
+                        "p-6 bg-white rounded-xl shadow-sm mb-6",
+                    ),
+                    report_section(
+                        "Seasonal Trends",
+                        ReportState.trends_loading,
+                        rx.recharts.line_chart(
+                            rx.recharts.x_axis(data_key="month"),
+                            rx.recharts.y_axis(),
+                            rx.recharts.line(data_key="revenue", stroke="#8884d8"),
+                            rx.recharts.line(data_key="order_count", stroke="#82ca9d"),
+                            data=ReportState.monthly_order_trends,
+                            width="100%",
+                            height=300,
                         ),
+                        "p-6 bg-white rounded-xl shadow-sm",
                     ),
                 ),
                 class_name="p-4 md:p-8",
@@ -12,14 +12,191 @@ from app.models import (
 import datetime
 from sqlalchemy import text, func, select
 import logging
+from app.utils.inventory import (
+    MATERIAL_REQUIREMENTS,
+    deduct_materials_for_orders,
+    format_shortfall,
+    release_material_reservations,
+    reserve_materials,
+)
+from app.utils.coupons import get_active_coupon, redeem_coupon
+from app.utils.customer_search import (
+    escape_like,
+    phone_search_prefix,
+    search_customers,
+)
+from app.utils.delivery_receipts import customer_delivery_stats
+from app.utils.loyalty import settle_delivered_orders
+from app.utils.outbox import (
+    enqueue_order_confirmation,
+    enqueue_status_notifications,
+    notify_outbox,
+)
+
+ORDERS_PAGE_SIZE = 50
+ORDERS_SYNC_OVERLAP = datetime.timedelta(seconds=30)
+
+
+def _order_filter_conditions(
+    priority_filter: str, status_filter: str, search_query: str, params: dict
+) -> tuple[list[str], str]:
+    """
+    Build the SQL conditions for the order list filters, filling in params.
+    Also returns the SQL for the search rank: the best of the trigram
+    similarity on customer name and special instructions, a phone prefix hit
+    and an exact order ID hit, or 0 when there is no search.
+    """
+    conditions = []
+    if priority_filter != "all":
+        conditions.append("o.priority = :priority")
+        params["priority"] = priority_filter
+    if status_filter != "all":
+        conditions.append("o.status = :status")
+        params["status"] = status_filter
+    search = search_query.strip()
+    if not search:
+        return (conditions, "0")
+    params["search"] = search
+    params["search_pattern"] = f"%{escape_like(search)}%"
+    candidates = [
+        "SELECT om.order_id FROM orders om JOIN customers cm ON cm.customer_id = om.customer_id WHERE cm.name ILIKE :search_pattern",
+        "SELECT order_id FROM orders WHERE special_instructions ILIKE :search_pattern",
+    ]
+    rank_parts = [
+        "similarity(c.name, :search)",
+        "word_similarity(:search, COALESCE(o.special_instructions, ''))",
+    ]
+    phone_prefix = phone_search_prefix(search)
+    if phone_prefix:
+        params["phone_prefix"] = phone_prefix
+        candidates.append(
+            "SELECT om.order_id FROM orders om JOIN customers cm ON cm.customer_id = om.customer_id WHERE cm.phone_normalized LIKE :phone_prefix"
+        )
+        rank_parts.append(
+            "CASE WHEN c.phone_normalized LIKE :phone_prefix THEN 1 ELSE 0 END"
+        )
+    match = f"o.order_id IN ({' UNION '.join(candidates)})"
+    if search.isdigit() and len(search) <= 9:
+        params["search_order_id"] = int(search)
+        match = f"(o.order_id = :search_order_id OR {match})"
+        rank_parts.append("CASE WHEN o.order_id = :search_order_id THEN 2 ELSE 0 END")
+    conditions.append(match)
+    return (conditions, f"ROUND(CAST(GREATEST({', '.join(rank_parts)}) AS numeric), 4)")
+
+
+async def _fetch_order_page(
+    priority_filter: str,
+    status_filter: str,
+    search_query: str,
+    cursor: tuple[Any, datetime.date, int] | None = None,
+) -> tuple[list[OrderWithCustomerName], bool, datetime.datetime]:
+    """
+    Fetch one keyset page of orders with the filters applied in SQL.
+    Pages are ordered by search rank when searching, otherwise by date,
+    with undated orders last.
+    """
+    params: dict[str, Any] = {"limit": ORDERS_PAGE_SIZE + 1}
+    conditions, rank_sql = _order_filter_conditions(
+        priority_filter, status_filter, search_query, params
+    )
+    if search_query.strip():
+        cursor_clause = ""
+        if cursor:
+            cursor_clause = "WHERE (search_rank, COALESCE(order_date, DATE '-infinity'), order_id) < (:cursor_rank, :cursor_date, :cursor_id)"
+            params["cursor_rank"], params["cursor_date"], params["cursor_id"] = cursor
+        where_clause = f"WHERE {' AND '.join(conditions)}"
+        sql = f"""SELECT * FROM (
+    SELECT o.*, c.name as customer_name, {rank_sql} AS search_rank 
+    FROM orders o JOIN customers c ON o.customer_id = c.customer_id 
+    {where_clause}
+) ranked
+{cursor_clause}
+ORDER BY search_rank DESC, COALESCE(order_date, DATE '-infinity') DESC, order_id DESC
+LIMIT :limit"""
+    else:
+        if cursor:
+            conditions.append(
+                "(COALESCE(o.order_date, DATE '-infinity'), o.order_id) < (:cursor_date, :cursor_id)"
+            )
+            _, params["cursor_date"], params["cursor_id"] = cursor
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"""SELECT o.*, c.name as customer_name, 0 AS search_rank 
+FROM orders o JOIN customers c ON o.customer_id = c.customer_id 
+{where_clause}
+ORDER BY COALESCE(o.order_date, DATE '-infinity') DESC, o.order_id DESC
+LIMIT :limit"""
+    async with rx.asession() as session:
+        synced_at = (await session.execute(text("SELECT LOCALTIMESTAMP"))).scalar_one()
+        result = await session.execute(text(sql), params)
+        rows = result.mappings().all()
+    orders = [cast(OrderWithCustomerName, dict(row)) for row in rows[:ORDERS_PAGE_SIZE]]
+    return (orders, len(rows) > ORDERS_PAGE_SIZE, synced_at)
 
-MATERIAL_REQUIREMENTS = {
-    "shirt": {"fabric": 2.5, "button": 8, "thread": 1},
-    "pant": {"fabric": 1.8, "zipper": 1, "thread": 1},
-    "suit": {"fabric": 4.0, "button": 12, "zipper": 1, "thread": 2},
-    "blouse": {"fabric": 1.5, "button": 6, "thread": 1},
-    "dress": {"fabric": 3.5, "zipper": 1, "thread": 1},
-}
+
+def _order_sort_key(order: dict) -> tuple[Any, datetime.date, int]:
+    """
+    The keyset position of an order in the list, matching the page order:
+    a missing order date sorts as -infinity, which asyncpg reads and writes
+    as date.min.
+    """
+    return (
+        order.get("search_rank") or 0,
+        order["order_date"] or datetime.date.min,
+        order["order_id"],
+    )
+
+
+async def _fetch_order_changes(
+    priority_filter: str,
+    status_filter: str,
+    search_query: str,
+    since: datetime.datetime,
+) -> tuple[list[dict], list[int], datetime.datetime]:
+    """
+    Fetch orders updated or deleted since a sync high-water mark.
+    updated_at and deleted_at are stamped with the wall-clock time of the
+    write, not the writing transaction's start, and the window reaches back
+    ORDERS_SYNC_OVERLAP before the mark so rows written shortly before the
+    previous sync but committed after it are not missed.
+    """
+    params: dict[str, Any] = {"since": since - ORDERS_SYNC_OVERLAP}
+    conditions, rank_sql = _order_filter_conditions(
+        priority_filter, status_filter, search_query, params
+    )
+    matches = " AND ".join(conditions) if conditions else "TRUE"
+    async with rx.asession() as session:
+        synced_at = (await session.execute(text("SELECT LOCALTIMESTAMP"))).scalar_one()
+        result = await session.execute(
+            text(f"""SELECT o.*, c.name as customer_name, {rank_sql} AS search_rank, 
+    ({matches}) AS matches_filters
+FROM orders o JOIN customers c ON o.customer_id = c.customer_id 
+WHERE o.updated_at > :since"""),
+            params,
+        )
+        changed = [dict(row) for row in result.mappings().all()]
+        result = await session.execute(
+            text("SELECT order_id FROM order_tombstones WHERE deleted_at > :since"),
+            {"since": params["since"]},
+        )
+        deleted_ids = list(result.scalars().all())
+    return (changed, deleted_ids, synced_at)
+
+
+def _settlement_toasts(settlement: dict) -> list:
+    """Turn a loyalty settlement into user-facing toasts."""
+    toasts = [
+        rx.toast.info(
+            f"{promotion['customer_name']} promoted to {promotion['tier'].capitalize()} tier!"
+        )
+        for promotion in settlement["promotions"]
+    ]
+    toasts.extend(
+        rx.toast.success(
+            f"Referrer {referral['referrer_name']} awarded {referral['points']} points!"
+        )
+        for referral in settlement["referrals"]
+    )
+    return toasts
 
 
 class BaseState(rx.State):
@@ -30,13 +207,22 @@ class BaseState(rx.State):
 
 class OrderState(BaseState):
     is_loading: bool = False
+    is_loading_more: bool = False
     orders: list[OrderWithCustomerName] = []
+    has_more_orders: bool = False
     search_query: str = ""
     priority_filter: str = "all"
+    status_filter: str = "all"
+    _orders_cursor: tuple[Any, datetime.date, int] | None = None
+    _orders_synced_at: datetime.datetime | None = None
+    selected_order_ids: list[int] = []
+    bulk_status: str = ""
+    is_bulk_updating: bool = False
     show_order_form: bool = False
     is_editing_order: bool = False
     editing_order_id: int | None = None
     available_customers: list[Customer] = []
+    customer_search_query: str = ""
     available_workers: list[dict] = []
     selected_customer_id: str = ""
     selected_cloth_type: str = "shirt"
@@ -90,16 +276,7 @@ class OrderState(BaseState):
         if not coupon_code:
             yield rx.toast.error("Please enter a coupon code.")
             return
-        async with rx.asession() as session:
-            result = await session.execute(
-                text("""SELECT * FROM discount_coupons 
-                       WHERE coupon_code = :code 
-                       AND is_active = TRUE 
-                       AND (valid_from IS NULL OR valid_from <= CURRENT_DATE)
-                       AND (valid_until IS NULL OR valid_until >= CURRENT_DATE)"""),
-                {"code": coupon_code.upper()},
-            )
-            coupon = result.mappings().first()
+        coupon = await get_active_coupon(coupon_code)
         async with self:
             if not coupon:
                 self.coupon_message = "Invalid or expired coupon"
@@ -133,39 +310,95 @@ class OrderState(BaseState):
         self.coupon_discount = 0.0
         self.coupon_message = ""
 
-    @rx.var
-    def filtered_orders(self) -> list[OrderWithCustomerName]:
-        orders = self.orders
-        if self.priority_filter != "all":
-            orders = [o for o in orders if o["priority"] == self.priority_filter]
-        if self.search_query:
-            lower_query = self.search_query.lower()
-            orders = [
-                o
-                for o in orders
-                if lower_query in o["customer_name"].lower()
-                or str(o["order_id"]) == lower_query
-            ]
-        return orders
+    @rx.event
+    def set_search_query(self, query: str):
+        self.search_query = query
+        return OrderState.get_orders
+
+    @rx.event
+    def set_priority_filter(self, priority: str):
+        self.priority_filter = priority
+        return OrderState.get_orders
+
+    @rx.event
+    def set_status_filter(self, status: str):
+        self.status_filter = status
+        return OrderState.get_orders
 
     @rx.event
     def open_template_manager(self):
         return rx.toast.info("Order template manager is not yet implemented.")
 
+    def _order_filters(self) -> tuple[str, str, str]:
+        return (self.priority_filter, self.status_filter, self.search_query)
+
     @rx.event(background=True)
     async def get_orders(self):
+        """Load the first page of orders matching the current filters."""
         async with self:
             self.is_loading = True
-        async with rx.asession() as session:
-            result = await session.execute(
-                text("""SELECT o.*, c.name as customer_name 
-FROM orders o JOIN customers c ON o.customer_id = c.customer_id 
-ORDER BY o.order_date DESC""")
-            )
-            rows = result.mappings().all()
-            async with self:
-                self.orders = [cast(OrderWithCustomerName, dict(row)) for row in rows]
-                self.is_loading = False
+            filters = self._order_filters()
+        orders, has_more, synced_at = await _fetch_order_page(*filters)
+        async with self:
+            if filters != self._order_filters():
+                return
+            self.orders = orders
+            self.has_more_orders = has_more
+            self._orders_cursor = _order_sort_key(orders[-1]) if orders else None
+            self._orders_synced_at = synced_at
+            self.is_loading = False
+
+    @rx.event(background=True)
+    async def sync_orders(self):
+        """Merge orders changed since the last load into the loaded list by order_id."""
+        async with self:
+            since = self._orders_synced_at
+            filters = self._order_filters()
+        if since is None:
+            yield OrderState.get_orders
+            return
+        changed, deleted_ids, synced_at = await _fetch_order_changes(*filters, since)
+        async with self:
+            if filters != self._order_filters() or since != self._orders_synced_at:
+                return
+            self._orders_synced_at = synced_at
+            if not changed and not deleted_ids:
+                return
+            cursor = self._orders_cursor
+            loaded = {order["order_id"]: order for order in self.orders}
+            for order_id in deleted_ids:
+                loaded.pop(order_id, None)
+            for row in changed:
+                matches = row.pop("matches_filters")
+                in_window = (
+                    not self.has_more_orders
+                    or cursor is None
+                    or _order_sort_key(row) >= cursor
+                )
+                if matches and (row["order_id"] in loaded or in_window):
+                    loaded[row["order_id"]] = cast(OrderWithCustomerName, row)
+                else:
+                    loaded.pop(row["order_id"], None)
+            self.orders = sorted(loaded.values(), key=_order_sort_key, reverse=True)
+
+    @rx.event(background=True)
+    async def load_more_orders(self):
+        """Append the next page of orders after the current keyset cursor."""
+        async with self:
+            if self.is_loading_more or not self.has_more_orders:
+                return
+            self.is_loading_more = True
+            filters = self._order_filters()
+            cursor = self._orders_cursor
+        orders, has_more, _ = await _fetch_order_page(*filters, cursor=cursor)
+        async with self:
+            self.is_loading_more = False
+            if filters != self._order_filters() or cursor != self._orders_cursor:
+                return
+            self.orders = self.orders + orders
+            self.has_more_orders = has_more
+            if orders:
+                self._orders_cursor = _order_sort_key(orders[-1])
 
     @rx.event
     def toggle_order_form(self):
@@ -178,6 +411,7 @@ ORDER BY o.order_date DESC""")
     def _reset_order_form(self):
         self.editing_order_id = None
         self.selected_customer_id = ""
+        self.customer_search_query = ""
         self.selected_cloth_type = "shirt"
         self.order_quantity = 1
         self.order_delivery_date = ""
@@ -266,17 +500,14 @@ ORDER BY o.order_date DESC""")
         async with rx.asession() as session:
             result = await session.execute(
                 text("""SELECT
-                    w.worker_id,
-                    w.worker_name,
-                    w.role,
-                    w.active_status,
-                    COUNT(o.order_id) as current_orders
-                FROM workers w
-                LEFT JOIN orders o ON w.worker_id = o.assigned_worker
-                    AND o.status NOT IN ('delivered', 'cancelled')
-                WHERE w.active_status = TRUE
-                GROUP BY w.worker_id, w.worker_name, w.role, w.active_status
-                ORDER BY current_orders ASC, w.worker_name""")
+                    worker_id,
+                    worker_name,
+                    role,
+                    active_status,
+                    open_order_count as current_orders
+                FROM workers
+                WHERE active_status = TRUE
+                ORDER BY open_order_count ASC, worker_name""")
             )
             workers = [dict(row) for row in result.mappings().all()]
         async with self:
@@ -284,19 +515,29 @@ ORDER BY o.order_date DESC""")
 
     @rx.event(background=True)
     async def load_form_data(self):
-        async with rx.asession() as session:
-            customer_result = await session.execute(
-                text(
-                    "SELECT customer_id, name, phone_number, prefer_whatsapp, opt_in_whatsapp FROM customers ORDER BY name"
-                )
-            )
-            async with self:
-                self.available_customers = [
-                    cast(Customer, dict(row))
-                    for row in customer_result.mappings().all()
-                ]
+        yield OrderState.load_customer_options
         yield OrderState.load_workers_with_workload
 
+    @rx.event
+    def set_customer_search_query(self, query: str):
+        self.customer_search_query = query
+        return OrderState.load_customer_options
+
+    @rx.event(background=True)
+    async def load_customer_options(self):
+        """Load the customer picker options matching the typeahead query."""
+        async with self:
+            query = self.customer_search_query
+            selected_id = (
+                int(self.selected_customer_id) if self.selected_customer_id else None
+            )
+        async with rx.asession() as session:
+            customers = await search_customers(session, query, selected_id)
+        async with self:
+            if query != self.customer_search_query:
+                return
+            self.available_customers = [cast(Customer, c) for c in customers]
+
     @rx.event
     def on_cloth_type_changed(self, cloth_type: str):
         self.selected_cloth_type = cloth_type
@@ -366,34 +607,20 @@ ORDER BY o.order_date DESC""")
 
     @rx.event(background=True)
     async def add_order(self, form_data: dict):
-        """Adds a new order to the database and triggers notification sending."""
+        """Adds a new order to the database and queues the confirmation message."""
         cloth_type = form_data["cloth_type"]
         quantity = int(form_data.get("quantity", 1))
-        required_mats = MATERIAL_REQUIREMENTS.get(cloth_type, {})
-        async with rx.asession() as session:
-            for material_type, req_qty in required_mats.items():
-                total_req = req_qty * quantity
-                result = await session.execute(
-                    text(
-                        "SELECT quantity_in_stock, material_name FROM materials WHERE material_type = :type AND material_name ILIKE :name_pattern LIMIT 1"
-                    ),
-                    {"type": material_type, "name_pattern": f"%{material_type}%"},
-                )
-                material = result.mappings().first()
-                if not material or material["quantity_in_stock"] < total_req:
-                    available_qty = material["quantity_in_stock"] if material else 0
-                    material_name = (
-                        material["material_name"] if material else material_type
-                    )
-                    yield rx.toast.error(
-                        f"Insufficient stock for {material_name.capitalize()}. Required: {total_req}, Available: {available_qty}"
-                    )
-                    return
+        required_mats = {
+            material_type: req_qty * quantity
+            for material_type, req_qty in MATERIAL_REQUIREMENTS.get(
+                cloth_type, {}
+            ).items()
+        }
         customer_id = int(form_data["customer_id"])
         total_amount = float(form_data.get("total_amount", 0))
         delivery_date = form_data.get("delivery_date") or None
         balance_payment = self.final_balance_payment
-        async with rx.asession() as session, session.begin():
+        async with rx.asession() as session:
             result = await session.execute(
                 text("""INSERT INTO orders (customer_id, order_date, delivery_date, status, 
             cloth_type, quantity, total_amount, advance_payment, balance_payment, 
@@ -408,7 +635,7 @@ ORDER BY o.order_date DESC""")
                     "delivery_date": delivery_date,
                     "status": "pending",
                     "cloth_type": form_data["cloth_type"],
-                    "quantity": int(form_data.get("quantity", 1)),
+                    "quantity": quantity,
                     "total_amount": total_amount,
                     "advance_payment": float(form_data.get("advance_payment", 0)),
                     "balance_payment": balance_payment,
@@ -420,6 +647,13 @@ ORDER BY o.order_date DESC""")
                 },
             )
             new_order_id = result.scalar_one()
+            stock_report = await reserve_materials(session, new_order_id, required_mats)
+            if any((item["shortfall"] > 0 for item in stock_report)):
+                await session.rollback()
+                yield rx.toast.error(
+                    f"Insufficient stock: {format_shortfall(stock_report)}"
+                )
+                return
             if balance_payment > 0:
                 await session.execute(
                     text("""INSERT INTO payment_installments (order_id, installment_number, amount, due_date, status)
@@ -431,13 +665,6 @@ ORDER BY o.order_date DESC""")
                         or datetime.date.today() + datetime.timedelta(days=15),
                     },
                 )
-            if self.applied_coupon_code:
-                await session.execute(
-                    text(
-                        "UPDATE discount_coupons SET used_count = used_count + 1 WHERE coupon_code = :code"
-                    ),
-                    {"code": self.applied_coupon_code},
-                )
             if form_data.get("chest") or form_data.get("waist"):
                 await session.execute(
                     text("""INSERT INTO measurements (customer_id, cloth_type, chest, waist, hip, shoulder_width, sleeve_length, shirt_length, pant_length, inseam, neck, measurement_date)
@@ -475,318 +702,182 @@ ORDER BY o.order_date DESC""")
                         "measurement_date": datetime.date.today(),
                     },
                 )
-        async with self:
-            self.show_order_form = False
-            yield rx.toast.success("Order added successfully!")
-            yield OrderState.get_orders
-            yield OrderState.send_order_notifications(
+            if self.applied_coupon_code and (
+                not await redeem_coupon(session, self.applied_coupon_code)
+            ):
+                await session.rollback()
+                async with self:
+                    coupon_code = self.applied_coupon_code
+                    self.applied_coupon_code = ""
+                    self.coupon_discount = 0.0
+                    self.coupon_message = "Coupon usage limit reached"
+                yield rx.toast.error(
+                    f"Coupon {coupon_code} is no longer available and was removed. Review the total and submit again."
+                )
+                return
+            await enqueue_order_confirmation(
+                session,
                 new_order_id,
-                customer_id,
                 str(delivery_date) if delivery_date else "TBA",
                 total_amount,
             )
-
-    @rx.event(background=True)
-    async def send_order_notifications(
-        self, order_id: int, customer_id: int, delivery_date: str, total_amount: float
-    ):
-        """Send order confirmation notifications in the background."""
-        from app.utils.sms import send_order_confirmation
-        from app.utils.whatsapp import send_whatsapp_order_confirmation
-
+            await session.commit()
+        notify_outbox()
         async with self:
-            customer = next(
-                (
-                    c
-                    for c in self.available_customers
-                    if c["customer_id"] == customer_id
-                ),
-                None,
-            )
-        if not customer:
-            logging.error(
-                f"Could not find customer {customer_id} to send notification for order {order_id}"
-            )
-            return
-        opt_in_whatsapp = customer.get("opt_in_whatsapp", False)
-        prefer_whatsapp = customer.get("prefer_whatsapp", False)
-        should_send_whatsapp = opt_in_whatsapp and prefer_whatsapp
-        should_send_sms = not should_send_whatsapp
-        if should_send_sms:
-            sms_sent = send_order_confirmation(
-                customer_phone=customer["phone_number"],
-                customer_name=customer["name"],
-                order_id=order_id,
-                delivery_date=delivery_date,
-                total_amount=total_amount,
-            )
-            if not sms_sent:
-                logging.error(
-                    f"Failed to send order confirmation SMS for order {order_id}."
-                )
-        if should_send_whatsapp:
-            wa_sent = send_whatsapp_order_confirmation(
-                customer_phone=customer["phone_number"],
-                customer_name=customer["name"],
-                order_id=order_id,
-                delivery_date=delivery_date,
-                total_amount=total_amount,
-            )
-            if not wa_sent:
-                logging.error(
-                    f"Failed to send order confirmation via WhatsApp for order {order_id}."
-                )
+            self.show_order_form = False
+            yield rx.toast.success("Order added successfully!")
+            yield OrderState.sync_orders
 
     @rx.event(background=True)
     async def update_order_status(self, order_id: int, new_status: str):
-        from app.utils.sms import (
-            send_order_ready_notification,
-            send_status_update_notification,
-        )
-        from app.utils.whatsapp import (
-            send_whatsapp_order_ready,
-            send_whatsapp_status_update,
-        )
-
         if new_status == "cutting":
             async with rx.asession() as session, session.begin():
-                order_res = await session.execute(
-                    text(
-                        "SELECT cloth_type, quantity, assigned_worker FROM orders WHERE order_id = :order_id"
-                    ),
-                    {"order_id": order_id},
+                deductions, low_stock = await deduct_materials_for_orders(
+                    session, [order_id]
                 )
-                order = order_res.mappings().first()
-                if not order:
-                    yield rx.toast.error(f"Order #{order_id} not found.")
-                    return
-                labor_cost = 0.0
-                if order["assigned_worker"]:
-                    worker_res = await session.execute(
-                        text("SELECT salary FROM workers WHERE worker_id = :worker_id"),
-                        {"worker_id": order["assigned_worker"]},
-                    )
-                    worker = worker_res.mappings().first()
-                    if worker:
-                        labor_cost = float(worker["salary"]) * 0.01
-                required_mats = MATERIAL_REQUIREMENTS.get(order["cloth_type"], {})
-                total_material_cost = 0.0
-                for material_type, req_qty in required_mats.items():
-                    total_req = req_qty * order["quantity"]
-                    mat_res = await session.execute(
-                        text(
-                            "SELECT material_id, quantity_in_stock, unit_price, material_name FROM materials WHERE material_type = :type AND material_name ILIKE :name_pattern LIMIT 1"
-                        ),
-                        {"type": material_type, "name_pattern": f"%{material_type}%"},
-                    )
-                    material = mat_res.mappings().first()
-                    if not material or material["quantity_in_stock"] < total_req:
-                        available = material["quantity_in_stock"] if material else 0
-                        mat_name = (
-                            material["material_name"] if material else material_type
-                        )
-                        yield rx.toast.error(
-                            f"Cannot start cutting. Insufficient {mat_name.capitalize()}. Required: {total_req}, Available: {available}"
-                        )
-                        return
-                for material_type, req_qty in required_mats.items():
-                    total_req = req_qty * order["quantity"]
-                    mat_res = await session.execute(
-                        text(
-                            "SELECT material_id, quantity_in_stock, unit_price, reorder_level FROM materials WHERE material_type = :type AND material_name ILIKE :name_pattern LIMIT 1"
-                        ),
-                        {"type": material_type, "name_pattern": f"%{material_type}%"},
-                    )
-                    material = mat_res.mappings().first()
-                    await session.execute(
-                        text(
-                            "UPDATE materials SET quantity_in_stock = quantity_in_stock - :used WHERE material_id = :mat_id"
-                        ),
-                        {"used": total_req, "mat_id": material["material_id"]},
-                    )
-                    wastage = total_req * 0.05
-                    cost = total_req * material["unit_price"]
-                    total_material_cost += cost
-                    await session.execute(
-                        text(
-                            "INSERT INTO order_materials (order_id, material_id, quantity_used, wastage, cost) VALUES (:oid, :mid, :qty, :wst, :cst)"
-                        ),
-                        {
-                            "oid": order_id,
-                            "mid": material["material_id"],
-                            "qty": total_req,
-                            "wst": wastage,
-                            "cst": cost,
-                        },
-                    )
-                    if (
-                        material["quantity_in_stock"] - total_req
-                        < material["reorder_level"]
-                    ):
-                        yield rx.toast.warning(
-                            f"{material_type.capitalize()} stock is now below reorder level!"
-                        )
-                await session.execute(
-                    text(
-                        "UPDATE orders SET material_cost = :material_cost, labor_cost = :labor_cost, profit = total_amount - :material_cost - :labor_cost WHERE order_id = :id"
-                    ),
-                    {
-                        "material_cost": total_material_cost,
-                        "labor_cost": labor_cost,
-                        "id": order_id,
-                    },
+            deduction = deductions.get(order_id)
+            if not deduction:
+                yield rx.toast.error(f"Order #{order_id} not found.")
+                return
+            if deduction["status"] == "insufficient":
+                yield rx.toast.error(
+                    f"Cannot start cutting. Insufficient {format_shortfall(deduction['shortfalls'])}"
                 )
+                return
+            for material_name in low_stock:
+                yield rx.toast.warning(
+                    f"{material_name.capitalize()} stock is now below reorder level!"
+                )
+            if deduction["status"] == "deducted":
                 yield rx.toast.success("Materials deducted and costs updated.")
+        settlement = None
         async with rx.asession() as session, session.begin():
             await session.execute(
                 text("UPDATE orders SET status = :status WHERE order_id = :order_id"),
                 {"status": new_status, "order_id": order_id},
             )
+            if new_status.lower() == "cancelled":
+                await release_material_reservations(session, [order_id])
             if new_status.lower() == "delivered":
-                order_res = await session.execute(
-                    text(
-                        "SELECT customer_id, total_amount FROM orders WHERE order_id = :id"
-                    ),
-                    {"id": order_id},
+                settlement = await settle_delivered_orders(session, [order_id])
+            await enqueue_status_notifications(session, [order_id], new_status)
+        notify_outbox()
+        if settlement:
+            for toast in _settlement_toasts(settlement):
+                yield toast
+        yield OrderState.sync_orders
+        yield rx.toast.info(f"Order #{order_id} status updated to {new_status}.")
+
+    @rx.event
+    def toggle_order_selection(self, order_id: int):
+        if order_id in self.selected_order_ids:
+            self.selected_order_ids = [
+                selected for selected in self.selected_order_ids if selected != order_id
+            ]
+        else:
+            self.selected_order_ids = self.selected_order_ids + [order_id]
+
+    @rx.event
+    def toggle_select_all_orders(self):
+        if self.all_orders_selected:
+            self.selected_order_ids = []
+        else:
+            self.selected_order_ids = [order["order_id"] for order in self.orders]
+
+    @rx.event
+    def clear_order_selection(self):
+        self.selected_order_ids = []
+
+    @rx.var
+    def all_orders_selected(self) -> bool:
+        return len(self.orders) > 0 and len(self.selected_order_ids) >= len(self.orders)
+
+    @rx.event
+    def set_bulk_status(self, status: str):
+        self.bulk_status = status
+
+    @rx.event(background=True)
+    async def bulk_update_order_status(self):
+        """Move every selected order to the bulk status in one transaction."""
+        async with self:
+            order_ids = sorted(set(self.selected_order_ids))
+            new_status = self.bulk_status
+            if self.is_bulk_updating:
+                return
+            if not order_ids or not new_status:
+                yield rx.toast.error("Select orders and a status first.")
+                return
+            self.is_bulk_updating = True
+        failures: dict[int, str] = {}
+        low_stock: list[str] = []
+        settlement = None
+        updated: list[int] = []
+        try:
+            async with rx.asession() as session, session.begin():
+                result = await session.execute(
+                    text("""SELECT order_id, status FROM orders 
+                         WHERE order_id = ANY(CAST(:order_ids AS integer[])) 
+                         ORDER BY order_id FOR UPDATE"""),
+                    {"order_ids": order_ids},
                 )
-                order_info = order_res.mappings().first()
-                if order_info:
-                    customer_id = order_info["customer_id"]
-                    total_amount = float(order_info["total_amount"])
-                    points_earned = int(total_amount / 100)
-                    cust_res = await session.execute(
-                        text(
-                            "SELECT total_points, customer_tier, referred_by FROM customers WHERE customer_id = :cid"
-                        ),
-                        {"cid": customer_id},
-                    )
-                    customer_data = cust_res.mappings().first()
-                    current_points = customer_data["total_points"]
-                    new_total_points = current_points + points_earned
-                    current_tier = customer_data["customer_tier"]
-                    new_tier = current_tier
-                    if new_total_points > 2000 and current_tier != "vip":
-                        new_tier = "vip"
-                    elif new_total_points > 500 and current_tier not in [
-                        "vip",
-                        "regular",
-                    ]:
-                        new_tier = "regular"
-                    await session.execute(
-                        text(
-                            "UPDATE customers SET total_points = :points, customer_tier = :tier WHERE customer_id = :cid"
-                        ),
-                        {
-                            "points": new_total_points,
-                            "tier": new_tier,
-                            "cid": customer_id,
-                        },
+                current = {row["order_id"]: row["status"] for row in result.mappings()}
+                for order_id in order_ids:
+                    if order_id not in current:
+                        failures[order_id] = "not found"
+                to_update = [
+                    order_id
+                    for order_id, status in current.items()
+                    if status != new_status
+                ]
+                if new_status == "cutting":
+                    deductions, low_stock = await deduct_materials_for_orders(
+                        session, to_update
                     )
+                    for order_id in to_update:
+                        deduction = deductions[order_id]
+                        if deduction["status"] == "insufficient":
+                            failures[order_id] = (
+                                f"insufficient {format_shortfall(deduction['shortfalls'])}"
+                            )
+                    to_update = [
+                        order_id for order_id in to_update if order_id not in failures
+                    ]
+                if to_update:
                     await session.execute(
-                        text("""INSERT INTO loyalty_points (customer_id, points_change, new_balance, transaction_type, order_id, description)
-                             VALUES (:cid, :points, :balance, 'purchase', :oid, :desc)"""),
-                        {
-                            "cid": customer_id,
-                            "points": points_earned,
-                            "balance": new_total_points,
-                            "oid": order_id,
-                            "desc": f"Points earned from order #{order_id}",
-                        },
+                        text("""UPDATE orders SET status = :status 
+                             WHERE order_id = ANY(CAST(:order_ids AS integer[]))"""),
+                        {"status": new_status, "order_ids": to_update},
                     )
-                    if new_tier != current_tier:
-                        yield rx.toast.info(
-                            f"Customer promoted to {new_tier.capitalize()} tier!"
-                        )
-                    if customer_data["referred_by"]:
-                        referral_check = await session.execute(
-                            text("""SELECT referral_id, referrer_customer_id, reward_points 
-                                     FROM customer_referrals 
-                                     WHERE referred_customer_id = :referred_id AND referral_status = 'pending'"""),
-                            {"referred_id": customer_id},
-                        )
-                        referral_info = referral_check.mappings().first()
-                        order_count_check = await session.execute(
-                            text(
-                                "SELECT COUNT(*) FROM orders WHERE customer_id = :cid AND status = 'delivered'"
-                            ),
-                            {"cid": customer_id},
-                        )
-                        completed_orders_count = order_count_check.scalar_one()
-                        if referral_info and completed_orders_count == 1:
-                            referrer_id = referral_info["referrer_customer_id"]
-                            reward_points = referral_info["reward_points"]
-                            referrer_cust_res = await session.execute(
-                                text(
-                                    "SELECT name, total_points FROM customers WHERE customer_id = :rid"
-                                ),
-                                {"rid": referrer_id},
-                            )
-                            referrer_data = referrer_cust_res.mappings().first()
-                            new_referrer_points = (
-                                referrer_data["total_points"] + reward_points
-                            )
-                            await session.execute(
-                                text(
-                                    "UPDATE customers SET total_points = :points WHERE customer_id = :rid"
-                                ),
-                                {"points": new_referrer_points, "rid": referrer_id},
-                            )
-                            await session.execute(
-                                text("""INSERT INTO loyalty_points (customer_id, points_change, new_balance, transaction_type, description)
-                                     VALUES (:cid, :points, :balance, 'referral', :desc)"""),
-                                {
-                                    "cid": referrer_id,
-                                    "points": reward_points,
-                                    "balance": new_referrer_points,
-                                    "desc": f"Referral bonus for {customer_data['name']}",
-                                },
-                            )
-                            await session.execute(
-                                text("""UPDATE customer_referrals 
-                                     SET referral_status = 'completed', completed_date = :date, order_completed = TRUE
-                                     WHERE referral_id = :ref_id"""),
-                                {
-                                    "date": datetime.date.today(),
-                                    "ref_id": referral_info["referral_id"],
-                                },
-                            )
-                            yield rx.toast.success(
-                                f"Referrer {referrer_data['name']} awarded {reward_points} points!"
-                            )
+                    if new_status == "cancelled":
+                        await release_material_reservations(session, to_update)
+                    if new_status == "delivered":
+                        settlement = await settle_delivered_orders(session, to_update)
+                    await enqueue_status_notifications(session, to_update, new_status)
+                updated = to_update
+        except Exception as e:
+            logging.exception(f"Bulk status update failed: {e}")
+            async with self:
+                self.is_bulk_updating = False
+            yield rx.toast.error("Bulk status update failed. No orders were changed.")
+            return
         async with self:
-            yield OrderState.get_orders
-        yield rx.toast.info(f"Order #{order_id} status updated to {new_status}.")
-        async with rx.asession() as session:
-            result = await session.execute(
-                text("""SELECT c.name, c.phone_number, c.opt_in_whatsapp, c.prefer_whatsapp 
-                         FROM customers c JOIN orders o ON c.customer_id = o.customer_id 
-                         WHERE o.order_id = :order_id"""),
-                {"order_id": order_id},
+            self.is_bulk_updating = False
+            self.selected_order_ids = [
+                order_id for order_id in self.selected_order_ids if order_id in failures
+            ]
+        for material_name in low_stock:
+            yield rx.toast.warning(
+                f"{material_name.capitalize()} stock is now below reorder level!"
             )
-            customer_info = result.mappings().first()
-        if customer_info:
-            opt_in_whatsapp = customer_info.get("opt_in_whatsapp", False)
-            prefer_whatsapp = customer_info.get("prefer_whatsapp", False)
-            customer_phone = customer_info["phone_number"]
-            customer_name = customer_info["name"]
-            should_send_whatsapp = opt_in_whatsapp and prefer_whatsapp
-            should_send_sms = not should_send_whatsapp
-            if new_status.lower() == "ready":
-                if should_send_sms:
-                    send_order_ready_notification(
-                        customer_phone, customer_name, order_id
-                    )
-                if should_send_whatsapp:
-                    send_whatsapp_order_ready(customer_phone, customer_name, order_id)
-            else:
-                if should_send_sms:
-                    send_status_update_notification(
-                        customer_phone, customer_name, order_id, new_status
-                    )
-                if should_send_whatsapp:
-                    send_whatsapp_status_update(
-                        customer_phone, customer_name, order_id, new_status
-                    )
+        if settlement:
+            for toast in _settlement_toasts(settlement):
+                yield toast
+        if updated:
+            notify_outbox()
+            yield rx.toast.success(f"{len(updated)} order(s) moved to {new_status}.")
+        for order_id, reason in failures.items():
+            yield rx.toast.error(f"Order #{order_id} not updated: {reason}")
+        yield OrderState.sync_orders
 
     @rx.event(background=True)
     async def duplicate_order(self, order_id: int):
@@ -817,7 +908,7 @@ ORDER BY o.order_date DESC""")
             yield rx.toast.success(
                 f"Order #{order_id} duplicated as new order #{new_order_id}."
             )
-            yield OrderState.get_orders
+            yield OrderState.sync_orders
 
     @rx.event
     def generate_qr_code(self, order_id: int):
@@ -840,6 +931,8 @@ class CustomerState(BaseState):
     notes: str = ""
     opt_in_whatsapp: bool = False
     prefer_whatsapp: bool = False
+    preferred_language: str = "en"
+    delivery_stats: list[dict] = []
     customer_lifetime_value: float = 0.0
     suggested_discount_percent: float = 0.0
     show_pricing_suggestion: bool = False
@@ -913,7 +1006,7 @@ ORDER BY c.name""")
         async with rx.asession() as session:
             await session.execute(
                 text(
-                    "INSERT INTO customers (name, phone_number, email, address, notes, registration_date, opt_in_whatsapp, prefer_whatsapp) VALUES (:name, :phone_number, :email, :address, :notes, :registration_date, :opt_in_whatsapp, :prefer_whatsapp)"
+                    "INSERT INTO customers (name, phone_number, email, address, notes, registration_date, opt_in_whatsapp, prefer_whatsapp, preferred_language) VALUES (:name, :phone_number, :email, :address, :notes, :registration_date, :opt_in_whatsapp, :prefer_whatsapp, :preferred_language)"
                 ),
                 {
                     "name": form_data["name"],
@@ -924,6 +1017,7 @@ ORDER BY c.name""")
                     "registration_date": datetime.date.today(),
                     "opt_in_whatsapp": form_data.get("opt_in_whatsapp") == "on",
                     "prefer_whatsapp": form_data.get("prefer_whatsapp") == "on",
+                    "preferred_language": form_data.get("preferred_language") or "en",
                 },
             )
             await session.commit()
@@ -940,7 +1034,7 @@ ORDER BY c.name""")
         async with rx.asession() as session:
             await session.execute(
                 text(
-                    "UPDATE customers SET name = :name, phone_number = :phone_number, email = :email, address = :address, notes = :notes, opt_in_whatsapp = :opt_in_whatsapp, prefer_whatsapp = :prefer_whatsapp WHERE customer_id = :customer_id"
+                    "UPDATE customers SET name = :name, phone_number = :phone_number, email = :email, address = :address, notes = :notes, opt_in_whatsapp = :opt_in_whatsapp, prefer_whatsapp = :prefer_whatsapp, preferred_language = :preferred_language WHERE customer_id = :customer_id"
                 ),
                 {
                     "name": form_data["name"],
@@ -950,6 +1044,7 @@ ORDER BY c.name""")
                     "notes": form_data.get("notes", ""),
                     "opt_in_whatsapp": form_data.get("opt_in_whatsapp") == "on",
                     "prefer_whatsapp": form_data.get("prefer_whatsapp") == "on",
+                    "preferred_language": form_data.get("preferred_language") or "en",
                     "customer_id": self.editing_customer_id,
                 },
             )
@@ -983,7 +1078,18 @@ ORDER BY c.name""")
         self.notes = customer.get("notes") or ""
         self.opt_in_whatsapp = customer.get("opt_in_whatsapp", False)
         self.prefer_whatsapp = bool(customer.get("prefer_whatsapp", False))
+        self.preferred_language = customer.get("preferred_language") or "en"
+        self.delivery_stats = []
         self.show_form = True
+        return CustomerState.load_delivery_stats(customer["customer_id"])
+
+    @rx.event(background=True)
+    async def load_delivery_stats(self, customer_id: int):
+        async with rx.asession() as session:
+            stats = await customer_delivery_stats(session, customer_id)
+        async with self:
+            if self.editing_customer_id == customer_id:
+                self.delivery_stats = stats
 
     def _reset_form_fields(self):
         self.name = ""
@@ -994,6 +1100,8 @@ ORDER BY c.name""")
         self.editing_customer_id = None
         self.opt_in_whatsapp = False
         self.prefer_whatsapp = False
+        self.preferred_language = "en"
+        self.delivery_stats = []
 
     @rx.event
     def show_delete_confirmation(self, customer: Customer):
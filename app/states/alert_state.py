@@ -2,6 +2,7 @@ import reflex as rx
 from typing import cast, TypedDict
 from sqlalchemy import text
 import datetime
+from app.utils.outbox import notification_savings
 
 
 class AlertSetting(TypedDict):
@@ -28,6 +29,12 @@ class AlertState(rx.State):
     alert_history: list[AlertHistory] = []
     editing_setting: dict | None = None
     show_edit_dialog: bool = False
+    notification_savings: dict[str, int] = {
+        "sent": 0,
+        "coalesced": 0,
+        "duplicates": 0,
+        "saved": 0,
+    }
 
     @rx.var
     def editing_setting_title(self) -> str:
@@ -50,7 +57,9 @@ class AlertState(rx.State):
             history_result = await session.execute(
                 text("SELECT * FROM alert_history ORDER BY triggered_at DESC LIMIT 50")
             )
+            savings = await notification_savings(session)
             async with self:
+                self.notification_savings = savings
                 self.alert_settings = [
                     {
                         **dict(row),
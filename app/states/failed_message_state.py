@@ -0,0 +1,112 @@
+import reflex as rx
+from typing import TypedDict
+from app.utils.outbox import (
+    discard_dead_letters,
+    list_dead_letters,
+    notify_outbox,
+    retry_dead_letters,
+)
+
+
+class FailedMessage(TypedDict):
+    dead_letter_id: int
+    order_id: int | None
+    channel: str
+    template: str
+    attempts: int
+    last_error: str | None
+    created_at: str
+    failed_at: str
+    customer_name: str | None
+    customer_phone: str | None
+
+
+class FailedMessageState(rx.State):
+    is_loading: bool = False
+    failed_messages: list[FailedMessage] = []
+    selected_ids: list[int] = []
+
+    @rx.var
+    def all_selected(self) -> bool:
+        return len(self.failed_messages) > 0 and len(self.selected_ids) >= len(
+            self.failed_messages
+        )
+
+    @rx.event(background=True)
+    async def load_failed_messages(self):
+        async with self:
+            self.is_loading = True
+        async with rx.asession() as session:
+            rows = await list_dead_letters(session)
+        async with self:
+            self.failed_messages = [
+                {
+                    **row,
+                    "created_at": str(row["created_at"] or ""),
+                    "failed_at": str(row["failed_at"]),
+                }
+                for row in rows
+            ]
+            self.selected_ids = [
+                row["dead_letter_id"]
+                for row in rows
+                if row["dead_letter_id"] in self.selected_ids
+            ]
+            self.is_loading = False
+
+    @rx.event
+    def toggle_selection(self, dead_letter_id: int):
+        if dead_letter_id in self.selected_ids:
+            self.selected_ids = [
+                selected for selected in self.selected_ids if selected != dead_letter_id
+            ]
+        else:
+            self.selected_ids = self.selected_ids + [dead_letter_id]
+
+    @rx.event
+    def toggle_select_all(self):
+        if self.all_selected:
+            self.selected_ids = []
+        else:
+            self.selected_ids = [
+                message["dead_letter_id"] for message in self.failed_messages
+            ]
+
+    @rx.event(background=True)
+    async def retry_selected(self):
+        async with self:
+            dead_letter_ids = list(self.selected_ids)
+        if not dead_letter_ids:
+            yield rx.toast.error("Select messages to retry.")
+            return
+        async with rx.asession() as session, session.begin():
+            retried = await retry_dead_letters(session, dead_letter_ids)
+        notify_outbox()
+        async with self:
+            self.selected_ids = []
+        yield rx.toast.success(f"{retried} message(s) queued for retry.")
+        yield FailedMessageState.load_failed_messages
+
+    @rx.event(background=True)
+    async def retry_all(self):
+        async with rx.asession() as session, session.begin():
+            retried = await retry_dead_letters(session)
+        notify_outbox()
+        async with self:
+            self.selected_ids = []
+        yield rx.toast.success(f"{retried} message(s) queued for retry.")
+        yield FailedMessageState.load_failed_messages
+
+    @rx.event(background=True)
+    async def discard_selected(self):
+        async with self:
+            dead_letter_ids = list(self.selected_ids)
+        if not dead_letter_ids:
+            yield rx.toast.error("Select messages to discard.")
+            return
+        async with rx.asession() as session, session.begin():
+            discarded = await discard_dead_letters(session, dead_letter_ids)
+        async with self:
+            self.selected_ids = []
+        yield rx.toast.success(f"{discarded} message(s) discarded.")
+        yield FailedMessageState.load_failed_messages
\ No newline at end of file
@@ -3,6 +3,7 @@ from typing import cast, Any
 from app.models import Measurement, Customer
 from sqlalchemy import text
 import datetime
+from app.utils.customer_search import search_customers
 
 
 class MeasurementWithCustomer(Measurement):
@@ -13,6 +14,7 @@ class MeasurementState(rx.State):
     is_loading: bool = False
     measurements: list[MeasurementWithCustomer] = []
     available_customers: list[Customer] = []
+    customer_search_query: str = ""
     search_query: str = ""
     show_form: bool = False
     is_editing: bool = False
@@ -47,32 +49,29 @@ class MeasurementState(rx.State):
                 cast(MeasurementWithCustomer, dict(row))
                 for row in measurement_result.mappings().all()
             ]
-            customer_result = await session.execute(
-                text(
-                    "SELECT customer_id, name, phone_number FROM customers ORDER BY name"
-                )
-            )
-            customers = [
-                cast(Customer, dict(row)) for row in customer_result.mappings().all()
-            ]
             async with self:
                 self.measurements = measurements
-                self.available_customers = customers
                 self.is_loading = False
 
+    @rx.event
+    def set_customer_search_query(self, query: str):
+        self.customer_search_query = query
+        return MeasurementState.load_customers
+
     @rx.event(background=True)
     async def load_customers(self):
-        async with rx.asession() as session:
-            customer_result = await session.execute(
-                text(
-                    "SELECT customer_id, name, phone_number FROM customers ORDER BY name"
-                )
+        """Load the customer picker options matching the typeahead query."""
+        async with self:
+            query = self.customer_search_query
+            selected_id = (
+                int(self.selected_customer_id) if self.selected_customer_id else None
             )
-            async with self:
-                self.available_customers = [
-                    cast(Customer, dict(row))
-                    for row in customer_result.mappings().all()
-                ]
+        async with rx.asession() as session:
+            customers = await search_customers(session, query, selected_id)
+        async with self:
+            if query != self.customer_search_query:
+                return
+            self.available_customers = [cast(Customer, c) for c in customers]
 
     @rx.var
     def filtered_measurements(self) -> list[MeasurementWithCustomer]:
@@ -90,6 +89,7 @@ class MeasurementState(rx.State):
         self.is_editing = False
         self.editing_measurement_id = None
         self.selected_customer_id = ""
+        self.customer_search_query = ""
         self.selected_cloth_type = "shirt"
         self.chest = ""
         self.waist = ""
@@ -125,7 +125,9 @@ class MeasurementState(rx.State):
         self.pant_length = str(measurement.get("pant_length") or "")
         self.inseam = str(measurement.get("inseam") or "")
         self.neck = str(measurement.get("neck") or "")
+        self.customer_search_query = ""
         self.show_form = True
+        return MeasurementState.load_customers
 
     @rx.event(background=True)
     async def handle_form_submit(self, form_data: dict):
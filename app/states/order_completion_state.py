@@ -2,8 +2,11 @@ import reflex as rx
 from typing import cast
 from app.models import OrderWithCustomerName, Customer
 from sqlalchemy import text
+import asyncio
 import datetime
 import logging
+from app.utils.loyalty import settle_delivered_orders
+from app.utils.outbox import enqueue_status_notifications, notify_outbox
 
 
 class OrderCompletionState(rx.State):
@@ -73,13 +76,33 @@ class OrderCompletionState(rx.State):
                 return
             self.is_processing = True
         order_id = self.order_to_complete["order_id"]
-        customer_id = self.order_to_complete["customer_id"]
         paid_amount = float(form_data.get("payment_amount", 0.0))
         payment_method = form_data.get("payment_method", "cash")
-        from app.state import OrderState
+        customer_name = self.customer_details["name"]
+        customer_phone = self.customer_details["phone_number"]
+        notification_channels = []
+        from app.utils.razorpay import cancel_payment_link, create_payment_link_details
 
-        async with rx.asession() as session:
-            async with session.begin():
+        link_details = await asyncio.to_thread(
+            create_payment_link_details,
+            amount=float(paid_amount),
+            description=f"Payment for Order #{order_id}",
+            customer_name=customer_name,
+            customer_contact=customer_phone,
+            customer_email=self.customer_details.get("email"),
+            order_id=order_id,
+        )
+        payment_link = link_details["short_url"] if link_details else None
+        if payment_link:
+            notification_channels.append("Payment Link")
+        send_to_sms = form_data.get("send_sms") == "on"
+        send_to_whatsapp = form_data.get("send_whatsapp") == "on"
+        should_send_whatsapp = send_to_whatsapp and self.customer_details.get(
+            "opt_in_whatsapp"
+        )
+        should_send_sms = send_to_sms and (not should_send_whatsapp)
+        try:
+            async with rx.asession() as session:
                 await session.execute(
                     text("""INSERT INTO transactions (order_id, transaction_date, transaction_type, amount, payment_method, description)
                          VALUES (:order_id, :date, 'order_payment', :amount, :method, 'Final balance payment')"""),
@@ -90,171 +113,69 @@ class OrderCompletionState(rx.State):
                         "method": payment_method,
                     },
                 )
-            await session.execute(
-                text(
-                    "UPDATE orders SET balance_payment = balance_payment - :paid WHERE order_id = :order_id"
-                ),
-                {"paid": paid_amount, "order_id": order_id},
-            )
-            await session.execute(
-                text(
-                    "UPDATE orders SET status = 'delivered', delivery_date = :date WHERE order_id = :order_id"
-                ),
-                {"date": datetime.date.today(), "order_id": order_id},
-            )
-            await session.execute(
-                text(
-                    "UPDATE payment_installments SET status = 'paid', paid_date = :date WHERE order_id = :order_id"
-                ),
-                {"date": datetime.date.today(), "order_id": order_id},
-            )
-            order_info_res = await session.execute(
-                text(
-                    "SELECT total_amount, discount_amount FROM orders WHERE order_id = :id"
-                ),
-                {"id": order_id},
-            )
-            order_info = order_info_res.mappings().first()
-            final_amount = float(
-                order_info["total_amount"] - (order_info["discount_amount"] or 0)
-            )
-            points_earned = int(final_amount / 100)
-            cust_res = await session.execute(
-                text(
-                    "SELECT total_points, customer_tier FROM customers WHERE customer_id = :cid"
-                ),
-                {"cid": customer_id},
-            )
-            customer_data = cust_res.mappings().first()
-            current_points = customer_data["total_points"]
-            new_total_points = current_points + points_earned
-            current_tier = customer_data["customer_tier"]
-            new_tier = current_tier
-            if new_total_points > 2000 and current_tier != "vip":
-                new_tier = "vip"
-            elif new_total_points > 500 and current_tier not in ["vip", "regular"]:
-                new_tier = "regular"
-            await session.execute(
-                text(
-                    "UPDATE customers SET total_points = :points, customer_tier = :tier WHERE customer_id = :cid"
-                ),
-                {"points": new_total_points, "tier": new_tier, "cid": customer_id},
-            )
-            await session.execute(
-                text("""INSERT INTO loyalty_points (customer_id, points_change, new_balance, transaction_type, order_id, description)
-                     VALUES (:cid, :points, :balance, 'purchase', :oid, :desc)"""),
-                {
-                    "cid": customer_id,
-                    "points": points_earned,
-                    "balance": new_total_points,
-                    "oid": order_id,
-                    "desc": f"Points from order #{order_id}",
-                },
-            )
-            async with self:
-                self.points_awarded = points_earned
-                if new_tier != current_tier:
-                    self.tier_upgraded_to = new_tier.capitalize()
-            referral_check = await session.execute(
-                text("""SELECT r.referral_id, r.referrer_customer_id, r.reward_points, c.name as referrer_name 
-                     FROM customer_referrals r JOIN customers c ON r.referrer_customer_id = c.customer_id
-                     WHERE r.referred_customer_id = :referred_id AND r.referral_status = 'pending'"""),
-                {"referred_id": customer_id},
-            )
-            referral_info = referral_check.mappings().first()
-            order_count_check = await session.execute(
-                text(
-                    "SELECT COUNT(*) FROM orders WHERE customer_id = :cid AND status = 'delivered'"
-                ),
-                {"cid": customer_id},
-            )
-            if referral_info and order_count_check.scalar_one() == 1:
-                referrer_id, reward_points = (
-                    referral_info["referrer_customer_id"],
-                    referral_info["reward_points"],
-                )
-                referrer_cust_res = await session.execute(
-                    text("SELECT total_points FROM customers WHERE customer_id = :rid"),
-                    {"rid": referrer_id},
-                )
-                new_referrer_points = referrer_cust_res.scalar_one() + reward_points
                 await session.execute(
                     text(
-                        "UPDATE customers SET total_points = :points WHERE customer_id = :rid"
+                        "UPDATE orders SET balance_payment = balance_payment - :paid WHERE order_id = :order_id"
                     ),
-                    {"points": new_referrer_points, "rid": referrer_id},
+                    {"paid": paid_amount, "order_id": order_id},
                 )
                 await session.execute(
-                    text("""INSERT INTO loyalty_points (customer_id, points_change, new_balance, transaction_type, description)
-                                     VALUES (:cid, :points, :balance, 'referral', :desc)"""),
-                    {
-                        "cid": referrer_id,
-                        "points": reward_points,
-                        "balance": new_referrer_points,
-                        "desc": f"Referral bonus for {self.customer_details['name']}",
-                    },
+                    text(
+                        "UPDATE orders SET status = 'delivered', delivery_date = :date WHERE order_id = :order_id"
+                    ),
+                    {"date": datetime.date.today(), "order_id": order_id},
                 )
                 await session.execute(
                     text(
-                        "UPDATE customer_referrals SET referral_status = 'completed', completed_date = :date, order_completed = TRUE WHERE referral_id = :ref_id"
+                        "UPDATE payment_installments SET status = 'paid', paid_date = :date WHERE order_id = :order_id"
                     ),
-                    {
-                        "date": datetime.date.today(),
-                        "ref_id": referral_info["referral_id"],
-                    },
+                    {"date": datetime.date.today(), "order_id": order_id},
                 )
-                async with self:
-                    self.referrer_reward = reward_points
-                yield rx.toast.success(
-                    f"Referrer {referral_info['referrer_name']} awarded {reward_points} points!"
-                )
-            await session.commit()
-        customer_name = self.customer_details["name"]
-        customer_phone = self.customer_details["phone_number"]
-        notification_channels = []
-        from app.utils.razorpay import create_payment_link
-
-        payment_link = create_payment_link(
-            amount=float(paid_amount),
-            description=f"Payment for Order #{order_id}",
-            customer_name=customer_name,
-            customer_contact=customer_phone,
-            customer_email=self.customer_details.get("email"),
-            order_id=order_id,
-        )
-        if payment_link:
-            notification_channels.append("Payment Link")
-        send_to_sms = form_data.get("send_sms") == "on"
-        send_to_whatsapp = form_data.get("send_whatsapp") == "on"
-        should_send_whatsapp = send_to_whatsapp and self.customer_details.get(
-            "opt_in_whatsapp"
-        )
-        should_send_sms = send_to_sms and (not should_send_whatsapp)
-        if should_send_sms:
-            from app.utils.sms import send_status_update_notification
-
-            if send_status_update_notification(
-                customer_phone, customer_name, order_id, "delivered", payment_link
-            ):
-                notification_channels.append("SMS")
-        if should_send_whatsapp:
-            from app.utils.whatsapp import send_whatsapp_status_update
-
-            if send_whatsapp_status_update(
-                customer_phone, customer_name, order_id, "delivered", payment_link
-            ):
-                notification_channels.append("WhatsApp")
+                settlement = await settle_delivered_orders(session, [order_id])
+                if should_send_sms or should_send_whatsapp:
+                    queued = await enqueue_status_notifications(
+                        session,
+                        [order_id],
+                        "delivered",
+                        payment_link=payment_link,
+                        channel="whatsapp" if should_send_whatsapp else "sms",
+                    )
+                    if "sms" in queued:
+                        notification_channels.append("SMS")
+                    if "whatsapp" in queued:
+                        notification_channels.append("WhatsApp")
+                await session.commit()
+        except Exception as e:
+            logging.exception(f"Failed to complete order {order_id}: {e}")
+            if link_details:
+                await asyncio.to_thread(cancel_payment_link, link_details["id"])
+            async with self:
+                self.is_processing = False
+            yield rx.toast.error("Could not complete the order. Please try again.")
+            return
+        async with self:
+            self.points_awarded = settlement["points"].get(order_id, 0)
+            if settlement["promotions"]:
+                self.tier_upgraded_to = settlement["promotions"][0]["tier"].capitalize()
+            if settlement["referrals"]:
+                self.referrer_reward = settlement["referrals"][0]["points"]
+        for referral in settlement["referrals"]:
+            yield rx.toast.success(
+                f"Referrer {referral['referrer_name']} awarded {referral['points']} points!"
+            )
+        notify_outbox()
         from app.utils.pdf import generate_invoice_pdf
         from app.utils.email import send_email
 
         email_sent = False
         if self.customer_details.get("email"):
-            pdf_path = generate_invoice_pdf(
-                self.order_to_complete, self.customer_details
+            pdf_path = await asyncio.to_thread(
+                generate_invoice_pdf, self.order_to_complete, self.customer_details
             )
             if pdf_path:
                 email_body = f"<p>Hi {customer_name},</p>\n                             <p>Thank you for your business! Please find attached the invoice for your recent order #{order_id}.</p>\n                             <p>We appreciate your timely payment.</p>\n                             <p>Best regards,<br/>The TailorFlow Team</p>"
-                email_sent = send_email(
+                email_sent = await asyncio.to_thread(
+                    send_email,
                     to_email=self.customer_details["email"],
                     subject=f"Invoice for Order #{order_id}",
                     body=email_body,
@@ -272,10 +193,8 @@ class OrderCompletionState(rx.State):
 
             order_state = await self.get_state(OrderState)
             payment_state = await self.get_state(PaymentState)
-            yield order_state.get_orders()
+            yield order_state.sync_orders()
             yield payment_state.get_all_installments()
-        import asyncio
-
         await asyncio.sleep(5)
         async with self:
             self.show_completion_dialog = False
\ No newline at end of file
@@ -60,15 +60,26 @@ class OrderManagementState(rx.State):
             if not self.selected_order or not self.custom_message:
                 yield rx.toast.error("Order and message are required.")
                 return
+            order_id = self.selected_order.get("order_id")
             customer_phone = self.selected_order.get("customer_phone", "")
             customer_name = self.selected_order.get("customer_name", "Customer")
-            if self.notification_type == "sms":
+            notification_type = self.notification_type
+            custom_message = self.custom_message
+        from app.utils.outbox import queue_for_retry
+        from app.utils.twilio_transport import TwilioSendError
+
+        message = {"to": customer_phone, "body": custom_message}
+        try:
+            if notification_type == "sms":
                 from app.utils.sms import _send_sms
 
-                _send_sms(to=customer_phone, body=self.custom_message)
+                await _send_sms(**message)
                 yield rx.toast.success("SMS Sent!")
-            elif self.notification_type == "whatsapp":
+            elif notification_type == "whatsapp":
                 from app.utils.whatsapp import _send_whatsapp_message
 
-                _send_whatsapp_message(to=customer_phone, body=self.custom_message)
-                yield rx.toast.success("WhatsApp message sent!")
\ No newline at end of file
+                await _send_whatsapp_message(**message)
+                yield rx.toast.success("WhatsApp message sent!")
+        except TwilioSendError as e:
+            await queue_for_retry(order_id, notification_type, "custom", message, e)
+            yield rx.toast.info("Messaging is busy; the message will be retried.")
\ No newline at end of file
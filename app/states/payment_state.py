@@ -1,9 +1,13 @@
 import reflex as rx
+import logging
 from typing import cast
 from app.models import PaymentInstallment
 from sqlalchemy import text
 from app.utils.sms import send_payment_reminder
-from app.utils.razorpay import create_payment_link
+from app.utils.payment_links import get_installment_payment_link
+from app.utils.reminders import run_reminder_campaign
+from app.utils.outbox import queue_for_retry
+from app.utils.twilio_transport import TwilioSendError
 import os
 
 
@@ -12,6 +16,11 @@ class PaymentState(rx.State):
     all_installments: list[PaymentInstallment] = []
     search_query: str = ""
     status_filter: str = "all"
+    is_campaign_running: bool = False
+    campaign_total: int = 0
+    campaign_sent: int = 0
+    campaign_queued: int = 0
+    campaign_failed: int = 0
 
     @rx.var
     def filtered_installments(self) -> list[PaymentInstallment]:
@@ -50,7 +59,7 @@ class PaymentState(rx.State):
     async def send_reminder_sms(self, installment_id: int):
         async with rx.asession() as session:
             result = await session.execute(
-                text("""SELECT pi.*, c.name as customer_name, c.phone_number as customer_phone
+                text("""SELECT pi.*, c.name as customer_name, c.phone_number as customer_phone, c.preferred_language
                          FROM payment_installments pi
                          JOIN orders o ON pi.order_id = o.order_id
                          JOIN customers c ON o.customer_id = c.customer_id
@@ -59,22 +68,26 @@ class PaymentState(rx.State):
             )
             installment = result.mappings().first()
         if installment:
-            link = create_payment_link(
-                amount=float(installment["amount"]),
-                description=f"Payment for Order #{installment['order_id']}",
-                customer_name=installment["customer_name"],
-                customer_contact=installment["customer_phone"],
-                customer_email=None,
-                order_id=installment["order_id"],
-            )
-            sent = send_payment_reminder(
-                customer_phone=installment["customer_phone"],
-                customer_name=installment["customer_name"],
-                order_id=installment["order_id"],
-                due_date=str(installment["due_date"]),
-                amount=float(installment["amount"]),
-                payment_link=link,
-            )
+            link = await get_installment_payment_link(installment_id)
+            reminder = {
+                "customer_phone": installment["customer_phone"],
+                "customer_name": installment["customer_name"],
+                "order_id": installment["order_id"],
+                "due_date": str(installment["due_date"]),
+                "amount": float(installment["amount"]),
+                "payment_link": link,
+                "language": installment["preferred_language"],
+            }
+            try:
+                sent = await send_payment_reminder(**reminder)
+            except TwilioSendError as e:
+                await queue_for_retry(
+                    installment["order_id"], "sms", "payment_reminder", reminder, e
+                )
+                yield rx.toast.info(
+                    "SMS service is busy; the reminder will be retried."
+                )
+                return
             if sent:
                 async with self:
                     yield rx.toast.success("Reminder SMS sent!")
@@ -94,6 +107,45 @@ class PaymentState(rx.State):
     async def resend_payment_link(self, installment_id: int):
         yield PaymentState.send_reminder_sms(installment_id)
 
+    @rx.event(background=True)
+    async def start_reminder_campaign(self):
+        """Send reminders for all overdue installments, resuming any unfinished run."""
+        async with self:
+            if self.is_campaign_running:
+                return
+            self.is_campaign_running = True
+            self.campaign_total = 0
+            self.campaign_sent = 0
+            self.campaign_queued = 0
+            self.campaign_failed = 0
+
+        async def report(progress: dict):
+            async with self:
+                self.campaign_total = progress["total"]
+                self.campaign_sent = progress["sent"]
+                self.campaign_queued = progress["queued"]
+                self.campaign_failed = progress["failed"]
+
+        try:
+            progress = await run_reminder_campaign(report)
+        except Exception as e:
+            logging.exception(f"Payment reminder campaign failed: {e}")
+            async with self:
+                self.is_campaign_running = False
+            yield rx.toast.error(
+                "Reminder campaign stopped unexpectedly. Run it again to resume."
+            )
+            return
+        async with self:
+            self.is_campaign_running = False
+        if progress["total"] == 0:
+            yield rx.toast.info("No overdue installments need a reminder today.")
+        else:
+            yield rx.toast.success(
+                f"Reminders sent: {progress['sent']}, queued for retry: {progress['queued']}, failed: {progress['failed']}."
+            )
+        yield PaymentState.get_all_installments
+
 
 @rx.page(route="/payment-success")
 def payment_success():
@@ -177,6 +177,8 @@ class PhotoState(rx.State):
     async def send_photo_for_approval(self, photo_id: int):
         from app.utils.whatsapp import send_whatsapp_order_photo_for_approval
         from app.utils.photo_storage import get_photo_url
+        from app.utils.outbox import queue_for_retry
+        from app.utils.twilio_transport import TwilioSendError
 
         async with rx.asession() as session:
             photo_result = await session.execute(
@@ -188,7 +190,7 @@ class PhotoState(rx.State):
                 return
             order_result = await session.execute(
                 text(
-                    "SELECT c.name, c.phone_number FROM customers c JOIN orders o ON c.customer_id = o.customer_id WHERE o.order_id = :order_id"
+                    "SELECT c.name, c.phone_number, c.preferred_language FROM customers c JOIN orders o ON c.customer_id = o.customer_id WHERE o.order_id = :order_id"
                 ),
                 {"order_id": photo.get("reference_id")},
             )
@@ -199,12 +201,21 @@ class PhotoState(rx.State):
         async with self:
             photo_url = get_photo_url(photo["file_path"], photo["storage_type"])
             self.photo_to_send_url = str(photo_url)
-        sent = send_whatsapp_order_photo_for_approval(
-            customer_phone=customer["phone_number"],
-            customer_name=customer["name"],
-            order_id=photo.get("reference_id"),
-            photo_url=self.photo_to_send_url,
-        )
+        message = {
+            "customer_phone": customer["phone_number"],
+            "customer_name": customer["name"],
+            "order_id": photo.get("reference_id"),
+            "photo_url": self.photo_to_send_url,
+            "language": customer["preferred_language"],
+        }
+        try:
+            sent = await send_whatsapp_order_photo_for_approval(**message)
+        except TwilioSendError as e:
+            await queue_for_retry(
+                message["order_id"], "whatsapp", "order_photo", message, e
+            )
+            yield rx.toast.info("WhatsApp is busy; the photo will be sent shortly.")
+            return
         if sent:
             yield rx.toast.success("Photo sent for approval via WhatsApp!")
         else:
@@ -22,31 +22,33 @@ class ProfitAnalysisState(rx.State):
         async with rx.asession() as session:
             metrics_result = await session.execute(
                 text("""SELECT 
-                        SUM(total_amount - discount_amount) as total_revenue, 
-                        SUM(COALESCE(material_cost, 0) + COALESCE(labor_cost, 0)) as total_costs,
+                        SUM(revenue - discount) as total_revenue, 
+                        SUM(material_cost + labor_cost) as total_costs,
                         SUM(profit) as net_profit
-                     FROM orders WHERE status = 'delivered'""")
+                     FROM daily_order_rollup WHERE status = 'delivered'""")
             )
             metrics = metrics_result.mappings().first()
             trend_result = await session.execute(
                 text("""SELECT 
-                        TO_CHAR(delivery_date, 'YYYY-MM') as month,
-                        SUM(total_amount - discount_amount) as revenue,
-                        SUM(COALESCE(material_cost, 0) + COALESCE(labor_cost, 0)) as costs,
+                        TO_CHAR(delivery_day, 'YYYY-MM') as month,
+                        SUM(revenue - discount) as revenue,
+                        SUM(material_cost + labor_cost) as costs,
                         SUM(profit) as profit
-                     FROM orders
-                     WHERE status = 'delivered' AND delivery_date IS NOT NULL
+                     FROM daily_order_rollup
+                     WHERE status = 'delivered' AND delivery_day > '-infinity'
                      GROUP BY month
+                     HAVING SUM(order_count) > 0
                      ORDER BY month""")
             )
             monthly_profit_trend = [dict(row) for row in trend_result.mappings().all()]
             cloth_type_result = await session.execute(
                 text("""SELECT 
-                        cloth_type, 
+                        NULLIF(cloth_type, '') as cloth_type, 
                         SUM(profit) as total_profit
-                     FROM orders
+                     FROM daily_order_rollup
                      WHERE status = 'delivered'
                      GROUP BY cloth_type
+                     HAVING SUM(order_count) > 0
                      ORDER BY total_profit DESC""")
             )
             profit_by_cloth_type = [
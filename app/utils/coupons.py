@@ -0,0 +1,82 @@
+import time
+import datetime
+import reflex as rx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+COUPON_CACHE_TTL = 60.0
+_coupon_cache: dict[str, tuple[float, dict | None]] = {}
+
+
+def _is_current(coupon: dict) -> bool:
+    today = datetime.date.today()
+    if coupon["valid_from"] and coupon["valid_from"] > today:
+        return False
+    if coupon["valid_until"] and coupon["valid_until"] < today:
+        return False
+    return True
+
+
+async def get_active_coupon(code: str) -> dict | None:
+    """
+    Look up an active, currently valid coupon by code.
+    Lookups, including misses, are cached in-process for COUPON_CACHE_TTL
+    seconds; the validity window is checked on every call so a cached coupon
+    still expires on time. used_count may lag behind, redemption is the
+    authoritative check.
+    """
+    code = code.strip().upper()
+    cached = _coupon_cache.get(code)
+    if cached and cached[0] > time.monotonic():
+        coupon = cached[1]
+    else:
+        async with rx.asession() as session:
+            result = await session.execute(
+                text(
+                    "SELECT * FROM discount_coupons WHERE coupon_code = :code AND is_active = TRUE"
+                ),
+                {"code": code},
+            )
+            row = result.mappings().first()
+        coupon = dict(row) if row else None
+        _coupon_cache[code] = (time.monotonic() + COUPON_CACHE_TTL, coupon)
+    if coupon and _is_current(coupon):
+        return coupon
+    return None
+
+
+def invalidate_coupon_cache(code: str | None = None):
+    """Drop one cached coupon, or all of them, after coupons are edited."""
+    if code is None:
+        _coupon_cache.clear()
+    else:
+        _coupon_cache.pop(code.strip().upper(), None)
+
+
+async def redeem_coupon(session: AsyncSession, code: str) -> bool:
+    """
+    Count one use of a coupon inside the caller's transaction.
+    The increment only happens while the coupon is active, valid today and
+    below its usage limit, so concurrent redemptions can never exceed it.
+    Returns False when the coupon can no longer be used.
+    """
+    code = code.strip().upper()
+    result = await session.execute(
+        text("""UPDATE discount_coupons 
+             SET used_count = COALESCE(used_count, 0) + 1 
+             WHERE coupon_code = :code 
+             AND is_active = TRUE 
+             AND (valid_from IS NULL OR valid_from <= CURRENT_DATE) 
+             AND (valid_until IS NULL OR valid_until >= CURRENT_DATE) 
+             AND (usage_limit IS NULL OR COALESCE(used_count, 0) < usage_limit) 
+             RETURNING used_count"""),
+        {"code": code},
+    )
+    used_count = result.scalar_one_or_none()
+    if used_count is None:
+        invalidate_coupon_cache(code)
+        return False
+    cached = _coupon_cache.get(code)
+    if cached and cached[1]:
+        cached[1]["used_count"] = used_count
+    return True
\ No newline at end of file
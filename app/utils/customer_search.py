@@ -0,0 +1,91 @@
+import re
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+PHONE_COUNTRY_CODE = "91"
+CUSTOMER_SEARCH_LIMIT = 20
+CUSTOMER_SEARCH_COLUMNS = (
+    "customer_id, name, phone_number, prefer_whatsapp, opt_in_whatsapp"
+)
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input only matches literally."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def phone_search_prefix(query: str) -> str | None:
+    """
+    The phone_normalized LIKE pattern for the digits in a search, or None
+    when fewer than 3 digits are left. phone_normalized holds the last 10
+    digits of a number, so a country code typed as +91 or 0091 and a
+    leading trunk 0 are dropped before the digits are used as a prefix.
+    """
+    digits = re.sub(r"\D", "", query)
+    if query.lstrip().startswith("+") or digits.startswith("00"):
+        digits = digits.lstrip("0").removeprefix(PHONE_COUNTRY_CODE)
+    digits = digits.lstrip("0")[-10:]
+    return f"{digits}%" if len(digits) >= 3 else None
+
+
+async def search_customers(
+    session: AsyncSession,
+    query: str,
+    selected_id: int | None = None,
+    limit: int = CUSTOMER_SEARCH_LIMIT,
+) -> list[dict]:
+    """
+    Return the top customer matches for a typeahead query.
+    Name prefixes walk the lower(name) pattern index, digits match the
+    normalized phone number by prefix and fragments of 3+ characters use the
+    trigram index; each branch is limited before the results are merged.
+    An empty query returns the most recently added customers. The customer in
+    selected_id is always included so an existing selection stays visible.
+    """
+    query = query.strip()
+    params: dict = {"limit": limit}
+    if query:
+        branches = [
+            f"""(SELECT {CUSTOMER_SEARCH_COLUMNS}, 0 AS rank, lower(name) AS sort_key
+    FROM customers WHERE lower(name) LIKE :name_prefix
+    ORDER BY lower(name) USING ~<~ LIMIT :limit)"""
+        ]
+        params["name_prefix"] = f"{escape_like(query.lower())}%"
+        phone_prefix = phone_search_prefix(query)
+        if phone_prefix:
+            branches.append(
+                f"""(SELECT {CUSTOMER_SEARCH_COLUMNS}, 1 AS rank, lower(name) AS sort_key
+    FROM customers WHERE phone_normalized LIKE :phone_prefix
+    ORDER BY phone_normalized USING ~<~ LIMIT :limit)"""
+            )
+            params["phone_prefix"] = phone_prefix
+        if len(query) >= 3:
+            branches.append(
+                f"""(SELECT {CUSTOMER_SEARCH_COLUMNS}, 2 AS rank, lower(name) AS sort_key
+    FROM customers WHERE name ILIKE :name_contains LIMIT :limit)"""
+            )
+            params["name_contains"] = f"%{escape_like(query)}%"
+        sql = f"""SELECT {CUSTOMER_SEARCH_COLUMNS} FROM (
+    SELECT DISTINCT ON (customer_id) *
+    FROM ({" UNION ALL ".join(branches)}) matches
+    ORDER BY customer_id, rank
+) best
+ORDER BY rank, sort_key
+LIMIT :limit"""
+    else:
+        sql = f"""SELECT {CUSTOMER_SEARCH_COLUMNS} FROM customers 
+ORDER BY customer_id DESC
+LIMIT :limit"""
+    result = await session.execute(text(sql), params)
+    customers = [dict(row) for row in result.mappings().all()]
+    if selected_id and all(c["customer_id"] != selected_id for c in customers):
+        result = await session.execute(
+            text(
+                f"SELECT {CUSTOMER_SEARCH_COLUMNS} FROM customers WHERE customer_id = :customer_id"
+            ),
+            {"customer_id": selected_id},
+        )
+        selected = result.mappings().first()
+        if selected:
+            customers.insert(0, dict(selected))
+    return customers
\ No newline at end of file
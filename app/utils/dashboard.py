@@ -0,0 +1,174 @@
+import asyncio
+import datetime
+import json
+import logging
+import os
+import time
+import reflex as rx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "30"))
+DASHBOARD_CHANGED_CHANNEL = "dashboard_changed"
+DASHBOARD_LISTEN_RETRY_SECONDS = 5.0
+
+DASHBOARD_SNAPSHOT_SQL = text("""WITH status_counts AS (
+    SELECT COUNT(*) FILTER (WHERE status = 'pending') AS pending_orders_count,
+        COUNT(*) FILTER (WHERE status = 'ready') AS ready_orders_count
+    FROM orders
+    WHERE status IN ('pending', 'ready')
+),
+monthly_sales AS (
+    SELECT day, SUM(revenue) AS sales
+    FROM daily_order_rollup
+    WHERE day >= :start_of_month
+    GROUP BY day
+    HAVING SUM(order_count) > 0
+),
+low_stock AS (
+    SELECT * FROM materials WHERE quantity_in_stock <= reorder_level LIMIT 5
+),
+top_customers AS (
+    SELECT c.name, SUM(o.total_amount) AS total_spent
+    FROM customers c
+    JOIN orders o ON c.customer_id = o.customer_id
+    GROUP BY c.customer_id, c.name
+    ORDER BY total_spent DESC
+    LIMIT 5
+),
+recent_orders AS (
+    SELECT * FROM orders
+    ORDER BY COALESCE(order_date, DATE '-infinity') DESC, order_id DESC
+    LIMIT 5
+)
+SELECT
+    (
+        SELECT COALESCE(SUM(advance_payment + (total_amount - balance_payment - advance_payment)), 0)
+        FROM orders WHERE order_date = :today
+    ) AS today_revenue,
+    s.pending_orders_count,
+    s.ready_orders_count,
+    (SELECT COALESCE(json_agg(m ORDER BY m.day), '[]') FROM monthly_sales m) AS monthly_sales,
+    (SELECT COALESCE(json_agg(l), '[]') FROM low_stock l) AS low_stock_items,
+    (SELECT COALESCE(json_agg(t ORDER BY t.total_spent DESC), '[]') FROM top_customers t) AS top_customers,
+    (
+        SELECT COALESCE(json_agg(r ORDER BY COALESCE(r.order_date, DATE '-infinity') DESC, r.order_id DESC), '[]')
+        FROM recent_orders r
+    ) AS recent_transactions
+FROM status_counts s""")
+
+
+def _json(value) -> list:
+    return json.loads(value) if isinstance(value, str) else value
+
+
+async def load_dashboard_snapshot(
+    session: AsyncSession, today: datetime.date | None = None
+) -> dict:
+    """
+    Everything the dashboard shows, in one statement and one round trip:
+    today's revenue, pending and ready counts, this month's daily sales,
+    low-stock materials, top customers and the latest orders.
+    """
+    today = today or datetime.date.today()
+    result = await session.execute(
+        DASHBOARD_SNAPSHOT_SQL,
+        {"today": today, "start_of_month": today.replace(day=1)},
+    )
+    row = result.mappings().one()
+    return {
+        "today_revenue": float(row["today_revenue"]),
+        "pending_orders_count": row["pending_orders_count"],
+        "ready_orders_count": row["ready_orders_count"],
+        "monthly_sales_data": [
+            {
+                "day": datetime.date.fromisoformat(day["day"]).strftime("%b %d"),
+                "sales": float(day["sales"]),
+            }
+            for day in _json(row["monthly_sales"])
+        ],
+        "low_stock_items": _json(row["low_stock_items"]),
+        "top_customers": _json(row["top_customers"]),
+        "recent_transactions": _json(row["recent_transactions"]),
+    }
+
+
+class SnapshotCache:
+    """
+    A process-wide dashboard snapshot shared by every session. It is reused
+    for `ttl` seconds, until the day changes or until `invalidate` is called.
+    Concurrent misses share one load instead of each running the query; a
+    load that started before an invalidation is not handed to later callers.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self.loads = 0
+        self._snapshot: dict | None = None
+        self._key: tuple | None = None
+        self._expires_at = 0.0
+        self._inflight: dict[tuple, asyncio.Task] = {}
+
+    def invalidate(self):
+        self.version += 1
+
+    async def _load(self, key: tuple) -> dict:
+        try:
+            async with rx.asession() as session:
+                snapshot = await load_dashboard_snapshot(session, key[1])
+            self.loads += 1
+            if key == (self.version, datetime.date.today()):
+                self._snapshot, self._key = snapshot, key
+                self._expires_at = time.monotonic() + self.ttl
+            return snapshot
+        finally:
+            del self._inflight[key]
+
+    async def get(self) -> dict:
+        key = (self.version, datetime.date.today())
+        if (
+            self._snapshot is not None
+            and self._key == key
+            and time.monotonic() < self._expires_at
+        ):
+            return self._snapshot
+        if key not in self._inflight:
+            self._inflight[key] = asyncio.create_task(self._load(key))
+        return await asyncio.shield(self._inflight[key])
+
+
+dashboard_cache = SnapshotCache(DASHBOARD_CACHE_TTL)
+
+
+def _on_change(connection, pid, channel, payload):
+    dashboard_cache.invalidate()
+
+
+async def listen_for_dashboard_changes():
+    """
+    Invalidate the dashboard cache whenever orders, materials or
+    transactions change, in this process or any other, for the lifetime of
+    the app. Triggers NOTIFY on DASHBOARD_CHANGED_CHANNEL after each writing
+    statement; the notification arrives once the transaction commits.
+    """
+    while True:
+        try:
+            async with rx.asession() as session:
+                connection = await (await session.connection()).get_raw_connection()
+                driver = connection.driver_connection
+                await driver.add_listener(DASHBOARD_CHANGED_CHANNEL, _on_change)
+                try:
+                    dashboard_cache.invalidate()
+                    while not driver.is_closed():
+                        await asyncio.sleep(DASHBOARD_LISTEN_RETRY_SECONDS)
+                finally:
+                    if not driver.is_closed():
+                        await driver.remove_listener(
+                            DASHBOARD_CHANGED_CHANNEL, _on_change
+                        )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.exception(f"Dashboard change listener failed: {e}")
+        await asyncio.sleep(DASHBOARD_LISTEN_RETRY_SECONDS)
\ No newline at end of file
@@ -0,0 +1,175 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import reflex as rx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.twilio_transport import AUTH_TOKEN
+
+DELIVERY_FLUSH_INTERVAL = 1.0
+DELIVERY_STATS_DAYS = 30
+DELIVERY_STATUSES = [
+    "accepted",
+    "queued",
+    "sending",
+    "sent",
+    "undelivered",
+    "failed",
+    "delivered",
+    "read",
+]
+_buffer: dict[str, dict] = {}
+
+UPSERT_DELIVERIES_SQL = text("""INSERT INTO message_deliveries (message_sid, channel, to_number, status, error_code)
+SELECT * FROM unnest(
+    CAST(:message_sids AS text[]),
+    CAST(:channels AS text[]),
+    CAST(:to_numbers AS text[]),
+    CAST(:statuses AS text[]),
+    CAST(:error_codes AS text[])
+)
+ON CONFLICT (message_sid) DO UPDATE
+SET status = EXCLUDED.status,
+    error_code = COALESCE(EXCLUDED.error_code, message_deliveries.error_code),
+    updated_at = CURRENT_TIMESTAMP
+WHERE array_position(CAST(:ranking AS text[]), CAST(EXCLUDED.status AS text))
+    >= array_position(CAST(:ranking AS text[]), CAST(message_deliveries.status AS text))""")
+
+CUSTOMER_DELIVERY_STATS_SQL = text("""SELECT d.channel,
+    COUNT(*) AS messages,
+    COUNT(*) FILTER (WHERE d.status IN ('delivered', 'read')) AS delivered,
+    COUNT(*) FILTER (WHERE d.status IN ('undelivered', 'failed')) AS failed
+FROM customers c
+JOIN message_deliveries d
+    ON d.to_number = CASE WHEN c.phone_number LIKE '+%' THEN c.phone_number ELSE '+91' || c.phone_number END
+WHERE c.customer_id = :customer_id
+    AND d.updated_at > CURRENT_TIMESTAMP - make_interval(days => :days)
+GROUP BY d.channel
+ORDER BY d.channel""")
+
+
+def twilio_signature(url: str, params: dict, auth_token: str) -> str:
+    """
+    Compute the X-Twilio-Signature for a form-encoded callback: HMAC-SHA1
+    over the URL followed by each parameter name and value, sorted by name.
+    """
+    payload = url + "".join(f"{key}{params[key]}" for key in sorted(params))
+    digest = hmac.new(auth_token.encode(), payload.encode(), hashlib.sha1).digest()
+    return base64.b64encode(digest).decode()
+
+
+def verify_twilio_signature(url: str, params: dict, signature: str) -> bool:
+    """Check the X-Twilio-Signature header of a status callback."""
+    if not AUTH_TOKEN or not signature:
+        return False
+    return hmac.compare_digest(twilio_signature(url, params, AUTH_TOKEN), signature)
+
+
+def _rank(status: str) -> int:
+    return DELIVERY_STATUSES.index(status)
+
+
+def _merge(receipt: dict):
+    buffered = _buffer.get(receipt["message_sid"])
+    if buffered is None:
+        _buffer[receipt["message_sid"]] = receipt
+    elif _rank(receipt["status"]) >= _rank(buffered["status"]):
+        _buffer[receipt["message_sid"]] = {
+            **receipt,
+            "error_code": receipt["error_code"] or buffered["error_code"],
+        }
+
+
+def record_callback(params: dict) -> bool:
+    """
+    Buffer one Twilio status callback for the next flush. Callbacks for the
+    same message are merged in memory, keeping the most advanced status, as
+    Twilio does not guarantee they arrive in order. Returns False when the
+    callback is not a message status we track.
+    """
+    message_sid = params.get("MessageSid")
+    status = params.get("MessageStatus")
+    to = params.get("To", "")
+    if not message_sid or status not in DELIVERY_STATUSES or not to:
+        return False
+    _merge(
+        {
+            "message_sid": message_sid,
+            "channel": "whatsapp" if to.startswith("whatsapp:") else "sms",
+            "to_number": to.removeprefix("whatsapp:"),
+            "status": status,
+            "error_code": params.get("ErrorCode") or None,
+        }
+    )
+    return True
+
+
+async def flush_delivery_receipts() -> int:
+    """
+    Write every buffered callback to message_deliveries in one UPSERT.
+    A stored status is only replaced by a more advanced one. If the write
+    fails the callbacks go back into the buffer for the next flush.
+    Returns the number of messages written.
+    """
+    global _buffer
+    if not _buffer:
+        return 0
+    receipts, _buffer = _buffer, {}
+    try:
+        async with rx.asession() as session, session.begin():
+            await session.execute(
+                UPSERT_DELIVERIES_SQL,
+                {
+                    "message_sids": list(receipts),
+                    "channels": [r["channel"] for r in receipts.values()],
+                    "to_numbers": [r["to_number"] for r in receipts.values()],
+                    "statuses": [r["status"] for r in receipts.values()],
+                    "error_codes": [r["error_code"] for r in receipts.values()],
+                    "ranking": DELIVERY_STATUSES,
+                },
+            )
+    except Exception:
+        for receipt in receipts.values():
+            _merge(receipt)
+        raise
+    return len(receipts)
+
+
+async def run_delivery_receipt_flusher():
+    """Flush buffered status callbacks every DELIVERY_FLUSH_INTERVAL seconds."""
+    try:
+        while True:
+            await asyncio.sleep(DELIVERY_FLUSH_INTERVAL)
+            try:
+                await flush_delivery_receipts()
+            except Exception as e:
+                logging.exception(f"Flushing delivery receipts failed: {e}")
+    finally:
+        if _buffer:
+            await flush_delivery_receipts()
+
+
+async def customer_delivery_stats(
+    session: AsyncSession, customer_id: int, days: int = DELIVERY_STATS_DAYS
+) -> list[dict]:
+    """Messages, deliveries, failures and delivery rate per channel for one customer."""
+    result = await session.execute(
+        CUSTOMER_DELIVERY_STATS_SQL, {"customer_id": customer_id, "days": days}
+    )
+    stats = []
+    for row in result.mappings().all():
+        finished = row["delivered"] + row["failed"]
+        stats.append(
+            {
+                "channel": row["channel"],
+                "messages": row["messages"],
+                "delivered": row["delivered"],
+                "failed": row["failed"],
+                "delivery_rate": round(row["delivered"] / finished * 100, 1)
+                if finished
+                else 0.0,
+            }
+        )
+    return stats
\ No newline at end of file
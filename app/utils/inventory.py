@@ -0,0 +1,353 @@
+import json
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+MATERIAL_REQUIREMENTS = {
+    "shirt": {"fabric": 2.5, "button": 8, "thread": 1},
+    "pant": {"fabric": 1.8, "zipper": 1, "thread": 1},
+    "suit": {"fabric": 4.0, "button": 12, "zipper": 1, "thread": 2},
+    "blouse": {"fabric": 1.5, "button": 6, "thread": 1},
+    "dress": {"fabric": 3.5, "zipper": 1, "thread": 1},
+}
+
+RESERVE_MATERIALS_SQL = text("""WITH req AS (
+    SELECT * FROM unnest(CAST(:material_types AS text[]), CAST(:quantities AS numeric[]))
+        AS r(material_type, required)
+),
+picked AS (
+    SELECT DISTINCT ON (r.material_type) r.material_type, r.required, m.material_id
+    FROM req r
+    LEFT JOIN materials m ON m.material_type = r.material_type
+        AND m.material_name ILIKE '%' || r.material_type || '%'
+    ORDER BY r.material_type, m.material_id
+),
+locked AS (
+    SELECT m.material_id, m.material_name,
+        COALESCE(m.quantity_in_stock, 0) - COALESCE(m.quantity_reserved, 0) AS available
+    FROM materials m
+    WHERE m.material_id IN (SELECT material_id FROM picked)
+    ORDER BY m.material_id
+    FOR UPDATE
+),
+report AS (
+    SELECT p.material_type, p.material_id,
+        COALESCE(l.material_name, p.material_type) AS material_name,
+        p.required,
+        COALESCE(l.available, 0) AS available,
+        GREATEST(p.required - COALESCE(l.available, 0), 0) AS shortfall
+    FROM picked p
+    LEFT JOIN locked l ON l.material_id = p.material_id
+),
+reserved AS (
+    UPDATE materials m
+    SET quantity_reserved = COALESCE(m.quantity_reserved, 0) + r.required
+    FROM report r
+    WHERE m.material_id = r.material_id
+        AND NOT EXISTS (SELECT 1 FROM report WHERE shortfall > 0)
+    RETURNING m.material_id
+),
+recorded AS (
+    INSERT INTO material_reservations (order_id, material_id, quantity)
+    SELECT :order_id, material_id, required FROM report
+    WHERE NOT EXISTS (SELECT 1 FROM report WHERE shortfall > 0)
+    RETURNING material_id
+)
+SELECT material_type, material_name, required, available, shortfall
+FROM report
+ORDER BY material_type""")
+
+
+async def reserve_materials(
+    session: AsyncSession, order_id: int, required: dict[str, float]
+) -> list[dict]:
+    """
+    Check and reserve stock for every required material type in one statement.
+    The matched material rows stay locked until the caller's transaction ends,
+    and nothing is reserved unless every material has enough unreserved stock.
+    Returns a per-material report with a non-zero shortfall for missing stock.
+    """
+    if not required:
+        return []
+    result = await session.execute(
+        RESERVE_MATERIALS_SQL,
+        {
+            "order_id": order_id,
+            "material_types": list(required.keys()),
+            "quantities": [float(qty) for qty in required.values()],
+        },
+    )
+    return [
+        {
+            "material_type": row["material_type"],
+            "material_name": row["material_name"],
+            "required": float(row["required"]),
+            "available": float(row["available"]),
+            "shortfall": float(row["shortfall"]),
+        }
+        for row in result.mappings().all()
+    ]
+
+
+LOCK_ORDERS_SQL = text("""SELECT order_id FROM orders
+WHERE order_id = ANY(CAST(:order_ids AS integer[]))
+ORDER BY order_id
+FOR UPDATE""")
+
+DEDUCT_MATERIALS_SQL = text("""WITH RECURSIVE reqs AS (
+    SELECT * FROM unnest(
+        CAST(:cloth_types AS text[]),
+        CAST(:material_types AS text[]),
+        CAST(:per_unit AS numeric[])
+    ) AS r(cloth_type, material_type, per_unit)
+),
+target AS (
+    SELECT o.order_id, o.cloth_type, o.quantity, o.total_amount,
+        COALESCE(w.salary, 0) * 0.01 AS labor_cost,
+        EXISTS (SELECT 1 FROM order_materials om WHERE om.order_id = o.order_id)
+            AS already_deducted
+    FROM orders o
+    LEFT JOIN workers w ON w.worker_id = o.assigned_worker
+    WHERE o.order_id = ANY(CAST(:order_ids AS integer[]))
+),
+pending AS (
+    SELECT * FROM target WHERE NOT already_deducted
+),
+picked AS (
+    SELECT DISTINCT ON (r.material_type) r.material_type, m.material_id,
+        m.material_name, COALESCE(m.unit_price, 0) AS unit_price
+    FROM (SELECT DISTINCT material_type FROM reqs) r
+    LEFT JOIN materials m ON m.material_type = r.material_type
+        AND m.material_name ILIKE '%' || r.material_type || '%'
+    ORDER BY r.material_type, m.material_id
+),
+lines AS (
+    SELECT p.order_id, r.material_type, pk.material_id,
+        COALESCE(pk.material_name, r.material_type) AS material_name,
+        pk.unit_price, r.per_unit * p.quantity AS required
+    FROM pending p
+    JOIN reqs r ON r.cloth_type = p.cloth_type
+    JOIN picked pk ON pk.material_type = r.material_type
+),
+locked AS (
+    SELECT m.material_id,
+        COALESCE(m.quantity_in_stock, 0) - COALESCE(m.quantity_reserved, 0) AS unreserved
+    FROM materials m
+    WHERE m.material_id IN (SELECT material_id FROM lines)
+    ORDER BY m.material_id
+    FOR UPDATE
+),
+own_reserved AS (
+    SELECT order_id, material_id, SUM(quantity) AS quantity
+    FROM material_reservations
+    WHERE order_id IN (SELECT order_id FROM pending)
+    GROUP BY order_id, material_id
+),
+drawn AS (
+    SELECT l.*, COALESCE(r.quantity, 0) AS reserved_qty, lk.unreserved,
+        l.required - COALESCE(r.quantity, 0) AS draw
+    FROM lines l
+    LEFT JOIN own_reserved r ON r.order_id = l.order_id AND r.material_id = l.material_id
+    LEFT JOIN locked lk ON lk.material_id = l.material_id
+),
+queue AS (
+    SELECT p.order_id, ROW_NUMBER() OVER (ORDER BY p.order_id) AS position,
+        EXISTS (
+            SELECT 1 FROM drawn d WHERE d.order_id = p.order_id AND d.unreserved IS NULL
+        ) AS unmatched,
+        COALESCE((
+            SELECT jsonb_object_agg(d.material_id, d.draw) FROM drawn d
+            WHERE d.order_id = p.order_id AND d.unreserved IS NOT NULL
+        ), '{}') AS draws
+    FROM pending p
+),
+settled AS (
+    SELECT CAST(0 AS bigint) AS position, CAST(NULL AS integer) AS order_id,
+        FALSE AS accepted, CAST('{}' AS jsonb) AS before,
+        COALESCE((SELECT jsonb_object_agg(material_id, unreserved) FROM locked), '{}')
+            AS remaining
+    UNION ALL
+    SELECT q.position, q.order_id, a.accepted, s.remaining,
+        CASE WHEN a.accepted THEN COALESCE((
+            SELECT jsonb_object_agg(
+                r.key, CAST(r.value AS numeric) - COALESCE(CAST(q.draws ->> r.key AS numeric), 0)
+            )
+            FROM jsonb_each_text(s.remaining) r
+        ), '{}') ELSE s.remaining END
+    FROM settled s
+    JOIN queue q ON q.position = s.position + 1
+    CROSS JOIN LATERAL (
+        SELECT NOT q.unmatched AND NOT EXISTS (
+            SELECT 1 FROM jsonb_each_text(q.draws) d
+            WHERE CAST(d.value AS numeric) > 0
+                AND CAST(d.value AS numeric) > CAST(s.remaining ->> d.key AS numeric)
+        ) AS accepted
+    ) a
+),
+checked AS (
+    SELECT d.*,
+        CASE WHEN d.unreserved IS NULL THEN d.required
+            ELSE GREATEST(LEAST(
+                d.draw, d.draw - CAST(s.before ->> CAST(d.material_id AS text) AS numeric)
+            ), 0)
+        END AS shortfall
+    FROM drawn d
+    JOIN settled s ON s.order_id = d.order_id
+),
+feasible AS (
+    SELECT order_id FROM settled WHERE accepted
+),
+used AS (
+    SELECT c.* FROM checked c JOIN feasible f ON f.order_id = c.order_id
+),
+deducted AS (
+    UPDATE materials m
+    SET quantity_in_stock = m.quantity_in_stock - u.required,
+        quantity_reserved = GREATEST(COALESCE(m.quantity_reserved, 0) - u.reserved_qty, 0)
+    FROM (
+        SELECT material_id, SUM(required) AS required, SUM(reserved_qty) AS reserved_qty
+        FROM used GROUP BY material_id
+    ) u
+    WHERE m.material_id = u.material_id
+    RETURNING m.material_name, m.quantity_in_stock, m.reorder_level
+),
+consumed AS (
+    DELETE FROM material_reservations mr
+    USING feasible f
+    WHERE mr.order_id = f.order_id
+    RETURNING mr.reservation_id
+),
+recorded AS (
+    INSERT INTO order_materials (order_id, material_id, quantity_used, wastage, cost)
+    SELECT order_id, material_id, required, required * 0.05, required * unit_price
+    FROM used
+    RETURNING order_id
+),
+costed AS (
+    UPDATE orders o
+    SET material_cost = COALESCE(c.material_cost, 0),
+        labor_cost = p.labor_cost,
+        profit = o.total_amount - COALESCE(c.material_cost, 0) - p.labor_cost
+    FROM pending p
+    JOIN feasible f ON f.order_id = p.order_id
+    LEFT JOIN (
+        SELECT order_id, SUM(required * unit_price) AS material_cost
+        FROM used GROUP BY order_id
+    ) c ON c.order_id = p.order_id
+    WHERE o.order_id = p.order_id
+    RETURNING o.order_id, o.material_cost, o.labor_cost, o.profit
+)
+SELECT t.order_id, t.already_deducted, co.order_id IS NOT NULL AS deducted,
+    co.material_cost, co.labor_cost, co.profit,
+    COALESCE((
+        SELECT json_agg(json_build_object(
+            'material_type', c.material_type,
+            'material_name', c.material_name,
+            'required', c.required,
+            'available', c.required - c.shortfall,
+            'shortfall', c.shortfall
+        ))
+        FROM checked c WHERE c.order_id = t.order_id AND c.shortfall > 0
+    ), '[]') AS shortfalls,
+    ARRAY(
+        SELECT d.material_name FROM deducted d
+        WHERE d.quantity_in_stock < d.reorder_level
+        ORDER BY d.material_name
+    ) AS low_stock
+FROM target t
+LEFT JOIN costed co ON co.order_id = t.order_id
+ORDER BY t.order_id""")
+
+
+async def deduct_materials_for_orders(
+    session: AsyncSession, order_ids: list[int]
+) -> tuple[dict[int, dict], list[str]]:
+    """
+    Consume stock for the cutting stage of any number of orders in one statement.
+    Orders are settled in order_id order; an order whose materials cannot all be
+    covered by the stock left after the orders accepted before it is skipped
+    without touching stock. Orders that already have order_materials rows are
+    reported as already deducted and left alone. The orders are locked by a
+    separate statement first, so the deduct statement's snapshot already
+    includes any concurrent deduction for the same order.
+    Returns per-order results keyed by order_id (missing IDs were not found)
+    and the names of materials that fell below their reorder level.
+    """
+    if not order_ids:
+        return ({}, [])
+    cloth_types, material_types, per_unit = [], [], []
+    for cloth_type, materials in MATERIAL_REQUIREMENTS.items():
+        for material_type, qty in materials.items():
+            cloth_types.append(cloth_type)
+            material_types.append(material_type)
+            per_unit.append(float(qty))
+    await session.execute(LOCK_ORDERS_SQL, {"order_ids": list(order_ids)})
+    result = await session.execute(
+        DEDUCT_MATERIALS_SQL,
+        {
+            "order_ids": list(order_ids),
+            "cloth_types": cloth_types,
+            "material_types": material_types,
+            "per_unit": per_unit,
+        },
+    )
+    deductions = {}
+    low_stock: list[str] = []
+    for row in result.mappings().all():
+        shortfalls = row["shortfalls"]
+        if isinstance(shortfalls, str):
+            shortfalls = json.loads(shortfalls)
+        if row["already_deducted"]:
+            status = "already_deducted"
+        elif row["deducted"]:
+            status = "deducted"
+        else:
+            status = "insufficient"
+        deductions[row["order_id"]] = {
+            "order_id": row["order_id"],
+            "status": status,
+            "material_cost": float(row["material_cost"] or 0),
+            "labor_cost": float(row["labor_cost"] or 0),
+            "profit": float(row["profit"] or 0),
+            "shortfalls": [
+                {
+                    **item,
+                    "required": float(item["required"]),
+                    "available": float(item["available"]),
+                    "shortfall": float(item["shortfall"]),
+                }
+                for item in shortfalls
+            ],
+        }
+        low_stock = list(row["low_stock"] or [])
+    return (deductions, low_stock)
+
+
+async def release_material_reservations(
+    session: AsyncSession, order_ids: list[int]
+) -> None:
+    """Return the reserved quantities of the given orders to available stock."""
+    await session.execute(
+        text("""WITH released AS (
+                DELETE FROM material_reservations
+                WHERE order_id = ANY(CAST(:order_ids AS integer[]))
+                RETURNING material_id, quantity
+             ),
+             totals AS (
+                SELECT material_id, SUM(quantity) AS quantity
+                FROM released GROUP BY material_id
+             )
+             UPDATE materials m
+             SET quantity_reserved = GREATEST(COALESCE(m.quantity_reserved, 0) - t.quantity, 0)
+             FROM totals t
+             WHERE m.material_id = t.material_id"""),
+        {"order_ids": order_ids},
+    )
+
+
+def format_shortfall(report: list[dict]) -> str:
+    """Summarise the materials that are short for a toast message."""
+    return ", ".join(
+        f"{item['material_name'].capitalize()} (Required: {item['required']:g}, Available: {item['available']:g})"
+        for item in report
+        if item["shortfall"] > 0
+    )
\ No newline at end of file
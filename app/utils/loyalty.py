@@ -0,0 +1,142 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SETTLE_DELIVERED_SQL = text("""WITH delivered AS (
+    SELECT o.order_id, o.customer_id,
+        FLOOR(GREATEST(
+            COALESCE(o.total_amount, 0) - COALESCE(o.discount_amount, 0), 0
+        ) / 100)::integer AS points
+    FROM orders o
+    WHERE o.order_id = ANY(CAST(:order_ids AS integer[]))
+        AND o.customer_id IS NOT NULL
+        AND o.loyalty_settled_at IS NULL
+    ORDER BY o.order_id
+    FOR UPDATE
+),
+settled AS (
+    UPDATE orders o
+    SET loyalty_settled_at = CURRENT_TIMESTAMP, points_earned = d.points
+    FROM delivered d
+    WHERE o.order_id = d.order_id
+    RETURNING o.order_id
+),
+pending_referrals AS (
+    SELECT r.referral_id, r.referrer_customer_id, r.referred_customer_id, r.reward_points
+    FROM customer_referrals r
+    WHERE r.referral_status = 'pending'
+        AND r.referrer_customer_id IS NOT NULL
+        AND r.referred_customer_id IN (SELECT customer_id FROM delivered)
+    ORDER BY r.referral_id
+    FOR UPDATE
+),
+referrals AS (
+    SELECT DISTINCT ON (p.referred_customer_id) p.referral_id,
+        p.referrer_customer_id, p.reward_points, c.name AS referred_name
+    FROM pending_referrals p
+    JOIN customers c ON c.customer_id = p.referred_customer_id
+    WHERE NOT EXISTS (
+        SELECT 1 FROM orders o
+        WHERE o.customer_id = p.referred_customer_id
+            AND o.status = 'delivered'
+            AND o.order_id <> ALL(CAST(:order_ids AS integer[]))
+    )
+    ORDER BY p.referred_customer_id, p.referral_id
+),
+entries AS (
+    SELECT customer_id, 1 AS kind, order_id AS seq, points,
+        'purchase' AS transaction_type, order_id,
+        'Points earned from order #' || order_id AS description
+    FROM delivered
+    UNION ALL
+    SELECT referrer_customer_id, 2, referral_id, COALESCE(reward_points, 0),
+        'referral', NULL, 'Referral bonus for ' || referred_name
+    FROM referrals
+),
+locked AS (
+    SELECT customer_id, COALESCE(total_points, 0) AS total_points, customer_tier
+    FROM customers
+    WHERE customer_id IN (SELECT customer_id FROM entries)
+    ORDER BY customer_id
+    FOR UPDATE
+),
+ledger AS (
+    SELECT e.*, l.total_points + SUM(e.points) OVER (
+        PARTITION BY e.customer_id ORDER BY e.kind, e.seq
+    ) AS new_balance
+    FROM entries e
+    JOIN locked l ON l.customer_id = e.customer_id
+),
+totals AS (
+    SELECT l.customer_id, l.total_points + SUM(e.points) AS new_total,
+        l.customer_tier AS old_tier,
+        l.customer_id IN (SELECT customer_id FROM delivered) AS is_buyer
+    FROM locked l
+    JOIN entries e ON e.customer_id = l.customer_id
+    GROUP BY l.customer_id, l.total_points, l.customer_tier
+),
+updated AS (
+    UPDATE customers c
+    SET total_points = t.new_total,
+        customer_tier = CASE
+            WHEN t.is_buyer AND t.new_total > 2000 THEN 'vip'
+            WHEN t.is_buyer AND t.new_total > 500
+                AND COALESCE(t.old_tier, '') NOT IN ('vip', 'regular') THEN 'regular'
+            ELSE c.customer_tier
+        END
+    FROM totals t
+    WHERE c.customer_id = t.customer_id
+    RETURNING c.name, c.customer_tier AS new_tier, t.old_tier
+),
+recorded AS (
+    INSERT INTO loyalty_points (customer_id, points_change, new_balance, transaction_type, order_id, description)
+    SELECT customer_id, points, new_balance, transaction_type, order_id, description
+    FROM ledger
+    RETURNING loyalty_id
+),
+completed AS (
+    UPDATE customer_referrals
+    SET referral_status = 'completed', completed_date = CURRENT_DATE, order_completed = TRUE
+    WHERE referral_id IN (SELECT referral_id FROM referrals)
+    RETURNING referral_id
+)
+SELECT 'points' AS kind, d.order_id, NULL AS name, NULL AS detail, d.points
+FROM delivered d
+UNION ALL
+SELECT 'promotion', NULL, u.name, u.new_tier, NULL
+FROM updated u
+WHERE u.new_tier IS DISTINCT FROM u.old_tier
+UNION ALL
+SELECT 'referral', NULL, rc.name, r.referred_name, r.reward_points
+FROM referrals r
+JOIN customers rc ON rc.customer_id = r.referrer_customer_id""")
+
+
+async def settle_delivered_orders(session: AsyncSession, order_ids: list[int]) -> dict:
+    """
+    Award loyalty points, tier upgrades and referral bonuses for delivered orders.
+    Runs as one statement for any number of orders; customers who appear more
+    than once get a single balance update and a running ledger balance.
+    Each order is settled at most once (orders.loyalty_settled_at), so a
+    retried call is a no-op. Returns the points awarded per newly settled
+    order plus the tier promotions and referral rewards for user feedback.
+    """
+    settlement: dict = {"points": {}, "promotions": [], "referrals": []}
+    if not order_ids:
+        return settlement
+    result = await session.execute(SETTLE_DELIVERED_SQL, {"order_ids": order_ids})
+    for row in result.mappings().all():
+        if row["kind"] == "points":
+            settlement["points"][row["order_id"]] = row["points"]
+        elif row["kind"] == "promotion":
+            settlement["promotions"].append(
+                {"customer_name": row["name"], "tier": row["detail"]}
+            )
+        else:
+            settlement["referrals"].append(
+                {
+                    "referrer_name": row["name"],
+                    "referred_name": row["detail"],
+                    "points": row["points"] or 0,
+                }
+            )
+    return settlement
\ No newline at end of file
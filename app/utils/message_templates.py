@@ -0,0 +1,368 @@
+import asyncio
+import logging
+import math
+import re
+import string
+import reflex as rx
+from sqlalchemy import text
+
+DEFAULT_LANGUAGE = "en"
+SUPPORTED_LANGUAGES = {"en": "English", "hi": "Hindi"}
+GSM7_BASIC = set(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+GSM7_EXTENDED = set("^{}\\[~]|€\f")
+SAMPLE_PARAMS = {
+    "customer_name": "Customer Name",
+    "order_id": 12345,
+    "delivery_date": "2025-01-31",
+    "total_amount": 12500.0,
+    "amount": 12500.0,
+    "due_date": "2025-01-31",
+    "new_status": "stitching",
+    "payment_link": "https://rzp.io/i/AbCdEf1234",
+}
+DEFAULT_TEMPLATES = {
+    (
+        "sms",
+        "order_confirmation",
+        "en",
+    ): "Hi {customer_name}, your TailorFlow order #{order_id} is confirmed. Total: Rs.{total_amount:.2f}, est. delivery {delivery_date}. We'll tell you when it's ready.",
+    (
+        "sms",
+        "order_confirmation",
+        "hi",
+    ): "नमस्ते {customer_name}, ऑर्डर #{order_id} कन्फ़र्म। कुल Rs.{total_amount:.2f}, डिलीवरी {delivery_date}",
+    (
+        "sms",
+        "order_ready",
+        "en",
+    ): "Hi {customer_name}, your order #{order_id} is ready for pickup! Collect it from our shop anytime during business hours. Thank you for choosing TailorFlow!",
+    (
+        "sms",
+        "order_ready",
+        "hi",
+    ): "नमस्ते {customer_name}, ऑर्डर #{order_id} तैयार है, दुकान से ले जाएँ।",
+    (
+        "sms",
+        "delivery_reminder",
+        "en",
+    ): "Hi {customer_name}, a friendly reminder that your order #{order_id} is ready for pickup. Please collect it at your earliest convenience. - TailorFlow",
+    (
+        "sms",
+        "delivery_reminder",
+        "hi",
+    ): "नमस्ते {customer_name}, ऑर्डर #{order_id} तैयार है, कृपया जल्द ले जाएँ।",
+    (
+        "sms",
+        "payment_reminder",
+        "en",
+    ): "Hi {customer_name}, your TailorFlow payment of Rs.{amount:.2f} for order #{order_id} is due on {due_date}.[[ Pay here: {payment_link}]] Thank you!",
+    (
+        "sms",
+        "payment_reminder",
+        "hi",
+    ): "नमस्ते {customer_name}, ऑर्डर #{order_id} के Rs.{amount:.2f} {due_date} तक देय।[[ भुगतान: {payment_link}]]",
+    (
+        "sms",
+        "status_update",
+        "en",
+    ): "Hi {customer_name}, your order #{order_id} has been {new_status}.",
+    (
+        "sms",
+        "status_update",
+        "hi",
+    ): "नमस्ते {customer_name}, आपके ऑर्डर #{order_id} की स्थिति: {new_status}",
+    (
+        "sms",
+        "status_cutting",
+        "en",
+    ): "Hi {customer_name}, your order #{order_id} has entered the cutting stage.",
+    (
+        "sms",
+        "status_cutting",
+        "hi",
+    ): "नमस्ते {customer_name}, आपके ऑर्डर #{order_id} की कटिंग शुरू हो गई है।",
+    (
+        "sms",
+        "status_stitching",
+        "en",
+    ): "Hi {customer_name}, good news! Your order #{order_id} is now being stitched.",
+    (
+        "sms",
+        "status_stitching",
+        "hi",
+    ): "नमस्ते {customer_name}, आपके ऑर्डर #{order_id} की सिलाई चल रही है।",
+    (
+        "sms",
+        "status_finishing",
+        "en",
+    ): "Hi {customer_name}, your order #{order_id} is in the final finishing stage. It will be ready soon!",
+    (
+        "sms",
+        "status_finishing",
+        "hi",
+    ): "नमस्ते {customer_name}, ऑर्डर #{order_id} फिनिशिंग में है, जल्द तैयार होगा!",
+    (
+        "sms",
+        "status_delivered",
+        "en",
+    ): "Hi {customer_name}, your order #{order_id} has been delivered.[[ Complete your payment here: {payment_link}]] Thank you for your business!",
+    (
+        "sms",
+        "status_delivered",
+        "hi",
+    ): "नमस्ते {customer_name}, आपका ऑर्डर #{order_id} डिलीवर हो गया।[[ भुगतान: {payment_link}]] धन्यवाद!",
+    (
+        "whatsapp",
+        "order_confirmation",
+        "en",
+    ): "Hi {customer_name}, your order #{order_id} with TailorFlow has been confirmed!\n\n*Total Amount:* ₹{total_amount:.2f}\n*Estimated Delivery:* {delivery_date}\n\nWe'll notify you once it's ready. Thank you!",
+    (
+        "whatsapp",
+        "order_confirmation",
+        "hi",
+    ): "नमस्ते {customer_name}, TailorFlow में आपका ऑर्डर #{order_id} कन्फ़र्म हो गया है!\n\n*कुल राशि:* ₹{total_amount:.2f}\n*अनुमानित डिलीवरी:* {delivery_date}\n\nतैयार होते ही हम आपको बताएँगे। धन्यवाद!",
+    (
+        "whatsapp",
+        "order_ready",
+        "en",
+    ): "Hi {customer_name}, great news! Your order #{order_id} is now ready for pickup.\nYou can collect it from our shop anytime during business hours.\n\nThank you for choosing TailorFlow!",
+    (
+        "whatsapp",
+        "order_ready",
+        "hi",
+    ): "नमस्ते {customer_name}, खुशखबरी! आपका ऑर्डर #{order_id} तैयार है।\nआप दुकान के समय में कभी भी इसे ले जा सकते हैं।\n\nTailorFlow चुनने के लिए धन्यवाद!",
+    (
+        "whatsapp",
+        "invoice",
+        "en",
+    ): "Hi {customer_name}, please find attached the invoice for your order #{order_id}.\n\nThank you for your business!",
+    (
+        "whatsapp",
+        "invoice",
+        "hi",
+    ): "नमस्ते {customer_name}, आपके ऑर्डर #{order_id} का इनवॉइस संलग्न है।\n\nधन्यवाद!",
+    (
+        "whatsapp",
+        "order_photo",
+        "en",
+    ): "Hi {customer_name}, here is a photo of your completed order #{order_id} for your approval. Please let us know if it looks good!",
+    (
+        "whatsapp",
+        "order_photo",
+        "hi",
+    ): "नमस्ते {customer_name}, आपके तैयार ऑर्डर #{order_id} की फ़ोटो आपकी मंज़ूरी के लिए भेजी है। कृपया बताएँ कि यह ठीक है या नहीं!",
+    (
+        "whatsapp",
+        "status_update",
+        "en",
+    ): "Hi {customer_name}, your order *#{order_id}* is now *{new_status}*.",
+    (
+        "whatsapp",
+        "status_update",
+        "hi",
+    ): "नमस्ते {customer_name}, आपके ऑर्डर *#{order_id}* की स्थिति: *{new_status}*",
+    (
+        "whatsapp",
+        "status_cutting",
+        "en",
+    ): "Hi {customer_name}, your order *#{order_id}* has entered the *cutting* stage. We'll keep you updated!",
+    (
+        "whatsapp",
+        "status_cutting",
+        "hi",
+    ): "नमस्ते {customer_name}, आपके ऑर्डर *#{order_id}* की *कटिंग* शुरू हो गई है। हम आपको अपडेट देते रहेंगे!",
+    (
+        "whatsapp",
+        "status_stitching",
+        "en",
+    ): "Hi {customer_name}, good news! Your order *#{order_id}* is now being *stitched*.",
+    (
+        "whatsapp",
+        "status_stitching",
+        "hi",
+    ): "नमस्ते {customer_name}, खुशखबरी! आपके ऑर्डर *#{order_id}* की *सिलाई* चल रही है।",
+    (
+        "whatsapp",
+        "status_finishing",
+        "en",
+    ): "Hi {customer_name}, your order *#{order_id}* is in the final *finishing* stage. It will be ready soon!",
+    (
+        "whatsapp",
+        "status_finishing",
+        "hi",
+    ): "नमस्ते {customer_name}, आपका ऑर्डर *#{order_id}* अंतिम *फिनिशिंग* में है। जल्द ही तैयार होगा!",
+    (
+        "whatsapp",
+        "status_delivered",
+        "en",
+    ): "Hi {customer_name}, your order *#{order_id}* is now *delivered*.[[\n\nYou can complete your payment here: {payment_link}]]\n\nThank you for choosing TailorFlow!",
+    (
+        "whatsapp",
+        "status_delivered",
+        "hi",
+    ): "नमस्ते {customer_name}, आपका ऑर्डर *#{order_id}* *डिलीवर* हो गया है।[[\n\nआप यहाँ भुगतान कर सकते हैं: {payment_link}]]\n\nTailorFlow चुनने के लिए धन्यवाद!",
+}
+
+LOAD_TEMPLATES_SQL = text(
+    "SELECT channel, template_key, language, body FROM message_templates"
+)
+
+_SECTION = re.compile(r"\[\[(.*?)\]\]", re.DOTALL)
+_formatter = string.Formatter()
+_registry: dict[tuple[str, str, str], "MessageTemplate"] = {}
+
+
+def _compile_fields(body: str) -> tuple:
+    parts = []
+    for literal, field, spec, conversion in _formatter.parse(body):
+        if literal:
+            parts.append(literal)
+        if field is not None:
+            parts.append((field, spec or "", conversion))
+    return tuple(parts)
+
+
+class MessageTemplate:
+    """
+    A message body parsed once into literal text and fields. Fields use
+    str.format syntax ({amount:.2f}); text inside [[ ... ]] is only rendered
+    when every field in it has a value.
+    """
+
+    def __init__(self, body: str):
+        self.body = body
+        parts = []
+        position = 0
+        for match in _SECTION.finditer(body):
+            parts.extend(_compile_fields(body[position : match.start()]))
+            section = _compile_fields(match.group(1))
+            fields = tuple(part[0] for part in section if isinstance(part, tuple))
+            parts.append((fields, section))
+            position = match.end()
+        parts.extend(_compile_fields(body[position:]))
+        self._parts = tuple(parts)
+
+    @staticmethod
+    def _render_parts(parts: tuple, params: dict, out: list):
+        for part in parts:
+            if isinstance(part, str):
+                out.append(part)
+            elif isinstance(part[1], tuple):
+                if all(params.get(field) for field in part[0]):
+                    MessageTemplate._render_parts(part[1], params, out)
+            else:
+                name, spec, conversion = part
+                value = params[name]
+                if conversion == "r":
+                    value = repr(value)
+                elif conversion == "s":
+                    value = str(value)
+                out.append(format(value, spec))
+
+    def render(self, params: dict) -> str:
+        out: list[str] = []
+        self._render_parts(self._parts, params, out)
+        return "".join(out)
+
+
+def sms_segments(body: str) -> dict:
+    """
+    Work out how an SMS body is encoded and how many segments it costs.
+    GSM-7 fits 160 characters in one segment (153 per part when split),
+    with extension characters such as € counting twice; anything outside
+    GSM-7 forces UCS-2 at 70 (67) UTF-16 code units.
+    """
+    if all(char in GSM7_BASIC or char in GSM7_EXTENDED for char in body):
+        encoding = "GSM-7"
+        length = sum(2 if char in GSM7_EXTENDED else 1 for char in body)
+        single, multi = 160, 153
+    else:
+        encoding = "UCS-2"
+        length = len(body.encode("utf-16-le")) // 2
+        single, multi = 70, 67
+    segments = 1 if length <= single else math.ceil(length / multi)
+    return {"encoding": encoding, "length": length, "segments": segments}
+
+
+def _build_registry(overrides: list[dict]) -> dict:
+    bodies = dict(DEFAULT_TEMPLATES)
+    for row in overrides:
+        bodies[row["channel"], row["template_key"], row["language"]] = row["body"]
+    return {key: MessageTemplate(body) for key, body in bodies.items()}
+
+
+async def load_message_templates():
+    """
+    Compile the template registry once at startup: the built-in templates,
+    overridden by any rows in the message_templates table.
+    """
+    global _registry
+    overrides = []
+    try:
+        async with rx.asession() as session:
+            result = await session.execute(LOAD_TEMPLATES_SQL)
+            overrides = [dict(row) for row in result.mappings().all()]
+    except Exception as e:
+        logging.exception(f"Could not load message templates, using defaults: {e}")
+    _registry = _build_registry(overrides)
+    logging.info(
+        f"Compiled {len(_registry)} message templates ({len(overrides)} from the database)."
+    )
+
+
+def get_template(
+    channel: str, key: str, language: str | None = None
+) -> MessageTemplate:
+    """Look up a compiled template, falling back to English."""
+    if not _registry:
+        _registry.update(_build_registry([]))
+    template = _registry.get((channel, key, language or DEFAULT_LANGUAGE))
+    return template or _registry[channel, key, DEFAULT_LANGUAGE]
+
+
+def status_template_key(channel: str, status: str) -> str:
+    """The stage-specific status template if there is one, else the generic one."""
+    key = f"status_{status.lower()}"
+    if not _registry:
+        _registry.update(_build_registry([]))
+    return key if (channel, key, DEFAULT_LANGUAGE) in _registry else "status_update"
+
+
+def render(channel: str, key: str, language: str | None = None, **params) -> str:
+    return get_template(channel, key, language).render(params)
+
+
+def render_batch(channel: str, key: str, rows: list[dict]) -> list[str]:
+    """
+    Render one template for many recipients in a single pass, each row in
+    its own `language`. Each language's template is looked up once, so a
+    campaign pays only for the string building.
+    """
+    templates: dict[str | None, MessageTemplate] = {}
+    bodies = []
+    for row in rows:
+        language = row.get("language")
+        template = templates.get(language)
+        if template is None:
+            template = templates[language] = get_template(channel, key, language)
+        bodies.append(template.render(row))
+    return bodies
+
+
+async def main():
+    await load_message_templates()
+    for (channel, key, language), template in sorted(_registry.items()):
+        if channel != "sms":
+            continue
+        info = sms_segments(template.render(SAMPLE_PARAMS))
+        flag = "" if info["segments"] == 1 else "  <- more than one segment"
+        print(
+            f"{key:<20}{language:<4}{info['encoding']:<7}{info['length']:>5} chars {info['segments']} segment(s){flag}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
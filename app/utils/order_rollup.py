@@ -0,0 +1,114 @@
+import asyncio
+import datetime
+import logging
+import sys
+import reflex as rx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+RECONCILE_ROLLUP_SQL = text("""WITH actual AS (
+    SELECT COALESCE(order_date, '-infinity') AS day, COALESCE(delivery_date, '-infinity') AS delivery_day,
+        COALESCE(cloth_type, '') AS cloth_type, COALESCE(status, '') AS status,
+        COUNT(*) AS order_count,
+        SUM(COALESCE(total_amount, 0)) AS revenue,
+        SUM(COALESCE(discount_amount, 0)) AS discount,
+        SUM(COALESCE(material_cost, 0)) AS material_cost,
+        SUM(COALESCE(labor_cost, 0)) AS labor_cost,
+        SUM(COALESCE(profit, 0)) AS profit
+    FROM orders
+    WHERE CAST(:since AS date) IS NULL OR order_date >= CAST(:since AS date)
+    GROUP BY 1, 2, 3, 4
+),
+recorded AS (
+    SELECT * FROM daily_order_rollup
+    WHERE day >= COALESCE(CAST(:since AS date), '-infinity')
+),
+drift AS (
+    SELECT day, delivery_day, cloth_type, status,
+        r.order_count AS recorded_count, a.order_count AS actual_count,
+        r.revenue AS recorded_revenue, a.revenue AS actual_revenue
+    FROM actual a
+    FULL JOIN recorded r USING (day, delivery_day, cloth_type, status)
+    WHERE (a.order_count, a.revenue, a.discount, a.material_cost, a.labor_cost, a.profit)
+        IS DISTINCT FROM (r.order_count, r.revenue, r.discount, r.material_cost, r.labor_cost, r.profit)
+),
+fixed AS (
+    INSERT INTO daily_order_rollup AS r (day, delivery_day, cloth_type, status, order_count, revenue, discount,
+        material_cost, labor_cost, profit)
+    SELECT a.* FROM actual a JOIN drift d USING (day, delivery_day, cloth_type, status)
+    ON CONFLICT (day, delivery_day, cloth_type, status) DO UPDATE
+    SET order_count = EXCLUDED.order_count,
+        revenue = EXCLUDED.revenue,
+        discount = EXCLUDED.discount,
+        material_cost = EXCLUDED.material_cost,
+        labor_cost = EXCLUDED.labor_cost,
+        profit = EXCLUDED.profit
+),
+removed AS (
+    DELETE FROM daily_order_rollup r
+    USING drift d
+    WHERE r.day = d.day AND r.delivery_day = d.delivery_day AND r.cloth_type = d.cloth_type AND r.status = d.status
+        AND d.actual_count IS NULL
+)
+SELECT * FROM drift
+WHERE NOT (actual_count IS NULL AND recorded_count = 0)
+ORDER BY day, delivery_day, cloth_type, status""")
+
+
+async def reconcile_order_rollup(
+    session: AsyncSession, since: datetime.date | None = None
+) -> list[dict]:
+    """
+    Rebuild daily_order_rollup from the orders table, from `since` onwards
+    or for all time. Run against an empty table it is the backfill.
+    Orders with no order or delivery date are kept under -infinity for
+    that date, so undated orders still count towards the totals.
+    Order writes are blocked for the duration so the rebuild cannot race
+    the triggers. Returns the rollup rows that had drifted, before fixing;
+    emptied rows left behind by the triggers are removed without being
+    reported.
+    """
+    await session.execute(text("LOCK TABLE orders IN SHARE MODE"))
+    result = await session.execute(RECONCILE_ROLLUP_SQL, {"since": since})
+    return [dict(row) for row in result.mappings().all()]
+
+
+ROLLUP_NEEDS_BACKFILL_SQL = text("""SELECT NOT EXISTS (SELECT 1 FROM daily_order_rollup)
+    AND EXISTS (SELECT 1 FROM orders)""")
+
+
+async def backfill_order_rollup():
+    """
+    Fill daily_order_rollup at startup when it is empty but orders already
+    exist, as on a database created before the rollup was added. The
+    triggers keep it current from then on; once it has rows this only
+    costs one check.
+    """
+    try:
+        async with rx.asession() as session, session.begin():
+            if not (await session.execute(ROLLUP_NEEDS_BACKFILL_SQL)).scalar_one():
+                return
+            drift = await reconcile_order_rollup(session)
+        logging.info(f"Backfilled {len(drift)} daily order rollup row(s).")
+    except Exception as e:
+        logging.exception(
+            f"Daily order rollup backfill failed; run python -m app.utils.order_rollup: {e}"
+        )
+
+
+async def main():
+    since = datetime.date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+    async with rx.asession() as session, session.begin():
+        drift = await reconcile_order_rollup(session, since)
+    if not drift:
+        print("Daily order rollup is in sync.")
+        return
+    for row in drift[:50]:
+        logging.warning(
+            f"{row['day']} delivered {row['delivery_day']} {row['cloth_type'] or '-'} {row['status'] or '-'}: recorded {row['recorded_count']} order(s) / {row['recorded_revenue']}, actual {row['actual_count']} / {row['actual_revenue']}"
+        )
+    print(f"Fixed {len(drift)} daily order rollup row(s).")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
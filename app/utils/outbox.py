@@ -0,0 +1,481 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import reflex as rx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.delivery_receipts import DELIVERY_STATS_DAYS
+from app.utils.twilio_transport import (
+    TwilioCircuitOpen,
+    TwilioSendError,
+    twilio_breaker,
+    twilio_configured,
+)
+
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_CONCURRENCY = 8
+OUTBOX_POLL_INTERVAL = 5.0
+OUTBOX_LEASE_SECONDS = 300
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY_SECONDS = 30
+OUTBOX_MAX_RETRY_DELAY_SECONDS = 3600
+TWILIO_NOT_CONFIGURED = "Twilio is not configured"
+NOTIFICATION_COALESCE_MINUTES = int(os.getenv("NOTIFICATION_COALESCE_MINUTES", "5"))
+IMMEDIATE_STATUSES = {"ready", "delivered", "cancelled"}
+_wakeup = asyncio.Event()
+
+ENQUEUE_NOTIFICATIONS_SQL = text("""WITH candidates AS (
+    SELECT o.order_id,
+        COALESCE(
+            CAST(:channel AS text),
+            CASE
+                WHEN NOT COALESCE(c.opt_in_whatsapp, false) THEN 'sms'
+                WHEN ds.whatsapp_score > ds.sms_score THEN 'whatsapp'
+                WHEN ds.whatsapp_score < ds.sms_score THEN 'sms'
+                WHEN c.prefer_whatsapp THEN 'whatsapp'
+                ELSE 'sms'
+            END
+        ) AS channel,
+        CAST(:template AS text) AS template,
+        jsonb_build_object(
+            'customer_phone', c.phone_number,
+            'customer_name', c.name,
+            'order_id', o.order_id,
+            'language', c.preferred_language
+        ) || CAST(:extra AS jsonb) AS payload
+    FROM orders o
+    JOIN customers c ON c.customer_id = o.customer_id
+    CROSS JOIN LATERAL (
+        SELECT (COUNT(*) FILTER (WHERE channel = 'sms' AND status IN ('delivered', 'read')) + 1.0)
+                / (COUNT(*) FILTER (WHERE channel = 'sms') + 2) AS sms_score,
+            (COUNT(*) FILTER (WHERE channel = 'whatsapp' AND status IN ('delivered', 'read')) + 1.0)
+                / (COUNT(*) FILTER (WHERE channel = 'whatsapp') + 2) AS whatsapp_score
+        FROM message_deliveries
+        WHERE to_number = CASE WHEN c.phone_number LIKE '+%' THEN c.phone_number ELSE '+91' || c.phone_number END
+            AND status IN ('delivered', 'read', 'undelivered', 'failed')
+            AND updated_at > CURRENT_TIMESTAMP - make_interval(days => :stats_days)
+    ) ds
+    WHERE o.order_id = ANY(CAST(:order_ids AS integer[]))
+        AND c.phone_number IS NOT NULL
+),
+hashed AS (
+    SELECT candidates.*,
+        md5(channel || ':' || template || ':' || CAST(payload AS text)) AS content_hash
+    FROM candidates
+),
+duplicates AS (
+    UPDATE notification_outbox n
+    SET duplicates_dropped = n.duplicates_dropped + 1
+    FROM hashed h
+    WHERE n.outbox_id = (
+        SELECT outbox_id FROM notification_outbox
+        WHERE content_hash = h.content_hash
+            AND status IN ('pending', 'sending', 'sent')
+            AND COALESCE(sent_at, created_at) > CURRENT_TIMESTAMP - make_interval(mins => :window)
+        ORDER BY outbox_id DESC
+        LIMIT 1
+    )
+    RETURNING h.order_id, h.channel
+),
+merged AS (
+    UPDATE notification_outbox n
+    SET template = h.template,
+        payload = h.payload,
+        content_hash = h.content_hash,
+        coalesced_count = n.coalesced_count + 1,
+        available_at = LEAST(n.available_at, CURRENT_TIMESTAMP + make_interval(mins => :delay))
+    FROM hashed h
+    WHERE :coalesce
+        AND n.outbox_id = (
+            SELECT MAX(outbox_id) FROM notification_outbox
+            WHERE order_id = h.order_id
+                AND channel = h.channel
+                AND status = 'pending'
+                AND template IN ('order_ready', 'status_update')
+                AND created_at > CURRENT_TIMESTAMP - make_interval(mins => :window)
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM duplicates d WHERE d.order_id = h.order_id AND d.channel = h.channel
+        )
+    RETURNING n.order_id, n.channel
+),
+inserted AS (
+    INSERT INTO notification_outbox (order_id, channel, template, payload, content_hash, available_at)
+    SELECT h.order_id, h.channel, h.template, h.payload, h.content_hash,
+        CURRENT_TIMESTAMP + make_interval(mins => :delay)
+    FROM hashed h
+    WHERE NOT EXISTS (
+            SELECT 1 FROM duplicates d WHERE d.order_id = h.order_id AND d.channel = h.channel
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM merged m WHERE m.order_id = h.order_id AND m.channel = h.channel
+        )
+    ORDER BY h.order_id
+    RETURNING channel
+)
+SELECT channel FROM duplicates
+UNION ALL SELECT channel FROM merged
+UNION ALL SELECT channel FROM inserted""")
+
+CLAIM_OUTBOX_SQL = text("""WITH due AS (
+    SELECT outbox_id FROM notification_outbox
+    WHERE status IN ('pending', 'sending') AND available_at <= CURRENT_TIMESTAMP
+    ORDER BY available_at, outbox_id
+    LIMIT :limit
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE notification_outbox n
+SET status = 'sending',
+    attempts = n.attempts + 1,
+    available_at = CURRENT_TIMESTAMP + make_interval(secs => :lease)
+FROM due
+WHERE n.outbox_id = due.outbox_id
+RETURNING n.outbox_id, n.channel, n.template, n.payload, n.attempts""")
+
+FINISH_OUTBOX_SQL = text("""WITH results AS (
+    SELECT * FROM unnest(
+        CAST(:outbox_ids AS integer[]),
+        CAST(:outcomes AS text[]),
+        CAST(:errors AS text[]),
+        CAST(:delays AS double precision[])
+    ) AS r(outbox_id, outcome, error, delay)
+),
+dead AS (
+    DELETE FROM notification_outbox n
+    USING results r
+    WHERE n.outbox_id = r.outbox_id
+        AND n.status = 'sending'
+        AND (r.outcome = 'dead' OR (r.outcome = 'retry' AND n.attempts >= :max_attempts))
+    RETURNING n.outbox_id, n.order_id, n.channel, n.template, n.payload, n.content_hash,
+        n.attempts, r.error, n.created_at
+),
+buried AS (
+    INSERT INTO notification_dead_letters (
+        outbox_id, order_id, channel, template, payload, content_hash, attempts, last_error, created_at
+    )
+    SELECT outbox_id, order_id, channel, template, payload, content_hash, attempts, error, created_at
+    FROM dead
+)
+UPDATE notification_outbox n
+SET status = CASE WHEN r.outcome = 'sent' THEN 'sent' ELSE 'pending' END,
+    sent_at = CASE WHEN r.outcome = 'sent' THEN CURRENT_TIMESTAMP END,
+    last_error = r.error,
+    attempts = CASE WHEN r.outcome = 'deferred' THEN n.attempts - 1 ELSE n.attempts END,
+    available_at = CASE
+        WHEN r.outcome = 'sent' THEN n.available_at
+        ELSE CURRENT_TIMESTAMP + make_interval(secs => r.delay)
+    END
+FROM results r
+WHERE n.outbox_id = r.outbox_id
+    AND n.status = 'sending'
+    AND NOT EXISTS (SELECT 1 FROM dead d WHERE d.outbox_id = n.outbox_id)""")
+
+QUEUE_RETRY_SQL = text("""INSERT INTO notification_outbox (
+    order_id, channel, template, payload, attempts, last_error, available_at
+)
+VALUES (
+    :order_id, :channel, :template, CAST(:payload AS jsonb), 1, :error,
+    CURRENT_TIMESTAMP + make_interval(secs => :delay)
+)""")
+
+LIST_DEAD_LETTERS_SQL = text("""SELECT d.dead_letter_id, d.order_id, d.channel, d.template, d.attempts,
+    d.last_error, d.created_at, d.failed_at,
+    d.payload ->> 'customer_name' AS customer_name,
+    COALESCE(d.payload ->> 'customer_phone', d.payload ->> 'to') AS customer_phone
+FROM notification_dead_letters d
+ORDER BY d.failed_at DESC, d.dead_letter_id DESC
+LIMIT :limit""")
+
+RETRY_DEAD_LETTERS_SQL = text("""WITH revived AS (
+    DELETE FROM notification_dead_letters
+    WHERE CAST(:dead_letter_ids AS integer[]) IS NULL
+        OR dead_letter_id = ANY(CAST(:dead_letter_ids AS integer[]))
+    RETURNING order_id, channel, template, payload, content_hash
+)
+INSERT INTO notification_outbox (order_id, channel, template, payload, content_hash)
+SELECT order_id, channel, template, payload, content_hash FROM revived
+RETURNING outbox_id""")
+
+DISCARD_DEAD_LETTERS_SQL = text(
+    "DELETE FROM notification_dead_letters WHERE dead_letter_id = ANY(CAST(:dead_letter_ids AS integer[]))"
+)
+
+NOTIFICATION_SAVINGS_SQL = text("""SELECT COUNT(*) FILTER (WHERE status = 'sent') AS sent,
+    COALESCE(SUM(coalesced_count), 0) AS coalesced,
+    COALESCE(SUM(duplicates_dropped), 0) AS duplicates
+FROM notification_outbox
+WHERE created_at >= CURRENT_TIMESTAMP - make_interval(days => :days)""")
+
+
+async def _enqueue(
+    session: AsyncSession,
+    order_ids: list[int],
+    template: str,
+    extra: dict,
+    channel: str | None,
+    coalesce: bool = False,
+    delay_minutes: int = 0,
+) -> list[str]:
+    if not order_ids:
+        return []
+    result = await session.execute(
+        ENQUEUE_NOTIFICATIONS_SQL,
+        {
+            "order_ids": list(order_ids),
+            "template": template,
+            "extra": json.dumps(extra),
+            "channel": channel,
+            "window": NOTIFICATION_COALESCE_MINUTES,
+            "coalesce": coalesce,
+            "delay": delay_minutes,
+            "stats_days": DELIVERY_STATS_DAYS,
+        },
+    )
+    return list(result.scalars().all())
+
+
+async def enqueue_order_confirmation(
+    session: AsyncSession, order_id: int, delivery_date: str, total_amount: float
+) -> list[str]:
+    """Queue the order confirmation message inside the caller's transaction."""
+    return await _enqueue(
+        session,
+        [order_id],
+        "order_confirmation",
+        {"delivery_date": delivery_date, "total_amount": total_amount},
+        None,
+    )
+
+
+async def enqueue_status_notifications(
+    session: AsyncSession,
+    order_ids: list[int],
+    new_status: str,
+    payment_link: str | None = None,
+    channel: str | None = None,
+) -> list[str]:
+    """
+    Queue one status message per order inside the caller's transaction.
+    Unless a channel is given, customers opted in to WhatsApp get the
+    channel with the better delivery rate over the last DELIVERY_STATS_DAYS
+    days, smoothed so a channel with little history scores about 50%; their
+    WhatsApp preference breaks ties. Returns the queued channels; nothing is sent until the dispatcher
+    picks the rows up after commit.
+
+    Intermediate statuses are held for NOTIFICATION_COALESCE_MINUTES, and a
+    newer status for the same order and channel replaces the pending message
+    instead of adding another, so cutting -> stitching -> finishing in quick
+    succession costs one send. Ready, delivered and cancelled go out at once,
+    still absorbing any pending update. A message identical to one queued or
+    sent within the window is dropped.
+    """
+    delay = (
+        0 if new_status.lower() in IMMEDIATE_STATUSES else NOTIFICATION_COALESCE_MINUTES
+    )
+    if new_status.lower() == "ready":
+        return await _enqueue(
+            session, order_ids, "order_ready", {}, channel, True, delay
+        )
+    return await _enqueue(
+        session,
+        order_ids,
+        "status_update",
+        {"new_status": new_status, "payment_link": payment_link},
+        channel,
+        True,
+        delay,
+    )
+
+
+async def notification_savings(session: AsyncSession, days: int = 30) -> dict:
+    """Count messages sent and sends avoided by coalescing and dedup."""
+    row = (
+        (await session.execute(NOTIFICATION_SAVINGS_SQL, {"days": days}))
+        .mappings()
+        .one()
+    )
+    coalesced, duplicates = int(row["coalesced"]), int(row["duplicates"])
+    return {
+        "sent": int(row["sent"]),
+        "coalesced": coalesced,
+        "duplicates": duplicates,
+        "saved": coalesced + duplicates,
+    }
+
+
+async def queue_for_retry(
+    order_id: int | None,
+    channel: str,
+    template: str,
+    payload: dict,
+    error: TwilioSendError,
+):
+    """
+    Hand a message that failed a direct send over to the outbox, which
+    retries it in the background and dead-letters it if it keeps failing.
+    """
+    async with rx.asession() as session, session.begin():
+        await session.execute(
+            QUEUE_RETRY_SQL,
+            {
+                "order_id": order_id,
+                "channel": channel,
+                "template": template,
+                "payload": json.dumps(payload),
+                "error": str(error),
+                "delay": retry_delay(1, error.retry_after),
+            },
+        )
+    notify_outbox()
+
+
+async def list_dead_letters(session: AsyncSession, limit: int = 200) -> list[dict]:
+    result = await session.execute(LIST_DEAD_LETTERS_SQL, {"limit": limit})
+    return [dict(row) for row in result.mappings().all()]
+
+
+async def retry_dead_letters(
+    session: AsyncSession, dead_letter_ids: list[int] | None = None
+) -> int:
+    """Move dead letters back into the outbox; all of them when no ids are given."""
+    result = await session.execute(
+        RETRY_DEAD_LETTERS_SQL, {"dead_letter_ids": dead_letter_ids}
+    )
+    return len(result.scalars().all())
+
+
+async def discard_dead_letters(
+    session: AsyncSession, dead_letter_ids: list[int]
+) -> int:
+    result = await session.execute(
+        DISCARD_DEAD_LETTERS_SQL, {"dead_letter_ids": dead_letter_ids}
+    )
+    return result.rowcount
+
+
+def notify_outbox():
+    """Wake the dispatcher once queued messages have been committed."""
+    _wakeup.set()
+
+
+def _sender(channel: str, template: str):
+    from app.utils import sms, whatsapp
+
+    senders = {
+        ("sms", "order_confirmation"): sms.send_order_confirmation,
+        ("sms", "order_ready"): sms.send_order_ready_notification,
+        ("sms", "status_update"): sms.send_status_update_notification,
+        ("sms", "payment_reminder"): sms.send_payment_reminder,
+        ("sms", "custom"): sms._send_sms,
+        ("whatsapp", "order_confirmation"): whatsapp.send_whatsapp_order_confirmation,
+        ("whatsapp", "order_ready"): whatsapp.send_whatsapp_order_ready,
+        ("whatsapp", "status_update"): whatsapp.send_whatsapp_status_update,
+        ("whatsapp", "order_photo"): whatsapp.send_whatsapp_order_photo_for_approval,
+        ("whatsapp", "custom"): whatsapp._send_whatsapp_message,
+    }
+    return senders[channel, template]
+
+
+def retry_delay(attempts: int, retry_after: float | None = None) -> float:
+    """
+    Seconds to wait before attempt `attempts + 1`: exponential backoff from
+    OUTBOX_RETRY_DELAY_SECONDS, capped at OUTBOX_MAX_RETRY_DELAY_SECONDS,
+    with jitter over its upper half so failed messages do not retry in
+    lockstep. A Retry-After from Twilio is a floor.
+    """
+    backoff = min(
+        OUTBOX_MAX_RETRY_DELAY_SECONDS,
+        OUTBOX_RETRY_DELAY_SECONDS * 2 ** max(attempts - 1, 0),
+    )
+    return max(random.uniform(backoff / 2, backoff), retry_after or 0.0)
+
+
+async def _deliver(
+    message: dict, semaphore: asyncio.Semaphore
+) -> tuple[str, str | None, float | None]:
+    payload = message["payload"]
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    if not twilio_configured():
+        return ("deferred", TWILIO_NOT_CONFIGURED, OUTBOX_MAX_RETRY_DELAY_SECONDS)
+    async with semaphore:
+        try:
+            sender = _sender(message["channel"], message["template"])
+            if await sender(**payload):
+                return ("sent", None, None)
+            return ("dead", "Provider rejected the message", None)
+        except TwilioCircuitOpen as e:
+            return ("deferred", str(e), max(e.retry_after or 0.0, 1.0))
+        except TwilioSendError as e:
+            logging.warning(f"Outbox message {message['outbox_id']} will retry: {e}")
+            return ("retry", str(e), retry_delay(message["attempts"], e.retry_after))
+        except Exception as e:
+            logging.exception(
+                f"Failed to send outbox message {message['outbox_id']}: {e}"
+            )
+            return ("retry", str(e), retry_delay(message["attempts"]))
+
+
+async def dispatch_outbox_batch(semaphore: asyncio.Semaphore) -> int:
+    """
+    Claim up to OUTBOX_BATCH_SIZE due messages and send them concurrently.
+    Rows are claimed with SKIP LOCKED under a lease, so several app workers
+    can drain the same table; a row whose worker died is retried once its
+    lease runs out. Transient failures are retried with backoff; rejected
+    messages, and those still failing after OUTBOX_MAX_ATTEMPTS, move to
+    notification_dead_letters. Returns the number of messages claimed.
+    """
+    async with rx.asession() as session, session.begin():
+        result = await session.execute(
+            CLAIM_OUTBOX_SQL,
+            {"limit": OUTBOX_BATCH_SIZE, "lease": OUTBOX_LEASE_SECONDS},
+        )
+        messages = [dict(row) for row in result.mappings().all()]
+    if not messages:
+        return 0
+    outcomes = await asyncio.gather(
+        *(_deliver(message, semaphore) for message in messages)
+    )
+    async with rx.asession() as session, session.begin():
+        await session.execute(
+            FINISH_OUTBOX_SQL,
+            {
+                "outbox_ids": [message["outbox_id"] for message in messages],
+                "outcomes": [outcome for outcome, _, _ in outcomes],
+                "errors": [error for _, error, _ in outcomes],
+                "delays": [delay for _, _, delay in outcomes],
+                "max_attempts": OUTBOX_MAX_ATTEMPTS,
+            },
+        )
+    return len(messages)
+
+
+async def run_outbox_dispatcher():
+    """
+    Drain the notification outbox for the lifetime of the app. Without
+    Twilio configured nothing is sent and queued messages stay pending
+    rather than being dead-lettered.
+    """
+    if not twilio_configured():
+        logging.warning(f"{TWILIO_NOT_CONFIGURED}; the notification outbox is paused.")
+        return
+    semaphore = asyncio.Semaphore(OUTBOX_CONCURRENCY)
+    while True:
+        _wakeup.clear()
+        pause = twilio_breaker.retry_after()
+        if pause:
+            await asyncio.sleep(pause)
+            continue
+        try:
+            claimed = await dispatch_outbox_batch(semaphore)
+        except Exception as e:
+            logging.exception(f"Notification outbox dispatch failed: {e}")
+            claimed = 0
+        if claimed >= OUTBOX_BATCH_SIZE:
+            continue
+        try:
+            await asyncio.wait_for(_wakeup.wait(), OUTBOX_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
\ No newline at end of file
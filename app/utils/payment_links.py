@@ -0,0 +1,283 @@
+import asyncio
+import datetime
+import logging
+import os
+import sys
+import time
+import uuid
+import reflex as rx
+from sqlalchemy import text
+from app.utils.rate_limit import TokenBucket
+from app.utils.razorpay import cancel_payment_link, create_payment_link_details
+
+PAYMENT_LINK_TTL_DAYS = int(os.getenv("PAYMENT_LINK_TTL_DAYS", "30"))
+PAYMENT_LINK_MIN_REMAINING = datetime.timedelta(days=1)
+PAYMENT_LINK_RATE = float(os.getenv("PAYMENT_LINK_RATE", "5"))
+PAYMENT_LINK_BURST = int(os.getenv("PAYMENT_LINK_BURST", "10"))
+PAYMENT_LINK_CONCURRENCY = 10
+PAYMENT_LINK_CLAIM_SECONDS = 60
+PAYMENT_LINK_CLAIM_POLL = 0.5
+_link_bucket = TokenBucket(PAYMENT_LINK_RATE, PAYMENT_LINK_BURST)
+
+INSTALLMENT_LINK_COLUMNS = """pi.installment_id, pi.order_id, pi.amount,
+    pi.payment_link_url, pi.payment_link_amount, pi.payment_link_expires_at,
+    c.name AS customer_name, c.phone_number AS customer_phone, c.email AS customer_email"""
+
+LINK_IS_VALID_SQL = """pi.payment_link_url IS NOT NULL
+    AND pi.payment_link_amount = pi.amount
+    AND (pi.payment_link_expires_at IS NULL
+        OR pi.payment_link_expires_at > CURRENT_TIMESTAMP + make_interval(secs => :min_remaining))"""
+
+INSTALLMENT_LINK_SQL = text(f"""SELECT pi.payment_link_url, {LINK_IS_VALID_SQL} AS link_is_valid
+FROM payment_installments pi
+WHERE pi.installment_id = :installment_id""")
+
+MISSING_LINKS_SQL = text(f"""SELECT pi.installment_id
+FROM payment_installments pi
+WHERE pi.status = 'pending'
+    AND pi.due_date <= CURRENT_DATE + CAST(:days AS integer)
+    AND NOT ({LINK_IS_VALID_SQL})
+ORDER BY pi.due_date, pi.installment_id""")
+
+CLAIM_LINKS_SQL = text(f"""WITH candidates AS (
+    SELECT pi.installment_id FROM payment_installments pi
+    WHERE pi.installment_id = ANY(CAST(:installment_ids AS integer[]))
+        AND NOT ({LINK_IS_VALID_SQL})
+        AND (pi.payment_link_claimed_at IS NULL
+            OR pi.payment_link_claimed_at < CURRENT_TIMESTAMP - make_interval(secs => :lease))
+    ORDER BY pi.installment_id
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE payment_installments pi
+SET payment_link_claim = :claim, payment_link_claimed_at = CURRENT_TIMESTAMP
+FROM candidates, orders o, customers c
+WHERE pi.installment_id = candidates.installment_id
+    AND o.order_id = pi.order_id
+    AND c.customer_id = o.customer_id
+RETURNING {INSTALLMENT_LINK_COLUMNS}, pi.payment_link_id AS previous_link_id""")
+
+STORE_LINKS_SQL = text("""WITH links AS (
+    SELECT * FROM unnest(
+        CAST(:installment_ids AS integer[]),
+        CAST(:link_ids AS text[]),
+        CAST(:urls AS text[]),
+        CAST(:amounts AS numeric[]),
+        CAST(:expires_at AS timestamp[])
+    ) AS l(installment_id, link_id, url, amount, expires_at)
+),
+recorded AS (
+    INSERT INTO installment_payment_links (link_id, installment_id, url, amount, expires_at)
+    SELECT link_id, installment_id, url, amount, expires_at FROM links
+    ON CONFLICT (link_id) DO NOTHING
+)
+UPDATE payment_installments pi
+SET payment_link_id = l.link_id,
+    payment_link_url = l.url,
+    payment_link_amount = l.amount,
+    payment_link_expires_at = l.expires_at,
+    payment_link_claim = NULL,
+    payment_link_claimed_at = NULL
+FROM links l
+WHERE pi.installment_id = l.installment_id AND pi.payment_link_claim = :claim
+RETURNING pi.installment_id""")
+
+RELEASE_CLAIMS_SQL = text("""UPDATE payment_installments
+SET payment_link_claim = NULL, payment_link_claimed_at = NULL
+WHERE installment_id = ANY(CAST(:installment_ids AS integer[])) AND payment_link_claim = :claim""")
+
+MARK_CANCELLED_SQL = text("""UPDATE installment_payment_links
+SET cancelled_at = CURRENT_TIMESTAMP
+WHERE link_id = ANY(CAST(:link_ids AS text[]))""")
+
+
+async def _create_link(installment: dict) -> dict | None:
+    await _link_bucket.acquire()
+    link = await asyncio.to_thread(
+        create_payment_link_details,
+        amount=float(installment["amount"]),
+        description=f"Payment for Order #{installment['order_id']}",
+        customer_name=installment["customer_name"],
+        customer_contact=installment["customer_phone"],
+        customer_email=installment["customer_email"],
+        order_id=installment["order_id"],
+        expire_by=datetime.datetime.now()
+        + datetime.timedelta(days=PAYMENT_LINK_TTL_DAYS),
+    )
+    if not link or not link["short_url"]:
+        return None
+    return {
+        **link,
+        "installment_id": installment["installment_id"],
+        "amount": installment["amount"],
+    }
+
+
+def _store_params(links: list[dict]) -> dict:
+    return {
+        "installment_ids": [link["installment_id"] for link in links],
+        "link_ids": [link["id"] for link in links],
+        "urls": [link["short_url"] for link in links],
+        "amounts": [link["amount"] for link in links],
+        "expires_at": [link["expire_by"] for link in links],
+    }
+
+
+async def _claim_links(installment_ids: list[int], claim: str) -> list[dict]:
+    async with rx.asession() as session, session.begin():
+        result = await session.execute(
+            CLAIM_LINKS_SQL,
+            {
+                "installment_ids": installment_ids,
+                "claim": claim,
+                "lease": PAYMENT_LINK_CLAIM_SECONDS,
+                "min_remaining": PAYMENT_LINK_MIN_REMAINING.total_seconds(),
+            },
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+
+async def _cancel_links(link_ids: list[str]):
+    """
+    Cancel superseded links at Razorpay so customers can no longer pay
+    them. They stay in installment_payment_links either way, so a payment
+    made before the cancellation still reconciles.
+    """
+    semaphore = asyncio.Semaphore(PAYMENT_LINK_CONCURRENCY)
+
+    async def cancel(link_id: str) -> bool:
+        async with semaphore:
+            await _link_bucket.acquire()
+            return await asyncio.to_thread(cancel_payment_link, link_id)
+
+    outcomes = await asyncio.gather(*(cancel(link_id) for link_id in link_ids))
+    cancelled = [link_id for link_id, ok in zip(link_ids, outcomes) if ok]
+    if cancelled:
+        async with rx.asession() as session, session.begin():
+            await session.execute(MARK_CANCELLED_SQL, {"link_ids": cancelled})
+
+
+async def _create_links(installments: list[dict], claim: str) -> list[dict]:
+    """
+    Create links for installments claimed with `claim`, concurrently under
+    the Razorpay rate limit, and store them in a single update unless the
+    claim has expired and been taken over meanwhile. No transaction is open
+    while Razorpay is called. Every created link is recorded in
+    installment_payment_links; the links they replace, and any that could
+    not be stored, are then cancelled. Returns the stored links.
+    """
+    semaphore = asyncio.Semaphore(PAYMENT_LINK_CONCURRENCY)
+
+    async def create(installment: dict) -> dict | None:
+        async with semaphore:
+            return await _create_link(installment)
+
+    links = [
+        link
+        for link in await asyncio.gather(*(create(i) for i in installments))
+        if link
+    ]
+    stored: set[int] = set()
+    async with rx.asession() as session, session.begin():
+        if links:
+            result = await session.execute(
+                STORE_LINKS_SQL, {**_store_params(links), "claim": claim}
+            )
+            stored = set(result.scalars().all())
+        await session.execute(
+            RELEASE_CLAIMS_SQL,
+            {
+                "installment_ids": [i["installment_id"] for i in installments],
+                "claim": claim,
+            },
+        )
+    if len(stored) < len(links):
+        logging.warning(
+            f"{len(links) - len(stored)} payment link(s) were created after their claim expired and will be cancelled."
+        )
+    now = datetime.datetime.now()
+    superseded = [
+        i["previous_link_id"]
+        for i in installments
+        if i["installment_id"] in stored
+        and i["previous_link_id"]
+        and (i["payment_link_expires_at"] is None or i["payment_link_expires_at"] > now)
+    ]
+    superseded += [link["id"] for link in links if link["installment_id"] not in stored]
+    if superseded:
+        await _cancel_links(superseded)
+    return [link for link in links if link["installment_id"] in stored]
+
+
+async def get_installment_payment_link(installment_id: int) -> str | None:
+    """
+    Return a payment link for an installment, reusing the stored one.
+    A new Razorpay link is only created when there is none yet, the stored
+    one expires within PAYMENT_LINK_MIN_REMAINING, or the installment amount
+    has changed since it was created; the link it replaces is cancelled.
+    The caller that creates it holds a claim on the installment for up to
+    PAYMENT_LINK_CLAIM_SECONDS; concurrent callers wait for its link instead
+    of creating their own.
+    """
+    claim = uuid.uuid4().hex
+    deadline = time.monotonic() + PAYMENT_LINK_CLAIM_SECONDS
+    while True:
+        async with rx.asession() as session:
+            result = await session.execute(
+                INSTALLMENT_LINK_SQL,
+                {
+                    "installment_id": installment_id,
+                    "min_remaining": PAYMENT_LINK_MIN_REMAINING.total_seconds(),
+                },
+            )
+            installment = result.mappings().first()
+        if not installment:
+            return None
+        if installment["link_is_valid"]:
+            return installment["payment_link_url"]
+        claimed = await _claim_links([installment_id], claim)
+        if claimed:
+            links = await _create_links(claimed, claim)
+            return links[0]["short_url"] if links else None
+        if time.monotonic() >= deadline:
+            return None
+        await asyncio.sleep(PAYMENT_LINK_CLAIM_POLL)
+
+
+async def pregenerate_payment_links(days: int) -> tuple[int, int]:
+    """
+    Create links for every pending installment due within `days` days that
+    lacks a usable one and is not being linked by another caller. Links are
+    created concurrently under the Razorpay rate limit and stored in a
+    single update. Returns (created, failed).
+    """
+    async with rx.asession() as session:
+        result = await session.execute(
+            MISSING_LINKS_SQL,
+            {
+                "days": days,
+                "min_remaining": PAYMENT_LINK_MIN_REMAINING.total_seconds(),
+            },
+        )
+        installment_ids = list(result.scalars().all())
+    if not installment_ids:
+        return (0, 0)
+    claim = uuid.uuid4().hex
+    installments = await _claim_links(installment_ids, claim)
+    if not installments:
+        return (0, 0)
+    links = await _create_links(installments, claim)
+    return (len(links), len(installments) - len(links))
+
+
+async def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    created, failed = await pregenerate_payment_links(days)
+    if failed:
+        logging.warning(f"Could not create {failed} payment link(s).")
+    print(
+        f"Created {created} payment link(s) for installments due in the next {days} days."
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
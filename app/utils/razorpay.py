@@ -1,3 +1,4 @@
+import datetime
 import os
 import reflex as rx
 import razorpay
@@ -7,24 +8,28 @@ from typing import Optional
 
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
+RAZORPAY_API_BASE = os.getenv("RAZORPAY_API_BASE", "https://api.razorpay.com")
 if not all([RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET]):
     logging.warning(
         "Razorpay credentials not fully configured. Payment link generation will be disabled."
     )
     client = None
 else:
-    client = razorpay.Client(auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET))
+    client = razorpay.Client(
+        auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET), base_url=RAZORPAY_API_BASE
+    )
 
 
-def create_payment_link(
+def create_payment_link_details(
     amount: float,
     description: str,
     customer_name: str,
     customer_contact: str,
     customer_email: Optional[str],
     order_id: int,
-) -> Optional[str]:
-    """Create a Razorpay payment link."""
+    expire_by: Optional[datetime.datetime] = None,
+) -> Optional[dict]:
+    """Create a Razorpay payment link and return its id, short URL and expiry."""
     if not client:
         logging.error("Razorpay client not initialized. Cannot create payment link.")
         return None
@@ -45,8 +50,44 @@ def create_payment_link(
             "callback_url": f"{os.getenv('BASE_URL', 'http://localhost:3000')}/payment-success",
             "callback_method": "get",
         }
+        if expire_by:
+            payment_link_data["expire_by"] = int(expire_by.timestamp())
         payment_link = client.payment_link.create(payment_link_data)
-        return payment_link.get("short_url")
+        return {
+            "id": payment_link.get("id"),
+            "short_url": payment_link.get("short_url"),
+            "expire_by": datetime.datetime.fromtimestamp(payment_link["expire_by"])
+            if payment_link.get("expire_by")
+            else None,
+        }
     except Exception as e:
         logging.exception(f"Failed to create Razorpay payment link: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def cancel_payment_link(link_id: str) -> bool:
+    """Cancel an unpaid Razorpay payment link so it can no longer be paid."""
+    if not client:
+        logging.error("Razorpay client not initialized. Cannot cancel payment link.")
+        return False
+    try:
+        client.payment_link.cancel(link_id)
+        return True
+    except Exception as e:
+        logging.exception(f"Failed to cancel Razorpay payment link {link_id}: {e}")
+        return False
+
+
+def create_payment_link(
+    amount: float,
+    description: str,
+    customer_name: str,
+    customer_contact: str,
+    customer_email: Optional[str],
+    order_id: int,
+) -> Optional[str]:
+    """Create a Razorpay payment link."""
+    payment_link = create_payment_link_details(
+        amount, description, customer_name, customer_contact, customer_email, order_id
+    )
+    return payment_link["short_url"] if payment_link else None
\ No newline at end of file
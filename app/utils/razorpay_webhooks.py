@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import sys
+import time
+import reflex as rx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET")
+WEBHOOK_EVENTS = {"payment_link.paid"}
+WEBHOOK_BATCH_SIZE = 200
+WEBHOOK_POLL_INTERVAL = 5.0
+_wakeup = asyncio.Event()
+
+INGEST_EVENTS_SQL = text("""INSERT INTO razorpay_webhook_events (event_id, event_type, payload)
+SELECT * FROM unnest(
+    CAST(:event_ids AS text[]), CAST(:event_types AS text[]), CAST(:payloads AS jsonb[])
+)
+ON CONFLICT (event_id) DO NOTHING
+RETURNING event_id""")
+
+RECONCILE_EVENTS_SQL = text("""WITH claimed AS (
+    SELECT event_id, payload,
+        payload #>> '{payload,payment_link,entity,id}' AS link_id
+    FROM razorpay_webhook_events
+    WHERE status = 'pending'
+    ORDER BY received_at, event_id
+    LIMIT :limit
+    FOR UPDATE SKIP LOCKED
+),
+paid AS (
+    SELECT DISTINCT ON (link_id) event_id, link_id,
+        payload #>> '{payload,payment,entity,id}' AS payment_id,
+        CAST(payload #>> '{payload,payment,entity,amount}' AS numeric) / 100 AS amount
+    FROM claimed
+    WHERE link_id IS NOT NULL
+    ORDER BY link_id, event_id
+),
+links AS (
+    SELECT c.link_id, COALESCE(h.installment_id, pi.installment_id) AS installment_id
+    FROM (SELECT DISTINCT link_id FROM claimed WHERE link_id IS NOT NULL) c
+    LEFT JOIN installment_payment_links h ON h.link_id = c.link_id
+    LEFT JOIN payment_installments pi ON pi.payment_link_id = c.link_id
+),
+settled AS (
+    UPDATE payment_installments pi
+    SET status = 'paid', paid_date = CURRENT_DATE, payment_method = 'razorpay'
+    FROM paid p
+    JOIN links l ON l.link_id = p.link_id
+    WHERE pi.installment_id = l.installment_id AND pi.status <> 'paid'
+    RETURNING pi.installment_id, pi.order_id, p.event_id, p.payment_id,
+        COALESCE(p.amount, pi.amount) AS amount
+),
+recorded AS (
+    INSERT INTO transactions (order_id, transaction_date, transaction_type, amount, payment_method, description)
+    SELECT order_id, CURRENT_DATE, 'order_payment', amount, 'razorpay',
+        'Razorpay payment ' || COALESCE(payment_id, '') || ' for installment #' || installment_id
+    FROM settled
+    RETURNING transaction_id
+),
+balances AS (
+    UPDATE orders o
+    SET balance_payment = GREATEST(COALESCE(o.balance_payment, 0) - s.amount, 0)
+    FROM (SELECT order_id, SUM(amount) AS amount FROM settled GROUP BY order_id) s
+    WHERE o.order_id = s.order_id
+    RETURNING o.order_id
+),
+marked AS (
+    UPDATE razorpay_webhook_events e
+    SET status = CASE
+            WHEN e.event_id IN (SELECT event_id FROM settled) THEN 'applied'
+            WHEN EXISTS (
+                SELECT 1 FROM links l
+                WHERE l.link_id = c.link_id AND l.installment_id IS NOT NULL
+            ) THEN 'duplicate'
+            ELSE 'unmatched'
+        END,
+        processed_at = CURRENT_TIMESTAMP
+    FROM claimed c
+    WHERE e.event_id = c.event_id
+    RETURNING e.status
+)
+SELECT status, COUNT(*) AS events FROM marked GROUP BY status""")
+
+
+def verify_signature(body: bytes, signature: str) -> bool:
+    """Check the X-Razorpay-Signature header against the raw request body."""
+    if not RAZORPAY_WEBHOOK_SECRET or not signature:
+        return False
+    expected = hmac.new(
+        RAZORPAY_WEBHOOK_SECRET.encode(), body, hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+async def ingest_events(session: AsyncSession, events: list[tuple[str, dict]]) -> int:
+    """
+    Store webhook events for reconciliation, keyed by Razorpay event id.
+    Events of other types and ids that were already stored are ignored, so
+    redelivered webhooks are harmless. Returns the number of new events.
+    """
+    events = [
+        (event_id, event)
+        for event_id, event in events
+        if event.get("event") in WEBHOOK_EVENTS
+    ]
+    if not events:
+        return 0
+    result = await session.execute(
+        INGEST_EVENTS_SQL,
+        {
+            "event_ids": [event_id for event_id, _ in events],
+            "event_types": [event["event"] for _, event in events],
+            "payloads": [json.dumps(event) for _, event in events],
+        },
+    )
+    return len(result.scalars().all())
+
+
+def notify_webhook_consumer():
+    """Wake the consumer once new events have been committed."""
+    _wakeup.set()
+
+
+async def reconcile_webhook_batch() -> dict[str, int]:
+    """
+    Apply up to WEBHOOK_BATCH_SIZE pending events in one statement.
+    Each paid link marks its installment paid, records a transaction and
+    reduces the order balance; installments that are already paid are left
+    alone, so a second event for the same payment is reported as duplicate.
+    Links are matched through installment_payment_links, so a payment on a
+    link that has since been replaced still settles its installment, and
+    through the installment's current link for links stored before that
+    history was kept.
+    Returns the number of events per outcome.
+    """
+    async with rx.asession() as session, session.begin():
+        result = await session.execute(
+            RECONCILE_EVENTS_SQL, {"limit": WEBHOOK_BATCH_SIZE}
+        )
+        return {row["status"]: row["events"] for row in result.mappings().all()}
+
+
+async def run_webhook_consumer():
+    """Reconcile stored webhook events for the lifetime of the app."""
+    while True:
+        _wakeup.clear()
+        try:
+            outcome = await reconcile_webhook_batch()
+        except Exception as e:
+            logging.exception(f"Razorpay webhook reconciliation failed: {e}")
+            outcome = {}
+        if outcome.get("unmatched"):
+            logging.warning(
+                f"{outcome['unmatched']} Razorpay payment(s) did not match any installment."
+            )
+        if sum(outcome.values()) >= WEBHOOK_BATCH_SIZE:
+            continue
+        try:
+            await asyncio.wait_for(_wakeup.wait(), WEBHOOK_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def replay(path: str):
+    """
+    Re-ingest a JSONL file of {"event_id": ..., "body": {...}} lines and
+    reconcile them, reporting throughput for both stages.
+    """
+    with open(path) as f:
+        events = [
+            (line["event_id"], line["body"])
+            for line in map(json.loads, filter(str.strip, f))
+        ]
+    started = time.perf_counter()
+    ingested = 0
+    for start in range(0, len(events), 1000):
+        async with rx.asession() as session, session.begin():
+            ingested += await ingest_events(session, events[start : start + 1000])
+    ingest_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    totals: dict[str, int] = {}
+    while True:
+        outcome = await reconcile_webhook_batch()
+        if not outcome:
+            break
+        for status, count in outcome.items():
+            totals[status] = totals.get(status, 0) + count
+    reconcile_seconds = time.perf_counter() - started
+    print(
+        f"Ingested {ingested} new of {len(events)} events in {ingest_seconds:.2f}s ({len(events) / max(ingest_seconds, 1e-09):.0f}/s)"
+    )
+    print(
+        f"Reconciled {sum(totals.values())} events in {reconcile_seconds:.2f}s: {totals}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(replay(sys.argv[1]))
\ No newline at end of file
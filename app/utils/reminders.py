@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+from collections.abc import Awaitable, Callable
+import reflex as rx
+from sqlalchemy import text
+from app.utils.outbox import queue_for_retry
+from app.utils.payment_links import get_installment_payment_link
+from app.utils.rate_limit import TokenBucket
+from app.utils.message_templates import render_batch
+from app.utils.sms import _send_sms
+from app.utils.twilio_transport import TwilioSendError
+
+REMINDER_SEND_RATE = float(os.getenv("REMINDER_SEND_RATE", "1"))
+REMINDER_SEND_BURST = int(os.getenv("REMINDER_SEND_BURST", "5"))
+REMINDER_CONCURRENCY = 10
+REMINDER_BATCH_SIZE = 50
+REMINDER_STALE_AFTER_SECONDS = 600
+_send_bucket = TokenBucket(REMINDER_SEND_RATE, REMINDER_SEND_BURST)
+
+RECOVER_REMINDERS_SQL = text("""WITH skipped AS (
+    UPDATE payment_reminders pr
+    SET status = 'skipped'
+    FROM payment_installments pi
+    WHERE pi.installment_id = pr.installment_id
+        AND pr.status = 'scheduled'
+        AND pi.status <> 'pending'
+    RETURNING pr.reminder_id
+)
+UPDATE payment_reminders
+SET status = CASE WHEN status = 'claimed' THEN 'scheduled' ELSE 'failed' END,
+    error = CASE
+        WHEN status = 'sending' THEN 'Interrupted before delivery was confirmed'
+        ELSE error
+    END
+WHERE status IN ('claimed', 'sending')
+    AND attempted_at < CURRENT_TIMESTAMP - make_interval(secs => :stale_after)""")
+
+SCHEDULE_OVERDUE_REMINDERS_SQL = text("""INSERT INTO payment_reminders (installment_id, reminder_date, status)
+SELECT pi.installment_id, CURRENT_DATE, 'scheduled'
+FROM payment_installments pi
+WHERE pi.status = 'pending' AND pi.due_date < CURRENT_DATE
+ORDER BY pi.due_date, pi.installment_id
+ON CONFLICT (installment_id, reminder_date) DO NOTHING""")
+
+CLAIM_REMINDERS_SQL = text("""WITH due AS (
+    SELECT reminder_id FROM payment_reminders
+    WHERE status = 'scheduled' AND reminder_date <= CURRENT_DATE
+    ORDER BY reminder_id
+    LIMIT :limit
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE payment_reminders pr
+SET status = 'claimed', attempted_at = CURRENT_TIMESTAMP
+FROM due, payment_installments pi, orders o, customers c
+WHERE pr.reminder_id = due.reminder_id
+    AND pi.installment_id = pr.installment_id
+    AND o.order_id = pi.order_id
+    AND c.customer_id = o.customer_id
+RETURNING pr.reminder_id, pr.payment_link, pi.installment_id, pi.order_id, pi.amount, pi.due_date,
+    c.name AS customer_name, c.phone_number AS customer_phone, c.preferred_language AS language""")
+
+MARK_REMINDER_SENDING_SQL = text("""UPDATE payment_reminders
+SET status = 'sending',
+    payment_link = COALESCE(CAST(:payment_link AS text), payment_link),
+    attempted_at = CURRENT_TIMESTAMP
+WHERE reminder_id = :reminder_id""")
+
+FINISH_REMINDER_SQL = text("""WITH done AS (
+    UPDATE payment_reminders
+    SET status = CAST(:status AS varchar),
+        sent_date = CASE WHEN CAST(:status AS varchar) = 'sent' THEN CURRENT_TIMESTAMP END,
+        error = CAST(:error AS text)
+    WHERE reminder_id = :reminder_id
+    RETURNING installment_id, status
+)
+UPDATE payment_installments pi
+SET last_reminder_sent = CURRENT_TIMESTAMP
+FROM done
+WHERE pi.installment_id = done.installment_id AND done.status = 'sent'""")
+
+COUNT_DUE_REMINDERS_SQL = text(
+    "SELECT COUNT(*) FROM payment_reminders WHERE status = 'scheduled' AND reminder_date <= CURRENT_DATE"
+)
+
+
+async def _resolve_link(reminder: dict, semaphore: asyncio.Semaphore):
+    if not reminder["payment_link"]:
+        async with semaphore:
+            reminder["payment_link"] = await get_installment_payment_link(
+                reminder["installment_id"]
+            )
+
+
+async def _send_reminder(
+    reminder: dict, body: str, semaphore: asyncio.Semaphore
+) -> str:
+    async with semaphore:
+        await _send_bucket.acquire()
+        async with rx.asession() as session, session.begin():
+            await session.execute(
+                MARK_REMINDER_SENDING_SQL,
+                {
+                    "reminder_id": reminder["reminder_id"],
+                    "payment_link": reminder["payment_link"],
+                },
+            )
+        try:
+            sent = await _send_sms(reminder["customer_phone"], body)
+            status = "sent" if sent else "failed"
+            error = None if sent else "SMS provider rejected the reminder"
+        except TwilioSendError as e:
+            await queue_for_retry(
+                reminder["order_id"],
+                "sms",
+                "custom",
+                {"to": reminder["customer_phone"], "body": body},
+                e,
+            )
+            status, error = "queued", str(e)
+        except Exception as e:
+            logging.exception(f"Payment reminder {reminder['reminder_id']} failed: {e}")
+            status, error = "failed", str(e)
+        async with rx.asession() as session, session.begin():
+            await session.execute(
+                FINISH_REMINDER_SQL,
+                {
+                    "reminder_id": reminder["reminder_id"],
+                    "status": status,
+                    "error": error,
+                },
+            )
+        return status
+
+
+async def run_reminder_campaign(
+    on_progress: Callable[[dict], Awaitable[None]] | None = None,
+) -> dict:
+    """
+    Remind every overdue pending installment once per day.
+    Reminders are recorded in payment_reminders and move through
+    scheduled -> claimed -> sending -> sent/queued/failed; each claimed batch
+    is rendered in one pass in the customers' languages and sent concurrently,
+    reusing each installment's payment link, with SMS sends paced by a
+    token bucket sized to the Twilio quota. A reminder that hits a transient
+    Twilio error is queued: the notification outbox retries it with backoff
+    instead of the same-day reminder being lost as failed. A rerun picks up
+    where an interrupted one stopped: rows claimed more than
+    REMINDER_STALE_AFTER_SECONDS ago go back to scheduled, but a row left in
+    sending is marked failed rather than sent again, since its SMS may
+    already be out. Rows claimed more recently belong to a run that may still
+    be going; they are left to it and not counted in this run's total.
+    """
+    async with rx.asession() as session, session.begin():
+        await session.execute(
+            RECOVER_REMINDERS_SQL, {"stale_after": REMINDER_STALE_AFTER_SECONDS}
+        )
+        await session.execute(SCHEDULE_OVERDUE_REMINDERS_SQL)
+        total = (await session.execute(COUNT_DUE_REMINDERS_SQL)).scalar_one()
+    progress = {"total": total, "sent": 0, "queued": 0, "failed": 0}
+    if on_progress:
+        await on_progress(dict(progress))
+    semaphore = asyncio.Semaphore(REMINDER_CONCURRENCY)
+
+    async def track(reminder: dict, body: str):
+        progress[await _send_reminder(reminder, body, semaphore)] += 1
+        if on_progress:
+            await on_progress(dict(progress))
+
+    while True:
+        async with rx.asession() as session, session.begin():
+            result = await session.execute(
+                CLAIM_REMINDERS_SQL, {"limit": REMINDER_BATCH_SIZE}
+            )
+            reminders = [dict(row) for row in result.mappings().all()]
+        if not reminders:
+            return progress
+        await asyncio.gather(*(_resolve_link(r, semaphore) for r in reminders))
+        bodies = render_batch(
+            "sms",
+            "payment_reminder",
+            [
+                {**r, "due_date": str(r["due_date"]), "amount": float(r["amount"])}
+                for r in reminders
+            ],
+        )
+        await asyncio.gather(
+            *(track(reminder, body) for reminder, body in zip(reminders, bodies))
+        )
\ No newline at end of file
@@ -0,0 +1,93 @@
+import datetime
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+MONTHLY_ORDER_COUNTS_SQL = text("""SELECT TO_CHAR(day, 'YYYY-MM') as month, SUM(order_count) as order_count
+FROM daily_order_rollup
+WHERE day >= :since
+GROUP BY month
+HAVING SUM(order_count) > 0
+ORDER BY month""")
+
+MONTHLY_ORDER_TRENDS_SQL = text("""SELECT TO_CHAR(day, 'YYYY-MM') as month, SUM(order_count) as order_count,
+    SUM(revenue) as revenue, SUM(revenue) / NULLIF(SUM(order_count), 0) as avg_order_value
+FROM daily_order_rollup
+WHERE day >= :since
+GROUP BY month
+HAVING SUM(order_count) > 0
+ORDER BY month""")
+
+QUARTERLY_REVENUE_SQL = text("""SELECT EXTRACT(QUARTER FROM day) as quarter, EXTRACT(YEAR FROM day) as year,
+    SUM(order_count) as orders, SUM(revenue) as revenue
+FROM daily_order_rollup
+WHERE day >= :since
+GROUP BY year, quarter
+HAVING SUM(order_count) > 0
+ORDER BY year, quarter""")
+
+MATERIAL_USAGE_SQL = text("""SELECT m.material_name, SUM(om.quantity_used) as total_used
+FROM order_materials om
+JOIN orders o ON om.order_id = o.order_id
+JOIN materials m ON om.material_id = m.material_id
+WHERE o.order_date >= :start_date AND o.order_date < :end_date
+GROUP BY m.material_name""")
+
+GST_SUMMARY_SQL = text("""SELECT COUNT(order_id) as total_invoices, SUM(total_amount) as gross_total,
+    SUM(total_amount / 1.18) as taxable_value,
+    SUM(total_amount - (total_amount / 1.18)) as total_gst,
+    SUM((total_amount - (total_amount / 1.18)) / 2) as cgst,
+    SUM((total_amount - (total_amount / 1.18)) / 2) as sgst
+FROM orders
+WHERE status = 'delivered' AND order_date >= :start_date AND order_date < :end_date""")
+
+
+def months_ago(months: int, today: datetime.date | None = None) -> datetime.date:
+    """The first day of the month `months` months before today's month."""
+    today = today or datetime.date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(year: int, month: int) -> tuple[datetime.date, datetime.date]:
+    """Half-open [first day, first day of the next month) bounds of a month."""
+    start = datetime.date(year, month, 1)
+    return (start, months_ago(-1, start))
+
+
+async def load_seasonal_patterns(session: AsyncSession) -> list[dict]:
+    """
+    Order counts per month over the last two years, each flagged as a peak
+    when it is more than 20% above the monthly average.
+    """
+    result = await session.execute(MONTHLY_ORDER_COUNTS_SQL, {"since": months_ago(24)})
+    monthly_data = {row["month"]: row["order_count"] for row in result.mappings().all()}
+    if not monthly_data:
+        return []
+    avg_orders = sum(monthly_data.values()) / len(monthly_data)
+    return [
+        {
+            "month": month,
+            "order_count": count,
+            "is_peak": count > avg_orders * 1.2,
+            "avg_orders": avg_orders,
+        }
+        for month, count in monthly_data.items()
+    ]
+
+
+def bulk_purchase_suggestions(patterns: list[dict]) -> list[dict]:
+    """Suggest bulk buying in months at least 20% below average demand."""
+    if not patterns:
+        return []
+    avg_orders = sum(p["order_count"] for p in patterns) / len(patterns)
+    low_demand_months = [
+        p["month"] for p in patterns if p["order_count"] < avg_orders * 0.8
+    ]
+    if not low_demand_months:
+        return []
+    return [
+        {
+            "recommendation": f"Consider buying essential materials in bulk during off-peak months: {', '.join(low_demand_months)}.",
+            "potential_savings": "5-15% on bulk orders.",
+        }
+    ]
\ No newline at end of file
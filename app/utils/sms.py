@@ -1,99 +1,124 @@
 import os
 import reflex as rx
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
 import logging
+from app.utils.message_templates import render, status_template_key
+from app.utils.twilio_transport import (
+    ACCOUNT_SID,
+    TwilioSendError,
+    create_message,
+)
 
-ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
-AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
-client = Client(ACCOUNT_SID, AUTH_TOKEN)
 
 
-def _send_sms(to: str, body: str) -> bool:
-    """Sends an SMS message using Twilio."""
-    if not client or not TWILIO_PHONE_NUMBER or (not ACCOUNT_SID):
+async def _send_sms(to: str, body: str) -> bool:
+    """Sends an SMS message using Twilio; transient Twilio errors are raised for the caller to retry."""
+    if not TWILIO_PHONE_NUMBER or (not ACCOUNT_SID):
         logging.warning("Twilio client is not initialized. Cannot send SMS.")
         return False
     if not to.startswith("+"):
         to = f"+91{to}"
     try:
-        client.messages.create(body=body, from_=TWILIO_PHONE_NUMBER, to=to)
+        sent = await create_message(to=to, from_=TWILIO_PHONE_NUMBER, body=body)
+    except TwilioSendError as e:
+        if e.transient:
+            raise
+        logging.error(str(e))
+        sent = False
+    if sent:
         logging.info(f"SMS sent to {to}")
         return True
-    except TwilioRestException as e:
-        logging.exception(f"Failed to send SMS to {to}: {e}")
-        return False
+    logging.error(f"Failed to send SMS to {to}")
+    return False
 
 
-def send_order_confirmation(
+async def send_order_confirmation(
     customer_phone: str,
     customer_name: str,
     order_id: int,
     delivery_date: str,
     total_amount: float,
+    language: str | None = None,
 ) -> bool:
     """Sends an order confirmation SMS."""
-    message = f"Hi {customer_name}, your order #{order_id} with TailorFlow has been confirmed!\nTotal: ₹{total_amount:.2f}\nEst. Delivery: {delivery_date}\nWe'll notify you once it's ready. Thank you!"
-    return _send_sms(customer_phone, message)
+    message = render(
+        "sms",
+        "order_confirmation",
+        language,
+        customer_name=customer_name,
+        order_id=order_id,
+        delivery_date=delivery_date,
+        total_amount=total_amount,
+    )
+    return await _send_sms(customer_phone, message)
 
 
-def send_order_ready_notification(
-    customer_phone: str, customer_name: str, order_id: int
+async def send_order_ready_notification(
+    customer_phone: str, customer_name: str, order_id: int, language: str | None = None
 ) -> bool:
     """Sends an SMS when an order is ready for pickup."""
-    message = f"Hi {customer_name}, your order #{order_id} is ready for pickup!\nYou can collect it from our shop anytime during business hours.\nThank you for choosing TailorFlow!"
-    return _send_sms(customer_phone, message)
+    message = render(
+        "sms", "order_ready", language, customer_name=customer_name, order_id=order_id
+    )
+    return await _send_sms(customer_phone, message)
 
 
-def send_delivery_reminder(
-    customer_phone: str, customer_name: str, order_id: int
+async def send_delivery_reminder(
+    customer_phone: str, customer_name: str, order_id: int, language: str | None = None
 ) -> bool:
     """Sends a delivery reminder SMS."""
-    message = f"Hi {customer_name}, this is a friendly reminder that your order #{order_id} is ready for pickup.\nPlease collect it at your earliest convenience.\nThank you, TailorFlow."
-    return _send_sms(customer_phone, message)
+    message = render(
+        "sms",
+        "delivery_reminder",
+        language,
+        customer_name=customer_name,
+        order_id=order_id,
+    )
+    return await _send_sms(customer_phone, message)
 
 
-def send_payment_reminder(
+async def send_payment_reminder(
     customer_phone: str,
     customer_name: str,
     order_id: int,
     due_date: str,
     amount: float,
     payment_link: str | None = None,
+    language: str | None = None,
 ) -> bool:
     """Sends a payment reminder SMS."""
-    message = f"Hi {customer_name}, a friendly reminder from TailorFlow. Your payment of ₹{amount:.2f} for order #{order_id} is due on {due_date}."
-    if payment_link:
-        message += f" You can pay here: {payment_link}"
-    else:
-        message += " Please make the payment on time."
-    message += " Thank you!"
-    return _send_sms(customer_phone, message)
+    message = render(
+        "sms",
+        "payment_reminder",
+        language,
+        customer_name=customer_name,
+        order_id=order_id,
+        due_date=due_date,
+        amount=amount,
+        payment_link=payment_link,
+    )
+    return await _send_sms(customer_phone, message)
 
 
-def send_status_update_notification(
+async def send_status_update_notification(
     customer_phone: str,
     customer_name: str,
     order_id: int,
     new_status: str,
     payment_link: str | None = None,
+    language: str | None = None,
 ) -> bool:
     """Sends an SMS with the new order status."""
     logging.info(
         f"Sending status update SMS for order #{order_id} to {customer_phone} with link: {payment_link}"
     )
-    base_message = f"Hi {customer_name}, your order #{order_id} has been {new_status}."
-    if new_status.lower() == "delivered":
-        if payment_link:
-            message = f"{base_message} You can complete your payment here: {payment_link}. Thank you for your business!"
-        else:
-            message = f"{base_message} Thank you for your business!"
-    else:
-        status_messages = {
-            "cutting": f"Hi {customer_name}, your order #{order_id} has entered the cutting stage.",
-            "stitching": f"Hi {customer_name}, good news! Your order #{order_id} is now being stitched.",
-            "finishing": f"Hi {customer_name}, your order #{order_id} is in the final finishing stage. It will be ready soon!",
-        }
-        message = status_messages.get(new_status.lower(), base_message)
-    return _send_sms(customer_phone, message)
\ No newline at end of file
+    message = render(
+        "sms",
+        status_template_key("sms", new_status),
+        language,
+        customer_name=customer_name,
+        order_id=order_id,
+        new_status=new_status,
+        payment_link=payment_link,
+    )
+    return await _send_sms(customer_phone, message)
\ No newline at end of file
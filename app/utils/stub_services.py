@@ -0,0 +1,252 @@
+import asyncio
+import base64
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+STUB_HOST = os.getenv("STUB_HOST", "127.0.0.1")
+STUB_PORT = int(os.getenv("STUB_PORT", "8766"))
+STUB_BASE_URL = os.getenv("STUB_BASE_URL", f"http://{STUB_HOST}:{STUB_PORT}")
+_requests: Counter = Counter()
+_failures: Counter = Counter()
+_buckets: dict[str, dict] = {}
+_objects: dict[str, set[str]] = {}
+_callbacks: set[asyncio.Task] = set()
+
+
+def _setting(service: str, name: str, default: str) -> float:
+    value = os.getenv(f"STUB_{service.upper()}_{name}") or os.getenv(
+        f"STUB_{name}", default
+    )
+    return float(value)
+
+
+async def _simulate(service: str) -> JSONResponse | None:
+    """
+    Sleep for the configured latency and maybe fail the request.
+    Latency is STUB_LATENCY_MS +/- STUB_JITTER_MS, and STUB_ERROR_RATE of
+    requests fail: half with 429 and a Retry-After, half with 503. Each
+    setting can be overridden per service, e.g. STUB_TWILIO_ERROR_RATE.
+    """
+    _requests[service] += 1
+    latency = _setting(service, "LATENCY_MS", "50")
+    jitter = _setting(service, "JITTER_MS", "20")
+    await asyncio.sleep(
+        max(0.0, random.uniform(latency - jitter, latency + jitter)) / 1000
+    )
+    if random.random() >= _setting(service, "ERROR_RATE", "0"):
+        return None
+    _failures[service] += 1
+    if random.random() < 0.5:
+        return JSONResponse(
+            {"code": 20429, "message": "Too Many Requests"},
+            status_code=429,
+            headers={"Retry-After": "1"},
+        )
+    return JSONResponse({"message": "Service Unavailable"}, status_code=503)
+
+
+async def _send_status_callbacks(url: str, auth_token: str, message: dict):
+    """
+    Report the message as sent and then delivered, or undelivered for
+    STUB_TWILIO_UNDELIVERED_RATE of messages, the way Twilio does, signed
+    with the auth token the message was sent with.
+    """
+    from app.utils.delivery_receipts import twilio_signature
+
+    undelivered = random.random() < _setting("twilio", "UNDELIVERED_RATE", "0")
+    statuses = ["sent", "undelivered" if undelivered else "delivered"]
+    async with httpx.AsyncClient() as client:
+        for status in statuses:
+            await asyncio.sleep(_setting("twilio", "DELIVERY_MS", "200") / 1000)
+            params = {
+                "MessageSid": message["sid"],
+                "AccountSid": message["account_sid"],
+                "From": message["from"] or "",
+                "To": message["to"],
+                "MessageStatus": status,
+            }
+            if status == "undelivered":
+                params["ErrorCode"] = "30003"
+            try:
+                await client.post(
+                    url,
+                    data=params,
+                    headers={
+                        "X-Twilio-Signature": twilio_signature(url, params, auth_token)
+                    },
+                )
+            except httpx.HTTPError:
+                return
+
+
+async def twilio_create_message(request: Request):
+    form = await request.form()
+    if failure := await _simulate("twilio"):
+        return failure
+    if not form.get("To") or not form.get("Body"):
+        return JSONResponse(
+            {"code": 21604, "message": "A 'To' and 'Body' are required"},
+            status_code=400,
+        )
+    message = {
+        "sid": f"SM{uuid.uuid4().hex}",
+        "account_sid": request.path_params["account_sid"],
+        "to": form["To"],
+        "from": form.get("From"),
+        "body": form["Body"],
+        "status": "queued",
+        "num_media": "1" if form.get("MediaUrl") else "0",
+    }
+    if callback_url := form.get("StatusCallback"):
+        credentials = request.headers.get("Authorization", "").removeprefix("Basic ")
+        auth_token = base64.b64decode(credentials).decode().partition(":")[2]
+        task = asyncio.create_task(
+            _send_status_callbacks(callback_url, auth_token, message)
+        )
+        _callbacks.add(task)
+        task.add_done_callback(_callbacks.discard)
+    return JSONResponse(message, status_code=201)
+
+
+async def razorpay_create_payment_link(request: Request):
+    data = await request.json()
+    if failure := await _simulate("razorpay"):
+        return failure
+    link_id = f"plink_{uuid.uuid4().hex[:14]}"
+    now = int(time.time())
+    return JSONResponse(
+        {
+            "id": link_id,
+            "short_url": f"{STUB_BASE_URL}/rzp/{link_id}",
+            "amount": data.get("amount"),
+            "currency": data.get("currency", "INR"),
+            "description": data.get("description"),
+            "notes": data.get("notes", {}),
+            "status": "created",
+            "created_at": now,
+            "expire_by": data.get("expire_by", 0),
+        }
+    )
+
+
+async def razorpay_cancel_payment_link(request: Request):
+    if failure := await _simulate("razorpay"):
+        return failure
+    return JSONResponse({"id": request.path_params["link_id"], "status": "cancelled"})
+
+
+async def supabase_list_buckets(request: Request):
+    if failure := await _simulate("supabase"):
+        return failure
+    return JSONResponse(list(_buckets.values()))
+
+
+async def supabase_create_bucket(request: Request):
+    data = await request.json()
+    if failure := await _simulate("supabase"):
+        return failure
+    name = data.get("name") or data.get("id")
+    _buckets.setdefault(
+        name,
+        {
+            "id": name,
+            "name": name,
+            "owner": "",
+            "public": bool(data.get("public")),
+            "created_at": "2024-01-01T00:00:00Z",
+            "updated_at": "2024-01-01T00:00:00Z",
+            "file_size_limit": None,
+            "allowed_mime_types": None,
+        },
+    )
+    return JSONResponse({"name": name})
+
+
+async def supabase_upload_object(request: Request):
+    await request.body()
+    if failure := await _simulate("supabase"):
+        return failure
+    bucket, path = request.path_params["bucket"], request.path_params["path"]
+    if bucket not in _buckets:
+        return JSONResponse(
+            {"statusCode": "404", "error": "Bucket not found"}, status_code=404
+        )
+    _objects.setdefault(bucket, set()).add(path)
+    return JSONResponse({"Key": f"{bucket}/{path}", "Id": str(uuid.uuid4())})
+
+
+async def supabase_remove_objects(request: Request):
+    data = await request.json()
+    if failure := await _simulate("supabase"):
+        return failure
+    bucket = request.path_params["bucket"]
+    removed = [
+        path for path in data.get("prefixes", []) if path in _objects.get(bucket, ())
+    ]
+    _objects.get(bucket, set()).difference_update(removed)
+    return JSONResponse([{"name": path} for path in removed])
+
+
+async def stub_stats(request: Request):
+    return JSONResponse({"requests": dict(_requests), "failures": dict(_failures)})
+
+
+app = Starlette(
+    routes=[
+        Route(
+            "/2010-04-01/Accounts/{account_sid}/Messages.json",
+            twilio_create_message,
+            methods=["POST"],
+        ),
+        Route("/v1/payment_links", razorpay_create_payment_link, methods=["POST"]),
+        Route(
+            "/v1/payment_links/{link_id}/cancel",
+            razorpay_cancel_payment_link,
+            methods=["POST"],
+        ),
+        Route("/storage/v1/bucket", supabase_list_buckets, methods=["GET"]),
+        Route("/storage/v1/bucket", supabase_create_bucket, methods=["POST"]),
+        Route(
+            "/storage/v1/object/{bucket}/{path:path}",
+            supabase_upload_object,
+            methods=["POST", "PUT"],
+        ),
+        Route(
+            "/storage/v1/object/{bucket}", supabase_remove_objects, methods=["DELETE"]
+        ),
+        Route("/_stub/stats", stub_stats, methods=["GET"]),
+    ]
+)
+
+
+def main():
+    """
+    Serve local stand-ins for the Twilio Messages, Razorpay Payment Links
+    and Supabase Storage endpoints the app calls. Point the app at it with
+    TWILIO_API_BASE, RAZORPAY_API_BASE and SUPABASE_URL set to STUB_BASE_URL
+    (any credentials are accepted). Messages sent with a StatusCallback get
+    signed delivery receipts posted back.
+    """
+    from granian import Granian
+    from granian.constants import Interfaces
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else STUB_PORT
+    Granian(
+        "app.utils.stub_services:app",
+        address=STUB_HOST,
+        port=port,
+        interface=Interfaces.ASGI,
+    ).serve()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
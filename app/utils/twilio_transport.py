@@ -0,0 +1,149 @@
+import contextlib
+import datetime
+import email.utils
+import logging
+import os
+import httpx
+from app.utils.rate_limit import CircuitBreaker
+
+ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
+AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+TWILIO_API_BASE = os.getenv("TWILIO_API_BASE", "https://api.twilio.com")
+TWILIO_STATUS_CALLBACK_URL = os.getenv("TWILIO_STATUS_CALLBACK_URL")
+TWILIO_CONNECT_TIMEOUT = float(os.getenv("TWILIO_CONNECT_TIMEOUT", "5"))
+TWILIO_READ_TIMEOUT = float(os.getenv("TWILIO_READ_TIMEOUT", "10"))
+TWILIO_MAX_CONNECTIONS = int(os.getenv("TWILIO_MAX_CONNECTIONS", "20"))
+TWILIO_BREAKER_THRESHOLD = int(os.getenv("TWILIO_BREAKER_THRESHOLD", "5"))
+TWILIO_BREAKER_RESET_SECONDS = float(os.getenv("TWILIO_BREAKER_RESET_SECONDS", "60"))
+_client: httpx.AsyncClient | None = None
+twilio_breaker = CircuitBreaker(TWILIO_BREAKER_THRESHOLD, TWILIO_BREAKER_RESET_SECONDS)
+
+
+class TwilioSendError(Exception):
+    """
+    A message Twilio did not accept. Transient errors (network failures,
+    429 and 5xx responses) are worth retrying, after `retry_after` seconds
+    when Twilio sent a Retry-After header.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status_code: int | None = None,
+        retry_after: float | None = None,
+        transient: bool = False,
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.transient = transient
+
+
+class TwilioCircuitOpen(TwilioSendError):
+    """Raised without calling Twilio while the circuit breaker is open."""
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(
+        0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+    )
+
+
+def get_twilio_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide Twilio HTTP client, creating it on first use.
+    Connections are kept alive and reused across messages, and HTTP/2 is
+    negotiated when the API endpoint supports it.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=TWILIO_API_BASE,
+            auth=(ACCOUNT_SID or "", AUTH_TOKEN or ""),
+            http2=True,
+            timeout=httpx.Timeout(TWILIO_READ_TIMEOUT, connect=TWILIO_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=TWILIO_MAX_CONNECTIONS,
+                max_keepalive_connections=TWILIO_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+
+@contextlib.asynccontextmanager
+async def twilio_client_lifespan():
+    """Close the pooled Twilio connections when the app shuts down."""
+    try:
+        yield
+    finally:
+        global _client
+        if _client is not None:
+            await _client.aclose()
+            _client = None
+
+
+def twilio_configured() -> bool:
+    """Whether the Twilio credentials and sender number are all set."""
+    return bool(ACCOUNT_SID and AUTH_TOKEN and os.getenv("TWILIO_PHONE_NUMBER"))
+
+
+async def create_message(
+    to: str, from_: str, body: str, media_url: str | None = None
+) -> bool:
+    """
+    Send one message through the Twilio Messages API, asking for delivery
+    receipts at TWILIO_STATUS_CALLBACK_URL when it is set.
+    Returns False when Twilio is not configured and raises TwilioSendError
+    when the message is not accepted. Consecutive transient failures open
+    the circuit breaker, and sends fail fast with TwilioCircuitOpen until it
+    lets a trial call through.
+    """
+    if not ACCOUNT_SID or not AUTH_TOKEN:
+        logging.warning("Twilio credentials are not configured. Cannot send message.")
+        return False
+    if not twilio_breaker.allow():
+        raise TwilioCircuitOpen(
+            "Twilio is failing; send deferred by the circuit breaker",
+            retry_after=twilio_breaker.retry_after(),
+            transient=True,
+        )
+    data = {"To": to, "From": from_, "Body": body}
+    if media_url:
+        data["MediaUrl"] = media_url
+    if TWILIO_STATUS_CALLBACK_URL:
+        data["StatusCallback"] = TWILIO_STATUS_CALLBACK_URL
+    try:
+        response = await get_twilio_client().post(
+            f"/2010-04-01/Accounts/{ACCOUNT_SID}/Messages.json", data=data
+        )
+    except httpx.HTTPError as e:
+        twilio_breaker.record_failure()
+        raise TwilioSendError(
+            f"Twilio request to {to} failed: {e}", transient=True
+        ) from e
+    if response.status_code == 429 or response.status_code >= 500:
+        twilio_breaker.record_failure()
+        raise TwilioSendError(
+            f"Twilio is unavailable for {to}: {response.status_code} {response.text}",
+            status_code=response.status_code,
+            retry_after=_retry_after(response),
+            transient=True,
+        )
+    twilio_breaker.record_success()
+    if response.is_error:
+        raise TwilioSendError(
+            f"Twilio rejected message to {to}: {response.status_code} {response.text}",
+            status_code=response.status_code,
+        )
+    return True
\ No newline at end of file
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+import reflex as rx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+RECONCILE_WORKLOAD_SQL = text("""WITH actual AS (
+    SELECT w.worker_id, w.worker_name, w.open_order_count AS recorded,
+        COUNT(o.order_id) AS actual
+    FROM workers w
+    LEFT JOIN orders o ON o.assigned_worker = w.worker_id
+        AND o.status NOT IN ('delivered', 'cancelled')
+    GROUP BY w.worker_id, w.worker_name, w.open_order_count
+),
+fixed AS (
+    UPDATE workers w
+    SET open_order_count = a.actual
+    FROM actual a
+    WHERE w.worker_id = a.worker_id
+        AND w.open_order_count IS DISTINCT FROM a.actual
+    RETURNING w.worker_id
+)
+SELECT worker_id, worker_name, recorded, actual
+FROM actual
+WHERE recorded IS DISTINCT FROM actual
+ORDER BY worker_id""")
+
+
+async def reconcile_worker_workload(session: AsyncSession) -> list[dict]:
+    """
+    Rebuild workers.open_order_count from the orders table.
+    Order writes are blocked for the duration so the recount cannot race the
+    trigger. Returns the workers whose counter had drifted, before fixing.
+    """
+    await session.execute(text("LOCK TABLE orders IN SHARE MODE"))
+    result = await session.execute(RECONCILE_WORKLOAD_SQL)
+    return [dict(row) for row in result.mappings().all()]
+
+
+async def main():
+    async with rx.asession() as session, session.begin():
+        drift = await reconcile_worker_workload(session)
+    if not drift:
+        print("Worker workload counters are in sync.")
+        return
+    for row in drift:
+        logging.warning(
+            f"Worker {row['worker_id']} ({row['worker_name']}): recorded {row['recorded']}, actual {row['actual']}"
+        )
+    print(f"Fixed open order counts for {len(drift)} worker(s).")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,80 @@
+import asyncio
+import sys
+import reflex as rx
+from sqlalchemy import text
+from app.utils.coupons import invalidate_coupon_cache, redeem_coupon
+from benchmarks.scratch import require_scratch_database
+
+RACE_COUPON_CODE = "RACECHECK"
+RACE_USAGE_LIMIT = 10
+
+SEED_COUPON_SQL = text("""INSERT INTO discount_coupons (coupon_code, discount_type, discount_value,
+    valid_from, valid_until, usage_limit, used_count, description)
+VALUES (:code, 'percentage', 10, CURRENT_DATE - 1, CURRENT_DATE + 1, :usage_limit, 0,
+    'Coupon race check')
+RETURNING coupon_id""")
+
+REMOVE_COUPON_SQL = text("DELETE FROM discount_coupons WHERE coupon_id = :coupon_id")
+
+
+async def _redeem_one() -> bool:
+    async with rx.asession() as session:
+        redeemed = await redeem_coupon(session, RACE_COUPON_CODE.lower())
+        await asyncio.sleep(0.01)
+        await session.commit()
+        return redeemed
+
+
+async def check_coupon_race(redemptions: int) -> list[str]:
+    """
+    Redeem a coupon limited to RACE_USAGE_LIMIT uses `redemptions` times at
+    once, each in its own transaction held open briefly after the
+    increment, and check that exactly the limit succeed and used_count
+    stops there. The coupon is deleted afterwards. Returns the failures.
+    """
+    require_scratch_database()
+    async with rx.asession() as session, session.begin():
+        coupon_id = (
+            await session.execute(
+                SEED_COUPON_SQL,
+                {"code": RACE_COUPON_CODE, "usage_limit": RACE_USAGE_LIMIT},
+            )
+        ).scalar_one()
+    try:
+        results = await asyncio.gather(*(_redeem_one() for _ in range(redemptions)))
+        async with rx.asession() as session:
+            used_count = (
+                await session.execute(
+                    text(
+                        "SELECT used_count FROM discount_coupons WHERE coupon_id = :coupon_id"
+                    ),
+                    {"coupon_id": coupon_id},
+                )
+            ).scalar_one()
+    finally:
+        async with rx.asession() as session, session.begin():
+            await session.execute(REMOVE_COUPON_SQL, {"coupon_id": coupon_id})
+        invalidate_coupon_cache(RACE_COUPON_CODE)
+    expected = min(redemptions, RACE_USAGE_LIMIT)
+    failures = []
+    if sum(results) != expected:
+        failures.append(
+            f"{sum(results)} of {redemptions} redemptions succeeded, expected {expected}"
+        )
+    if used_count != expected:
+        failures.append(f"used_count is {used_count}, expected {expected}")
+    return failures
+
+
+async def main() -> int:
+    redemptions = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    failures = await check_coupon_race(redemptions)
+    for failure in failures:
+        print(failure)
+    if not failures:
+        print(f"{redemptions} concurrent redemptions never exceeded the usage limit.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
\ No newline at end of file
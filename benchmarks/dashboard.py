@@ -0,0 +1,114 @@
+import asyncio
+import datetime
+import sys
+import time
+import reflex as rx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.dashboard import dashboard_cache, load_dashboard_snapshot
+from benchmarks.scratch import (
+    REMOVE_SEED_SQL,
+    SEED_CUSTOMERS_SQL,
+    SEED_ORDERS_SQL,
+    percentile,
+    require_scratch_database,
+)
+
+
+async def _seven_query_dashboard(session: AsyncSession, today: datetime.date):
+    """The dashboard as it was loaded before the snapshot query, for comparison."""
+    await session.execute(
+        text(
+            "SELECT SUM(advance_payment + (total_amount - balance_payment - advance_payment)) FROM orders WHERE order_date = :today"
+        ),
+        {"today": today},
+    )
+    await session.execute(text("SELECT COUNT(*) FROM orders WHERE status = 'pending'"))
+    await session.execute(text("SELECT COUNT(*) FROM orders WHERE status = 'ready'"))
+    await session.execute(
+        text("SELECT * FROM materials WHERE quantity_in_stock <= reorder_level LIMIT 5")
+    )
+    await session.execute(
+        text("""SELECT DATE_TRUNC('day', order_date)::date as day, SUM(total_amount) as sales
+FROM orders WHERE order_date >= :start_of_month GROUP BY day ORDER BY day"""),
+        {"start_of_month": today.replace(day=1)},
+    )
+    await session.execute(
+        text("""SELECT c.name, SUM(o.total_amount) as total_spent
+FROM customers c JOIN orders o ON c.customer_id = o.customer_id
+GROUP BY c.customer_id, c.name ORDER BY total_spent DESC LIMIT 5""")
+    )
+    await session.execute(
+        text(
+            "SELECT * FROM orders ORDER BY COALESCE(order_date, DATE '-infinity') DESC, order_id DESC LIMIT 5"
+        )
+    )
+
+
+async def _time_runs(runs: int, load) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        async with rx.asession() as session:
+            await load(session)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def benchmark(orders: int, runs: int) -> list[str]:
+    """
+    Time the seven-query dashboard load against the snapshot query on a
+    database seeded with `orders` extra orders, then `runs` concurrent loads
+    through the shared cache. The seed is committed so separate connections
+    see it, and deleted afterwards.
+    """
+    require_scratch_database()
+    today = datetime.date.today()
+    async with rx.asession() as session, session.begin():
+        result = await session.execute(
+            SEED_CUSTOMERS_SQL, {"count": max(1, orders // 20)}
+        )
+        customer_ids = list(result.scalars().all())
+        await session.execute(
+            SEED_ORDERS_SQL, {"customer_ids": customer_ids, "count": orders}
+        )
+    try:
+        async with rx.asession() as session:
+            await session.execute(text("ANALYZE orders"))
+            await session.execute(text("ANALYZE customers"))
+            await session.commit()
+        results = {}
+        for name, load in (
+            ("seven queries", lambda s: _seven_query_dashboard(s, today)),
+            ("snapshot", lambda s: load_dashboard_snapshot(s, today)),
+        ):
+            await _time_runs(max(1, runs // 10), load)
+            results[name] = await _time_runs(runs, load)
+        dashboard_cache.invalidate()
+        loads = dashboard_cache.loads
+        started = time.perf_counter()
+        await asyncio.gather(*(dashboard_cache.get() for _ in range(runs)))
+        shared = time.perf_counter() - started
+        loads = dashboard_cache.loads - loads
+    finally:
+        async with rx.asession() as session, session.begin():
+            await session.execute(REMOVE_SEED_SQL, {"customer_ids": customer_ids})
+    lines = [f"{'dashboard load':<16}{'runs':>6}{'p50 ms':>10}{'p95 ms':>10}"]
+    for name, samples in results.items():
+        p50, p95 = (percentile(samples, q) * 1000 for q in (0.5, 0.95))
+        lines.append(f"{name:<16}{len(samples):>6}{p50:>10.1f}{p95:>10.1f}")
+    lines.append(
+        f"{runs} concurrent dashboard loads through the cache ran {loads} snapshot query in {shared * 1000:.1f} ms"
+    )
+    return lines
+
+
+async def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    for line in await benchmark(orders, runs):
+        print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
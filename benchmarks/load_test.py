@@ -0,0 +1,272 @@
+import asyncio
+import datetime
+import logging
+import os
+import sys
+import time
+from collections import Counter
+import reflex as rx
+from sqlalchemy import text
+from app.utils import outbox
+from app.utils.outbox import (
+    enqueue_order_confirmation,
+    enqueue_status_notifications,
+    notify_outbox,
+    run_outbox_dispatcher,
+)
+from app.utils.photo_storage import upload_to_supabase
+from app.utils.razorpay import RAZORPAY_API_BASE, create_payment_link
+from app.utils.stub_services import STUB_BASE_URL
+from app.utils.twilio_transport import TWILIO_API_BASE, twilio_configured
+from benchmarks.scratch import percentile, require_scratch_database
+
+LOAD_TEST_STATUSES = ["cutting", "stitching", "finishing", "ready"]
+LOAD_TEST_DRAIN_TIMEOUT = 120
+LOAD_TEST_PHOTO = b"\xff\xd8\xff\xe0" + b"\x00" * 20_000 + b"\xff\xd9"
+
+CREATE_CUSTOMERS_SQL = text("""INSERT INTO customers (name, phone_number, opt_in_whatsapp, prefer_whatsapp)
+SELECT 'Load Test Customer ' || n, '+1555' || lpad(CAST(n AS text), 7, '0'), true, n % 2 = 0
+FROM generate_series(1, :count) AS n
+RETURNING customer_id""")
+
+CREATE_ORDER_SQL = text("""INSERT INTO orders (customer_id, order_date, delivery_date, status,
+    cloth_type, quantity, total_amount, advance_payment, balance_payment)
+VALUES (:customer_id, CURRENT_DATE, :delivery_date, 'pending', 'shirt', 1, :total_amount, 0, :total_amount)
+RETURNING order_id""")
+
+UPDATE_STATUS_SQL = text(
+    "UPDATE orders SET status = :status WHERE order_id = :order_id"
+)
+
+COUNT_UNSENT_SQL = text("""SELECT COUNT(*) FROM notification_outbox
+WHERE order_id = ANY(CAST(:order_ids AS integer[])) AND status <> 'sent'""")
+
+DELIVERY_LATENCY_SQL = text("""SELECT COUNT(*) AS sent,
+    percentile_cont(ARRAY[0.5, 0.95, 0.99]) WITHIN GROUP (
+        ORDER BY EXTRACT(EPOCH FROM sent_at - created_at)
+    ) AS percentiles,
+    MAX(EXTRACT(EPOCH FROM sent_at - created_at)) AS worst
+FROM notification_outbox
+WHERE order_id = ANY(CAST(:order_ids AS integer[])) AND status = 'sent'""")
+
+COUNT_DEAD_LETTERS_SQL = text(
+    "SELECT COUNT(*) FROM notification_dead_letters WHERE order_id = ANY(CAST(:order_ids AS integer[]))"
+)
+
+CLEANUP_SQL = text("""WITH removed AS (
+    DELETE FROM orders WHERE order_id = ANY(CAST(:order_ids AS integer[]))
+)
+DELETE FROM customers WHERE customer_id = ANY(CAST(:customer_ids AS integer[]))""")
+
+
+class LatencyRecorder:
+    """Collect per-operation wall-clock latencies and failures."""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self.failures: Counter = Counter()
+
+    async def time(self, operation: str, awaitable):
+        start = time.perf_counter()
+        try:
+            result = await awaitable
+        except Exception as e:
+            self.failures[operation] += 1
+            logging.warning(f"{operation} failed: {e}")
+            return None
+        self.samples.setdefault(operation, []).append(time.perf_counter() - start)
+        return result
+
+    def report(self) -> list[str]:
+        lines = [
+            f"{'operation':<16}{'ok':>7}{'failed':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        ]
+        for operation in sorted(set(self.samples) | set(self.failures)):
+            samples = self.samples.get(operation, [])
+            if samples:
+                p50, p95, p99 = (
+                    percentile(samples, q) * 1000 for q in (0.5, 0.95, 0.99)
+                )
+                timings = f"{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}"
+            else:
+                timings = f"{'-':>10}{'-':>10}{'-':>10}"
+            lines.append(
+                f"{operation:<16}{len(samples):>7}{self.failures[operation]:>8}{timings}"
+            )
+        return lines
+
+
+async def _create_order(customer_id: int) -> int:
+    delivery_date = datetime.date.today() + datetime.timedelta(days=7)
+    async with rx.asession() as session, session.begin():
+        result = await session.execute(
+            CREATE_ORDER_SQL,
+            {
+                "customer_id": customer_id,
+                "delivery_date": delivery_date,
+                "total_amount": 1500.0,
+            },
+        )
+        order_id = result.scalar_one()
+        await enqueue_order_confirmation(session, order_id, str(delivery_date), 1500.0)
+    notify_outbox()
+    return order_id
+
+
+async def _change_status(order_id: int, status: str):
+    async with rx.asession() as session, session.begin():
+        await session.execute(
+            UPDATE_STATUS_SQL, {"order_id": order_id, "status": status}
+        )
+        await enqueue_status_notifications(session, [order_id], status)
+    notify_outbox()
+
+
+async def _upload_photo(order_id: int):
+    url = await asyncio.to_thread(
+        upload_to_supabase, LOAD_TEST_PHOTO, f"order_{order_id}.jpg"
+    )
+    if not url:
+        raise RuntimeError("Supabase upload returned no URL")
+
+
+async def _create_payment_link(order_id: int, customer_id: int):
+    link = await asyncio.to_thread(
+        create_payment_link,
+        amount=1500.0,
+        description=f"Payment for Order #{order_id}",
+        customer_name=f"Load Test Customer {customer_id}",
+        customer_contact="+15550000000",
+        customer_email=None,
+        order_id=order_id,
+    )
+    if not link:
+        raise RuntimeError("Razorpay returned no payment link")
+
+
+async def _order_workflow(customer_id: int, recorder: LatencyRecorder) -> int | None:
+    order_id = await recorder.time("create_order", _create_order(customer_id))
+    if order_id is None:
+        return None
+    await recorder.time("upload_photo", _upload_photo(order_id))
+    for status in LOAD_TEST_STATUSES:
+        await recorder.time("status_change", _change_status(order_id, status))
+    await recorder.time("payment_link", _create_payment_link(order_id, customer_id))
+    return order_id
+
+
+def require_stub_services():
+    """
+    Exit unless Twilio, Razorpay and Supabase all point at the stub
+    services, so the load test cannot send real messages, create real
+    payment links or upload to real storage, and unless Twilio is
+    configured, since the outbox dispatcher pauses without it.
+    """
+    services = {
+        "TWILIO_API_BASE": TWILIO_API_BASE,
+        "RAZORPAY_API_BASE": RAZORPAY_API_BASE,
+        "SUPABASE_URL": os.getenv("SUPABASE_URL"),
+    }
+    elsewhere = [
+        name
+        for name, url in services.items()
+        if (url or "").rstrip("/") != STUB_BASE_URL.rstrip("/")
+    ]
+    if elsewhere:
+        sys.exit(
+            f"Refusing to run: set {', '.join(elsewhere)} to STUB_BASE_URL ({STUB_BASE_URL})."
+        )
+    if not twilio_configured():
+        sys.exit(
+            "Refusing to run: set TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN and TWILIO_PHONE_NUMBER; the stub accepts any values."
+        )
+
+
+async def run_load_test(orders: int, concurrency: int) -> list[str]:
+    """
+    Push `orders` orders through creation, a photo upload, each status
+    change and a payment link, `concurrency` at a time, with the outbox
+    dispatcher sending the resulting messages. Refuses to run unless the
+    database is a scratch database and every provider points at the stub
+    services (see app.utils.stub_services). Coalescing is switched off
+    while it runs so every status change is sent. Test rows are deleted
+    afterwards. Returns the report lines.
+    """
+    require_scratch_database()
+    require_stub_services()
+    coalesce_minutes = outbox.NOTIFICATION_COALESCE_MINUTES
+    outbox.NOTIFICATION_COALESCE_MINUTES = 0
+    try:
+        return await _run_load_test(orders, concurrency)
+    finally:
+        outbox.NOTIFICATION_COALESCE_MINUTES = coalesce_minutes
+
+
+async def _run_load_test(orders: int, concurrency: int) -> list[str]:
+    async with rx.asession() as session, session.begin():
+        result = await session.execute(CREATE_CUSTOMERS_SQL, {"count": concurrency})
+        customer_ids = list(result.scalars().all())
+    recorder = LatencyRecorder()
+    dispatcher = asyncio.create_task(run_outbox_dispatcher())
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(n: int):
+        async with semaphore:
+            return await _order_workflow(customer_ids[n % concurrency], recorder)
+
+    started = time.perf_counter()
+    order_ids = [
+        order_id
+        for order_id in await asyncio.gather(*(run_one(n) for n in range(orders)))
+        if order_id is not None
+    ]
+    elapsed = time.perf_counter() - started
+    deadline = time.monotonic() + LOAD_TEST_DRAIN_TIMEOUT
+    try:
+        while time.monotonic() < deadline:
+            async with rx.asession() as session:
+                unsent = (
+                    await session.execute(COUNT_UNSENT_SQL, {"order_ids": order_ids})
+                ).scalar_one()
+            if not unsent:
+                break
+            await asyncio.sleep(0.5)
+        async with rx.asession() as session:
+            delivery = (
+                (await session.execute(DELIVERY_LATENCY_SQL, {"order_ids": order_ids}))
+                .mappings()
+                .one()
+            )
+            dead = (
+                await session.execute(COUNT_DEAD_LETTERS_SQL, {"order_ids": order_ids})
+            ).scalar_one()
+    finally:
+        dispatcher.cancel()
+        async with rx.asession() as session, session.begin():
+            await session.execute(
+                CLEANUP_SQL, {"order_ids": order_ids, "customer_ids": customer_ids}
+            )
+    lines = [
+        f"{len(order_ids)} order(s) in {elapsed:.1f}s at concurrency {concurrency}",
+        *recorder.report(),
+    ]
+    if delivery["sent"]:
+        p50, p95, p99 = (seconds * 1000 for seconds in delivery["percentiles"])
+        lines.append(
+            f"{'notification':<16}{delivery['sent']:>7}{unsent + dead:>8}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}"
+        )
+    lines.append(
+        f"{unsent} message(s) still queued after the drain, {dead} dead-lettered"
+    )
+    return lines
+
+
+async def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    for line in await run_load_test(orders, concurrency):
+        print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
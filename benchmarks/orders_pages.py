@@ -0,0 +1,103 @@
+import asyncio
+import sys
+import time
+import reflex as rx
+from sqlalchemy import text
+from app.state import _fetch_order_page, _order_filter_conditions, _order_sort_key
+from benchmarks.scratch import (
+    REMOVE_SEED_SQL,
+    SEED_CUSTOMERS_SQL,
+    SEED_ORDERS_SQL,
+    percentile,
+    require_scratch_database,
+)
+
+SEARCH_TERM = "Benchmark Customer 42"
+
+
+async def _deep_cursor(search_query: str):
+    """
+    The keyset cursor halfway through the orders matching `search_query`,
+    found with OFFSET once so the timed fetch starts from a deep page the
+    way load_more_orders would reach it.
+    """
+    params: dict = {}
+    conditions, rank_sql = _order_filter_conditions("all", "all", search_query, params)
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    base = f"FROM orders o JOIN customers c ON o.customer_id = c.customer_id {where_clause}"
+    async with rx.asession() as session:
+        matches = (
+            await session.execute(text(f"SELECT COUNT(*) {base}"), params)
+        ).scalar_one()
+        row = (
+            (
+                await session.execute(
+                    text(f"""SELECT {rank_sql} AS search_rank, o.order_date, o.order_id {base}
+ORDER BY search_rank DESC, COALESCE(o.order_date, DATE '-infinity') DESC, o.order_id DESC
+OFFSET :depth LIMIT 1"""),
+                    {**params, "depth": matches // 2},
+                )
+            )
+            .mappings()
+            .one()
+        )
+    return _order_sort_key(row)
+
+
+async def _time_pages(runs: int, search_query: str, cursor) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await _fetch_order_page("all", "all", search_query, cursor=cursor)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def benchmark(orders: int, runs: int) -> list[str]:
+    """
+    Time the first orders page and a keyset page halfway through the list,
+    without a search and with SEARCH_TERM, on a database seeded with
+    `orders` extra orders. The seed is committed so the page queries'
+    sessions see it, and deleted afterwards.
+    """
+    require_scratch_database()
+    async with rx.asession() as session, session.begin():
+        result = await session.execute(
+            SEED_CUSTOMERS_SQL, {"count": max(1, orders // 20)}
+        )
+        customer_ids = list(result.scalars().all())
+        await session.execute(
+            SEED_ORDERS_SQL, {"customer_ids": customer_ids, "count": orders}
+        )
+    try:
+        async with rx.asession() as session:
+            await session.execute(text("ANALYZE orders"))
+            await session.execute(text("ANALYZE customers"))
+            await session.commit()
+        results = {}
+        for label, search_query in (("", ""), (", search", SEARCH_TERM)):
+            for page, cursor in (
+                ("first page", None),
+                ("deep page", await _deep_cursor(search_query)),
+            ):
+                await _time_pages(max(1, runs // 10), search_query, cursor)
+                results[page + label] = await _time_pages(runs, search_query, cursor)
+    finally:
+        async with rx.asession() as session, session.begin():
+            await session.execute(REMOVE_SEED_SQL, {"customer_ids": customer_ids})
+    lines = [f"{'orders page':<20}{'runs':>6}{'p50 ms':>10}{'p95 ms':>10}"]
+    for name, samples in results.items():
+        p50, p95 = (percentile(samples, q) * 1000 for q in (0.5, 0.95))
+        lines.append(f"{name:<20}{len(samples):>6}{p50:>10.1f}{p95:>10.1f}")
+    return lines
+
+
+async def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    for line in await benchmark(orders, runs):
+        print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
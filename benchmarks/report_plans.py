@@ -0,0 +1,129 @@
+import asyncio
+import datetime
+import json
+import sys
+import reflex as rx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.reports import (
+    GST_SUMMARY_SQL,
+    MATERIAL_USAGE_SQL,
+    MONTHLY_ORDER_COUNTS_SQL,
+    MONTHLY_ORDER_TRENDS_SQL,
+    QUARTERLY_REVENUE_SQL,
+    month_bounds,
+    months_ago,
+)
+from benchmarks.scratch import (
+    REMOVE_SEED_SQL,
+    SEED_CUSTOMERS_SQL,
+    SEED_ORDERS_SQL,
+    require_scratch_database,
+)
+
+SEED_MATERIAL_USAGE_SQL = text("""WITH material AS (
+    INSERT INTO materials (material_name, material_type, unit, quantity_in_stock, unit_price, reorder_level)
+    VALUES ('Benchmark Fabric', 'fabric', 'm', 0, 100, 0)
+    RETURNING material_id
+),
+used AS (
+    INSERT INTO order_materials (order_id, material_id, quantity_used, wastage, cost)
+    SELECT o.order_id, m.material_id, 2, 0.1, 200
+    FROM orders o, material m
+    WHERE o.customer_id = ANY(CAST(:customer_ids AS integer[])) AND o.order_id % 3 = 0
+)
+SELECT material_id FROM material""")
+
+REMOVE_MATERIAL_USAGE_SQL = text("""WITH used AS (
+    DELETE FROM order_materials WHERE material_id = :material_id
+)
+DELETE FROM materials WHERE material_id = :material_id""")
+
+
+def _plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+async def _sequential_scans(session: AsyncSession, query, params: dict) -> set[str]:
+    result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {query.text}"), params)
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return {
+        node["Relation Name"]
+        for node in _plan_nodes(plan[0]["Plan"])
+        if node["Node Type"] == "Seq Scan"
+    }
+
+
+async def check_report_plans(orders: int) -> list[str]:
+    """
+    EXPLAIN each date-bounded report query against a database seeded with
+    `orders` extra orders, a third of them with material usage, and report
+    any that plan a sequential scan of orders. The seeded rows are deleted
+    afterwards. Returns the failures.
+    """
+    require_scratch_database()
+    today = datetime.date.today()
+    month_start, month_end = month_bounds(today.year, today.month)
+    checks = [
+        ("seasonal patterns", MONTHLY_ORDER_COUNTS_SQL, {"since": months_ago(24)}),
+        ("monthly trends", MONTHLY_ORDER_TRENDS_SQL, {"since": months_ago(12)}),
+        ("quarterly revenue", QUARTERLY_REVENUE_SQL, {"since": months_ago(24)}),
+        (
+            "material usage",
+            MATERIAL_USAGE_SQL,
+            {"start_date": months_ago(12), "end_date": months_ago(11)},
+        ),
+        (
+            "GST summary",
+            GST_SUMMARY_SQL,
+            {"start_date": month_start, "end_date": month_end},
+        ),
+    ]
+    async with rx.asession() as session, session.begin():
+        result = await session.execute(
+            SEED_CUSTOMERS_SQL, {"count": max(1, orders // 20)}
+        )
+        customer_ids = list(result.scalars().all())
+        await session.execute(
+            SEED_ORDERS_SQL, {"customer_ids": customer_ids, "count": orders}
+        )
+        material_id = (
+            await session.execute(
+                SEED_MATERIAL_USAGE_SQL, {"customer_ids": customer_ids}
+            )
+        ).scalar_one()
+    failures = []
+    try:
+        async with rx.asession() as session:
+            await session.execute(text("ANALYZE orders"))
+            await session.execute(text("ANALYZE order_materials"))
+            await session.execute(text("ANALYZE daily_order_rollup"))
+            for name, query, params in checks:
+                if "orders" in await _sequential_scans(session, query, params):
+                    failures.append(f"{name} scans orders sequentially")
+            await session.commit()
+    finally:
+        async with rx.asession() as session, session.begin():
+            await session.execute(
+                REMOVE_MATERIAL_USAGE_SQL, {"material_id": material_id}
+            )
+            await session.execute(REMOVE_SEED_SQL, {"customer_ids": customer_ids})
+    return failures
+
+
+async def main() -> int:
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    failures = await check_report_plans(orders)
+    for failure in failures:
+        print(failure)
+    if not failures:
+        print("Every report query uses an index or the daily rollup.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
\ No newline at end of file
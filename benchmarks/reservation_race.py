@@ -0,0 +1,115 @@
+import asyncio
+import sys
+import reflex as rx
+from sqlalchemy import text
+from app.utils.inventory import reserve_materials
+from benchmarks.scratch import (
+    REMOVE_SEED_SQL,
+    SEED_CUSTOMERS_SQL,
+    require_scratch_database,
+)
+
+RACE_MATERIAL_TYPE = "race_check_fabric"
+RACE_STOCK = 25.0
+RACE_REQUIRED = 2.5
+
+SEED_MATERIAL_SQL = text("""INSERT INTO materials (material_name, material_type, unit, quantity_in_stock,
+    unit_price, reorder_level, quantity_reserved)
+VALUES (:material_type || ' roll', :material_type, 'm', :stock, 100, 0, 0)
+RETURNING material_id""")
+
+SEED_RACE_ORDERS_SQL = text("""INSERT INTO orders (customer_id, order_date, delivery_date, status,
+    cloth_type, quantity, total_amount, advance_payment, balance_payment)
+SELECT :customer_id, CURRENT_DATE, CURRENT_DATE + 7, 'pending', 'shirt', 1, 500, 0, 500
+FROM generate_series(1, :count)
+RETURNING order_id""")
+
+RESERVED_SQL = text("""SELECT m.quantity_in_stock, m.quantity_reserved,
+    (SELECT COALESCE(SUM(quantity), 0) FROM material_reservations r
+        WHERE r.material_id = m.material_id) AS recorded
+FROM materials m WHERE m.material_id = :material_id""")
+
+
+async def _reserve_one(order_id: int) -> bool:
+    async with rx.asession() as session:
+        report = await reserve_materials(
+            session, order_id, {RACE_MATERIAL_TYPE: RACE_REQUIRED}
+        )
+        if any(item["shortfall"] > 0 for item in report):
+            await session.rollback()
+            return False
+        await asyncio.sleep(0.01)
+        await session.commit()
+        return True
+
+
+async def check_reservation_race(orders: int) -> list[str]:
+    """
+    Reserve RACE_REQUIRED of a material with RACE_STOCK in stock for
+    `orders` orders at once, each in its own transaction, and check that
+    exactly as many succeed as the stock covers and that nothing is
+    reserved twice. The orders are created up front: creating them inside
+    each transaction, as add_order does, would serialize the transactions
+    on the shared daily_order_rollup row and hide the race. The seeded rows
+    are deleted afterwards. Returns the failures.
+    """
+    require_scratch_database()
+    async with rx.asession() as session, session.begin():
+        result = await session.execute(SEED_CUSTOMERS_SQL, {"count": 1})
+        customer_ids = list(result.scalars().all())
+        material_id = (
+            await session.execute(
+                SEED_MATERIAL_SQL,
+                {"material_type": RACE_MATERIAL_TYPE, "stock": RACE_STOCK},
+            )
+        ).scalar_one()
+        result = await session.execute(
+            SEED_RACE_ORDERS_SQL, {"customer_id": customer_ids[0], "count": orders}
+        )
+        order_ids = list(result.scalars().all())
+    try:
+        results = await asyncio.gather(
+            *(_reserve_one(order_id) for order_id in order_ids)
+        )
+        async with rx.asession() as session:
+            row = (
+                (await session.execute(RESERVED_SQL, {"material_id": material_id}))
+                .mappings()
+                .one()
+            )
+    finally:
+        async with rx.asession() as session, session.begin():
+            await session.execute(REMOVE_SEED_SQL, {"customer_ids": customer_ids})
+            await session.execute(
+                text("DELETE FROM materials WHERE material_id = :material_id"),
+                {"material_id": material_id},
+            )
+    expected = min(orders, int(RACE_STOCK // RACE_REQUIRED))
+    failures = []
+    if sum(results) != expected:
+        failures.append(
+            f"{sum(results)} of {orders} reservations succeeded, expected {expected}"
+        )
+    if float(row["quantity_reserved"]) != expected * RACE_REQUIRED:
+        failures.append(
+            f"quantity_reserved is {row['quantity_reserved']}, expected {expected * RACE_REQUIRED}"
+        )
+    if float(row["recorded"]) != float(row["quantity_reserved"]):
+        failures.append(
+            f"material_reservations hold {row['recorded']} but quantity_reserved is {row['quantity_reserved']}"
+        )
+    return failures
+
+
+async def main() -> int:
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    failures = await check_reservation_race(orders)
+    for failure in failures:
+        print(failure)
+    if not failures:
+        print(f"{orders} concurrent reservations never over-reserved stock.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
\ No newline at end of file
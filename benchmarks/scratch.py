@@ -0,0 +1,46 @@
+import os
+import sys
+import reflex as rx
+from sqlalchemy import text
+
+SCRATCH_DATABASE_URL = os.getenv("SCRATCH_DATABASE_URL")
+
+SEED_CUSTOMERS_SQL = text("""INSERT INTO customers (name, phone_number)
+SELECT 'Benchmark Customer ' || n, '+1666' || lpad(CAST(n AS text), 7, '0')
+FROM generate_series(1, :count) AS n
+RETURNING customer_id""")
+
+SEED_ORDERS_SQL = text("""INSERT INTO orders (customer_id, order_date, delivery_date, status, cloth_type,
+    quantity, total_amount, advance_payment, balance_payment)
+SELECT (CAST(:customer_ids AS integer[]))[1 + g % cardinality(CAST(:customer_ids AS integer[]))],
+    CURRENT_DATE - g % 730,
+    CURRENT_DATE - g % 730 + 14,
+    (ARRAY['pending', 'cutting', 'stitching', 'ready', 'delivered', 'delivered'])[1 + g % 6],
+    'shirt', 1, 500 + g % 4000, 200, 300 + g % 4000
+FROM generate_series(1, :count) AS g""")
+
+REMOVE_SEED_SQL = text("""WITH removed AS (
+    DELETE FROM orders WHERE customer_id = ANY(CAST(:customer_ids AS integer[]))
+)
+DELETE FROM customers WHERE customer_id = ANY(CAST(:customer_ids AS integer[]))""")
+
+
+def require_scratch_database():
+    """
+    Exit unless SCRATCH_DATABASE_URL is set to the database the app is
+    configured to use. Benchmarks and race checks insert and delete
+    thousands of rows, which fire the order triggers, reach every open
+    orders page and leave tombstones, so they must never run against a
+    database anyone is using.
+    """
+    configured = rx.config.get_config().async_db_url
+    if not SCRATCH_DATABASE_URL or SCRATCH_DATABASE_URL != configured:
+        sys.exit(
+            "Refusing to run: set SCRATCH_DATABASE_URL to the app's async database URL (REFLEX_ASYNC_DB_URL) to confirm it is a scratch database."
+        )
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
\ No newline at end of file
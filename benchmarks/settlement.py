@@ -0,0 +1,110 @@
+import asyncio
+import sys
+import time
+import reflex as rx
+from sqlalchemy import text
+from app.utils.loyalty import settle_delivered_orders
+from benchmarks.scratch import (
+    REMOVE_SEED_SQL,
+    SEED_CUSTOMERS_SQL,
+    SEED_ORDERS_SQL,
+    require_scratch_database,
+)
+
+CONTENDERS = 5
+
+DELIVER_SEEDED_SQL = text("""UPDATE orders SET status = 'delivered'
+WHERE customer_id = ANY(CAST(:customer_ids AS integer[]))
+RETURNING order_id""")
+
+SEED_REFERRALS_SQL = text("""INSERT INTO customer_referrals (referrer_customer_id, referred_customer_id, reward_points)
+SELECT (CAST(:customer_ids AS integer[]))[n], (CAST(:customer_ids AS integer[]))[n + :count], 50
+FROM generate_series(1, :count) AS n""")
+
+COUNT_LEDGER_SQL = text(
+    "SELECT COUNT(*) FROM loyalty_points WHERE order_id = :order_id"
+)
+
+REMOVE_LOYALTY_SQL = text("""WITH ledger AS (
+    DELETE FROM loyalty_points WHERE customer_id = ANY(CAST(:customer_ids AS integer[]))
+)
+DELETE FROM customer_referrals
+WHERE referrer_customer_id = ANY(CAST(:customer_ids AS integer[]))
+    OR referred_customer_id = ANY(CAST(:customer_ids AS integer[]))""")
+
+
+async def _settle(order_ids: list[int]) -> tuple[dict, float]:
+    started = time.perf_counter()
+    async with rx.asession() as session, session.begin():
+        settlement = await settle_delivered_orders(session, order_ids)
+    return (settlement, time.perf_counter() - started)
+
+
+async def benchmark(
+    orders: int, customers: int, referrals: int
+) -> tuple[list[str], list[str]]:
+    """
+    Settle `orders` delivered orders for `customers` customers, `referrals`
+    of them referred by another seeded customer, in one call, then retry
+    the same call and settle one more order from CONTENDERS transactions
+    at once. Checks that the retry awards nothing and the contested order
+    gets a single ledger row. The seeded rows are deleted afterwards.
+    Returns the timing lines and the failures.
+    """
+    require_scratch_database()
+    async with rx.asession() as session, session.begin():
+        result = await session.execute(SEED_CUSTOMERS_SQL, {"count": customers})
+        customer_ids = list(result.scalars().all())
+        await session.execute(
+            SEED_ORDERS_SQL, {"customer_ids": customer_ids, "count": orders + 1}
+        )
+        result = await session.execute(
+            DELIVER_SEEDED_SQL, {"customer_ids": customer_ids}
+        )
+        order_ids = sorted(result.scalars().all())
+        await session.execute(
+            SEED_REFERRALS_SQL, {"customer_ids": customer_ids, "count": referrals}
+        )
+    contested = order_ids.pop()
+    try:
+        settlement, first = await _settle(order_ids)
+        retry, again = await _settle(order_ids)
+        await asyncio.gather(*(_settle([contested]) for _ in range(CONTENDERS)))
+        async with rx.asession() as session:
+            ledger_rows = (
+                await session.execute(COUNT_LEDGER_SQL, {"order_id": contested})
+            ).scalar_one()
+    finally:
+        async with rx.asession() as session, session.begin():
+            await session.execute(REMOVE_LOYALTY_SQL, {"customer_ids": customer_ids})
+            await session.execute(REMOVE_SEED_SQL, {"customer_ids": customer_ids})
+    lines = [
+        f"settled {len(settlement['points'])} orders with {len(settlement['referrals'])} referral rewards and {len(settlement['promotions'])} promotions in {first * 1000:.1f} ms",
+        f"retried the same settlement in {again * 1000:.1f} ms",
+    ]
+    failures = []
+    if len(settlement["points"]) != len(order_ids):
+        failures.append(
+            f"{len(settlement['points'])} of {len(order_ids)} orders were settled"
+        )
+    if retry["points"] or retry["referrals"] or retry["promotions"]:
+        failures.append("the retried settlement awarded points again")
+    if ledger_rows != 1:
+        failures.append(
+            f"{CONTENDERS} concurrent settlements of one order wrote {ledger_rows} ledger rows"
+        )
+    return (lines, failures)
+
+
+async def main() -> int:
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    customers = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    referrals = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    lines, failures = await benchmark(orders, customers, min(referrals, customers // 2))
+    for line in lines + failures:
+        print(line)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
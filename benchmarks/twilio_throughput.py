@@ -0,0 +1,94 @@
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from twilio.rest import Client
+from app.utils.stub_services import STUB_BASE_URL
+from app.utils.twilio_transport import (
+    ACCOUNT_SID,
+    AUTH_TOKEN,
+    TWILIO_API_BASE,
+    create_message,
+    twilio_client_lifespan,
+)
+
+BENCHMARK_TO = "+15550000001"
+BENCHMARK_FROM = "+15550000002"
+SYNC_THREADS = (1, 8)
+ASYNC_CONCURRENCY = (1, 8, 20)
+
+
+def require_twilio_stub():
+    """
+    Exit unless TWILIO_API_BASE points at the stub services and Twilio
+    credentials are set, so the benchmark cannot send real messages and
+    create_message does not skip every send.
+    """
+    if TWILIO_API_BASE.rstrip("/") != STUB_BASE_URL.rstrip("/"):
+        sys.exit(
+            f"Refusing to run: set TWILIO_API_BASE to STUB_BASE_URL ({STUB_BASE_URL})."
+        )
+    if not ACCOUNT_SID or not AUTH_TOKEN:
+        sys.exit(
+            "Refusing to run: set TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN; the stub accepts any values."
+        )
+
+
+def _sync_rate(messages: int, threads: int) -> float:
+    """Messages per second through one twilio.rest.Client shared by `threads` threads."""
+    client = Client(ACCOUNT_SID, AUTH_TOKEN)
+    client.api.base_url = TWILIO_API_BASE
+
+    def send(n: int):
+        client.messages.create(
+            to=BENCHMARK_TO, from_=BENCHMARK_FROM, body=f"Benchmark message {n}"
+        )
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(send, range(messages)))
+    return messages / (time.perf_counter() - started)
+
+
+async def _async_rate(messages: int, concurrency: int) -> float:
+    """Messages per second through create_message, `concurrency` at a time."""
+    limit = asyncio.Semaphore(concurrency)
+
+    async def send(n: int):
+        async with limit:
+            await create_message(BENCHMARK_TO, BENCHMARK_FROM, f"Benchmark message {n}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(n) for n in range(messages)))
+    return messages / (time.perf_counter() - started)
+
+
+async def benchmark(messages: int) -> list[str]:
+    """
+    Send `messages` messages to the Twilio stub through the synchronous
+    Twilio client on a thread pool, as sms.py and whatsapp.py used to, and
+    through the shared async client in twilio_transport at a few
+    concurrency levels. The stub's latency is set where it is started
+    (STUB_TWILIO_LATENCY_MS). Returns the report lines.
+    """
+    require_twilio_stub()
+    lines = [f"{'client':<24}{'concurrency':>12}{'msg/s':>10}"]
+    for threads in SYNC_THREADS:
+        rate = await asyncio.to_thread(_sync_rate, messages, threads)
+        lines.append(f"{'sync twilio client':<24}{threads:>12}{rate:>10.0f}")
+    async with twilio_client_lifespan():
+        await _async_rate(min(messages, 20), 1)
+        for concurrency in ASYNC_CONCURRENCY:
+            rate = await _async_rate(messages, concurrency)
+            lines.append(f"{'shared async client':<24}{concurrency:>12}{rate:>10.0f}")
+    return lines
+
+
+async def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for line in await benchmark(messages):
+        print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
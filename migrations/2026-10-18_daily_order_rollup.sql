@@ -0,0 +1,102 @@
+-- Create or rebuild daily_order_rollup on a database made from an older
+-- schema.sql, including one with the earlier (day, cloth_type, status) key.
+-- Run in one transaction, e.g.
+--   psql "$DATABASE_URL" -1 -f migrations/2026-10-18_daily_order_rollup.sql
+-- Order writes are blocked while the rollup is rebuilt from orders, so no
+-- change can slip in between the backfill and the triggers.
+
+LOCK TABLE orders IN SHARE ROW EXCLUSIVE MODE;
+DROP TRIGGER IF EXISTS orders_rollup_insert ON orders;
+DROP TRIGGER IF EXISTS orders_rollup_update ON orders;
+DROP TRIGGER IF EXISTS orders_rollup_delete ON orders;
+DROP TABLE IF EXISTS daily_order_rollup;
+
+CREATE TABLE daily_order_rollup (
+	day DATE NOT NULL, 
+	delivery_day DATE NOT NULL, 
+	cloth_type VARCHAR(100) NOT NULL, 
+	status VARCHAR(50) NOT NULL, 
+	order_count INTEGER DEFAULT 0 NOT NULL, 
+	revenue NUMERIC(14, 2) DEFAULT 0 NOT NULL, 
+	discount NUMERIC(14, 2) DEFAULT 0 NOT NULL, 
+	material_cost NUMERIC(14, 2) DEFAULT 0 NOT NULL, 
+	labor_cost NUMERIC(14, 2) DEFAULT 0 NOT NULL, 
+	profit NUMERIC(14, 2) DEFAULT 0 NOT NULL, 
+	CONSTRAINT daily_order_rollup_pkey PRIMARY KEY (day, delivery_day, cloth_type, status)
+);
+
+CREATE OR REPLACE FUNCTION maintain_daily_order_rollup() RETURNS trigger AS $$
+BEGIN
+	IF TG_OP = 'INSERT' THEN
+		INSERT INTO daily_order_rollup AS r (day, delivery_day, cloth_type, status, order_count, revenue, discount, material_cost, labor_cost, profit)
+		SELECT COALESCE(order_date, '-infinity'), COALESCE(delivery_date, '-infinity'), COALESCE(cloth_type, ''), COALESCE(status, ''), COUNT(*),
+			SUM(COALESCE(total_amount, 0)), SUM(COALESCE(discount_amount, 0)),
+			SUM(COALESCE(material_cost, 0)), SUM(COALESCE(labor_cost, 0)), SUM(COALESCE(profit, 0))
+		FROM new_rows
+		GROUP BY 1, 2, 3, 4
+		ON CONFLICT (day, delivery_day, cloth_type, status) DO UPDATE
+		SET order_count = r.order_count + EXCLUDED.order_count,
+			revenue = r.revenue + EXCLUDED.revenue,
+			discount = r.discount + EXCLUDED.discount,
+			material_cost = r.material_cost + EXCLUDED.material_cost,
+			labor_cost = r.labor_cost + EXCLUDED.labor_cost,
+			profit = r.profit + EXCLUDED.profit;
+	ELSIF TG_OP = 'DELETE' THEN
+		INSERT INTO daily_order_rollup AS r (day, delivery_day, cloth_type, status, order_count, revenue, discount, material_cost, labor_cost, profit)
+		SELECT COALESCE(order_date, '-infinity'), COALESCE(delivery_date, '-infinity'), COALESCE(cloth_type, ''), COALESCE(status, ''), -COUNT(*),
+			-SUM(COALESCE(total_amount, 0)), -SUM(COALESCE(discount_amount, 0)),
+			-SUM(COALESCE(material_cost, 0)), -SUM(COALESCE(labor_cost, 0)), -SUM(COALESCE(profit, 0))
+		FROM old_rows
+		GROUP BY 1, 2, 3, 4
+		ON CONFLICT (day, delivery_day, cloth_type, status) DO UPDATE
+		SET order_count = r.order_count + EXCLUDED.order_count,
+			revenue = r.revenue + EXCLUDED.revenue,
+			discount = r.discount + EXCLUDED.discount,
+			material_cost = r.material_cost + EXCLUDED.material_cost,
+			labor_cost = r.labor_cost + EXCLUDED.labor_cost,
+			profit = r.profit + EXCLUDED.profit;
+	ELSE
+		WITH changed AS (
+			SELECT o.order_id
+			FROM old_rows o
+			JOIN new_rows n ON n.order_id = o.order_id
+			WHERE (o.order_date, o.delivery_date, o.cloth_type, o.status, o.total_amount, o.discount_amount, o.material_cost, o.labor_cost, o.profit)
+				IS DISTINCT FROM (n.order_date, n.delivery_date, n.cloth_type, n.status, n.total_amount, n.discount_amount, n.material_cost, n.labor_cost, n.profit)
+		),
+		deltas AS (
+			SELECT n.order_date, n.delivery_date, n.cloth_type, n.status, 1 AS sign,
+				n.total_amount, n.discount_amount, n.material_cost, n.labor_cost, n.profit
+			FROM new_rows n JOIN changed USING (order_id)
+			UNION ALL
+			SELECT o.order_date, o.delivery_date, o.cloth_type, o.status, -1 AS sign,
+				o.total_amount, o.discount_amount, o.material_cost, o.labor_cost, o.profit
+			FROM old_rows o JOIN changed USING (order_id)
+		)
+		INSERT INTO daily_order_rollup AS r (day, delivery_day, cloth_type, status, order_count, revenue, discount, material_cost, labor_cost, profit)
+		SELECT COALESCE(order_date, '-infinity'), COALESCE(delivery_date, '-infinity'), COALESCE(cloth_type, ''), COALESCE(status, ''), SUM(sign),
+			SUM(sign * COALESCE(total_amount, 0)), SUM(sign * COALESCE(discount_amount, 0)),
+			SUM(sign * COALESCE(material_cost, 0)), SUM(sign * COALESCE(labor_cost, 0)), SUM(sign * COALESCE(profit, 0))
+		FROM deltas
+		GROUP BY 1, 2, 3, 4
+		ON CONFLICT (day, delivery_day, cloth_type, status) DO UPDATE
+		SET order_count = r.order_count + EXCLUDED.order_count,
+			revenue = r.revenue + EXCLUDED.revenue,
+			discount = r.discount + EXCLUDED.discount,
+			material_cost = r.material_cost + EXCLUDED.material_cost,
+			labor_cost = r.labor_cost + EXCLUDED.labor_cost,
+			profit = r.profit + EXCLUDED.profit;
+	END IF;
+	RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER orders_rollup_insert AFTER INSERT ON orders REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION maintain_daily_order_rollup();
+CREATE TRIGGER orders_rollup_update AFTER UPDATE ON orders REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION maintain_daily_order_rollup();
+CREATE TRIGGER orders_rollup_delete AFTER DELETE ON orders REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION maintain_daily_order_rollup();
+
+INSERT INTO daily_order_rollup (day, delivery_day, cloth_type, status, order_count, revenue, discount, material_cost, labor_cost, profit)
+SELECT COALESCE(order_date, '-infinity'), COALESCE(delivery_date, '-infinity'), COALESCE(cloth_type, ''), COALESCE(status, ''), COUNT(*),
+	SUM(COALESCE(total_amount, 0)), SUM(COALESCE(discount_amount, 0)),
+	SUM(COALESCE(material_cost, 0)), SUM(COALESCE(labor_cost, 0)), SUM(COALESCE(profit, 0))
+FROM orders
+GROUP BY 1, 2, 3, 4;
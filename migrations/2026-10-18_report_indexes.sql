@@ -0,0 +1,18 @@
+-- Report and order list indexes for databases created before they were
+-- added to schema.sql. Run outside a transaction, e.g.
+--   psql "$DATABASE_URL" -f migrations/2026-10-18_report_indexes.sql
+-- CONCURRENTLY builds each index without blocking order writes. The file
+-- is safe to run again, though a rerun rebuilds the keyset index.
+
+-- GST summary: status = 'delivered' and an order_date range.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_status_order_date ON orders (status, order_date);
+
+-- Material usage: order_materials joined from an order_date range.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_order_materials_order ON order_materials (order_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_order_date ON orders (order_date);
+
+-- Order list keyset pages, with undated orders sorted last. This replaces
+-- the older (order_date DESC, order_id DESC) index of the same name.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_date_nulls_last ON orders (COALESCE(order_date, '-infinity'::date) DESC, order_id DESC);
+DROP INDEX CONCURRENTLY IF EXISTS idx_orders_date_id;
+ALTER INDEX idx_orders_date_nulls_last RENAME TO idx_orders_date_id;
@@ -1,4 +1,7 @@
 
+CREATE EXTENSION IF NOT EXISTS pg_trgm
+
+
 CREATE TABLE purchase_orders (
 	po_id SERIAL NOT NULL, 
 	po_number VARCHAR(50) NOT NULL, 
@@ -31,6 +34,7 @@ CREATE TABLE materials (
 	batch_number VARCHAR(100), 
 	roll_number VARCHAR(100), 
 	batch_expiry_date DATE, 
+	quantity_reserved NUMERIC(10, 2) DEFAULT 0, 
 	CONSTRAINT materials_pkey PRIMARY KEY (material_id)
 )
 
@@ -53,11 +57,17 @@ CREATE TABLE customers (
 	referred_by INTEGER, 
 	whatsapp_opt_in BOOLEAN DEFAULT true, 
 	preferred_notification VARCHAR(20) DEFAULT 'sms'::character varying, 
+	phone_normalized VARCHAR(20) GENERATED ALWAYS AS (RIGHT(regexp_replace(COALESCE(phone_number, ''), '\D', '', 'g'), 10)) STORED, 
+	preferred_language VARCHAR(5) DEFAULT 'en'::character varying, 
 	CONSTRAINT customers_pkey PRIMARY KEY (customer_id), 
 	CONSTRAINT customers_referred_by_fkey FOREIGN KEY(referred_by) REFERENCES customers (customer_id)
 )
 
 
+CREATE INDEX idx_customers_name_lower ON customers (lower(name) text_pattern_ops)
+CREATE INDEX idx_customers_name_trgm ON customers USING gin (name gin_trgm_ops)
+CREATE INDEX idx_customers_phone_normalized ON customers (phone_normalized text_pattern_ops)
+
 
 CREATE TABLE photos (
 	photo_id SERIAL NOT NULL, 
@@ -121,10 +131,12 @@ CREATE TABLE workers (
 	active_status BOOLEAN DEFAULT true, 
 	incentive_rate NUMERIC(5, 2) DEFAULT 0.0, 
 	total_incentives NUMERIC(10, 2) DEFAULT 0.0, 
+	open_order_count INTEGER DEFAULT 0 NOT NULL, 
 	CONSTRAINT workers_pkey PRIMARY KEY (worker_id)
 )
 
 
+CREATE INDEX idx_workers_active_workload ON workers (open_order_count, worker_name) WHERE active_status = true
 
 CREATE TABLE suppliers (
 	supplier_id SERIAL NOT NULL, 
@@ -300,6 +312,8 @@ CREATE TABLE orders (
 	order_template_id INTEGER, 
 	is_bulk_order BOOLEAN DEFAULT false, 
 	bulk_order_details TEXT, 
+	updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	loyalty_settled_at TIMESTAMP WITHOUT TIME ZONE, 
 	CONSTRAINT orders_pkey PRIMARY KEY (order_id), 
 	CONSTRAINT orders_customer_id_fkey FOREIGN KEY(customer_id) REFERENCES customers (customer_id)
 )
@@ -307,6 +321,12 @@ CREATE TABLE orders (
 
 CREATE INDEX idx_orders_priority ON orders (priority)
 CREATE INDEX idx_orders_template ON orders (order_template_id)
+CREATE INDEX idx_orders_date_id ON orders (COALESCE(order_date, '-infinity'::date) DESC, order_id DESC)
+CREATE INDEX idx_orders_order_date ON orders (order_date)
+CREATE INDEX idx_orders_updated_at ON orders (updated_at)
+CREATE INDEX idx_orders_customer ON orders (customer_id)
+CREATE INDEX idx_orders_special_instructions_trgm ON orders USING gin (special_instructions gin_trgm_ops)
+CREATE INDEX idx_orders_status_order_date ON orders (status, order_date)
 
 CREATE TABLE material_suppliers (
 	id SERIAL NOT NULL, 
@@ -460,6 +480,9 @@ CREATE TABLE order_materials (
 )
 
 
+CREATE INDEX idx_order_materials_order ON order_materials (order_id)
+
+
 
 CREATE TABLE invoices (
 	invoice_id SERIAL NOT NULL, 
@@ -529,6 +552,13 @@ CREATE TABLE payment_installments (
 	notes TEXT, 
 	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
 	bank_account_id INTEGER, 
+	last_reminder_sent TIMESTAMP WITHOUT TIME ZONE, 
+	payment_link_id VARCHAR(50), 
+	payment_link_url TEXT, 
+	payment_link_amount NUMERIC(10, 2), 
+	payment_link_expires_at TIMESTAMP WITHOUT TIME ZONE, 
+	payment_link_claim VARCHAR(32), 
+	payment_link_claimed_at TIMESTAMP WITHOUT TIME ZONE, 
 	CONSTRAINT payment_installments_pkey PRIMARY KEY (installment_id), 
 	CONSTRAINT payment_installments_bank_account_id_fkey FOREIGN KEY(bank_account_id) REFERENCES bank_accounts (account_id), 
 	CONSTRAINT payment_installments_order_id_fkey FOREIGN KEY(order_id) REFERENCES orders (order_id) ON DELETE CASCADE, 
@@ -537,6 +567,23 @@ CREATE TABLE payment_installments (
 
 
 CREATE INDEX idx_installments_bank ON payment_installments (bank_account_id)
+CREATE INDEX idx_installments_pending_due ON payment_installments (due_date) WHERE status = 'pending'
+CREATE INDEX idx_installments_payment_link ON payment_installments (payment_link_id)
+
+CREATE TABLE installment_payment_links (
+	link_id VARCHAR(50) NOT NULL, 
+	installment_id INTEGER NOT NULL, 
+	url TEXT NOT NULL, 
+	amount NUMERIC(10, 2) NOT NULL, 
+	expires_at TIMESTAMP WITHOUT TIME ZONE, 
+	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	cancelled_at TIMESTAMP WITHOUT TIME ZONE, 
+	CONSTRAINT installment_payment_links_pkey PRIMARY KEY (link_id), 
+	CONSTRAINT installment_payment_links_installment_id_fkey FOREIGN KEY(installment_id) REFERENCES payment_installments (installment_id) ON DELETE CASCADE
+)
+
+
+CREATE INDEX idx_installment_payment_links_installment ON installment_payment_links (installment_id)
 
 CREATE TABLE loyalty_points (
 	loyalty_id SERIAL NOT NULL, 
@@ -582,7 +629,280 @@ CREATE TABLE payment_reminders (
 	sent_date TIMESTAMP WITHOUT TIME ZONE, 
 	status VARCHAR(20) DEFAULT 'scheduled'::character varying, 
 	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	payment_link TEXT, 
+	attempted_at TIMESTAMP WITHOUT TIME ZONE, 
+	error TEXT, 
 	CONSTRAINT payment_reminders_pkey PRIMARY KEY (reminder_id), 
-	CONSTRAINT payment_reminders_installment_id_fkey FOREIGN KEY(installment_id) REFERENCES payment_installments (installment_id) ON DELETE CASCADE
+	CONSTRAINT payment_reminders_installment_id_fkey FOREIGN KEY(installment_id) REFERENCES payment_installments (installment_id) ON DELETE CASCADE, 
+	CONSTRAINT payment_reminders_installment_id_reminder_date_key UNIQUE NULLS DISTINCT (installment_id, reminder_date)
+)
+
+
+CREATE INDEX idx_payment_reminders_open ON payment_reminders (reminder_id) WHERE status IN ('scheduled', 'claimed', 'sending')
+
+CREATE TABLE material_reservations (
+	reservation_id SERIAL NOT NULL, 
+	order_id INTEGER NOT NULL, 
+	material_id INTEGER NOT NULL, 
+	quantity NUMERIC(10, 2) NOT NULL, 
+	reserved_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	CONSTRAINT material_reservations_pkey PRIMARY KEY (reservation_id), 
+	CONSTRAINT material_reservations_material_id_fkey FOREIGN KEY(material_id) REFERENCES materials (material_id), 
+	CONSTRAINT material_reservations_order_id_fkey FOREIGN KEY(order_id) REFERENCES orders (order_id) ON DELETE CASCADE
 )
 
+
+CREATE INDEX idx_material_reservations_order ON material_reservations (order_id)
+CREATE INDEX idx_material_reservations_material ON material_reservations (material_id)
+
+
+
+
+
+CREATE TABLE order_tombstones (
+	order_id INTEGER NOT NULL, 
+	deleted_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	CONSTRAINT order_tombstones_pkey PRIMARY KEY (order_id)
+)
+
+
+CREATE INDEX idx_order_tombstones_deleted_at ON order_tombstones (deleted_at)
+
+
+
+CREATE TABLE notification_outbox (
+	outbox_id SERIAL NOT NULL, 
+	order_id INTEGER, 
+	channel VARCHAR(20) NOT NULL, 
+	template VARCHAR(50) NOT NULL, 
+	payload JSONB NOT NULL, 
+	status VARCHAR(20) DEFAULT 'pending'::character varying, 
+	attempts INTEGER DEFAULT 0, 
+	last_error TEXT, 
+	available_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	sent_at TIMESTAMP WITHOUT TIME ZONE, 
+	content_hash VARCHAR(32), 
+	coalesced_count INTEGER DEFAULT 0 NOT NULL, 
+	duplicates_dropped INTEGER DEFAULT 0 NOT NULL, 
+	CONSTRAINT notification_outbox_pkey PRIMARY KEY (outbox_id), 
+	CONSTRAINT notification_outbox_order_id_fkey FOREIGN KEY(order_id) REFERENCES orders (order_id) ON DELETE CASCADE
+)
+
+
+CREATE INDEX idx_notification_outbox_due ON notification_outbox (available_at, outbox_id) WHERE status IN ('pending', 'sending')
+CREATE INDEX idx_notification_outbox_order ON notification_outbox (order_id)
+CREATE INDEX idx_notification_outbox_content_hash ON notification_outbox (content_hash, outbox_id)
+
+
+
+CREATE TABLE notification_dead_letters (
+	dead_letter_id SERIAL NOT NULL, 
+	outbox_id INTEGER, 
+	order_id INTEGER, 
+	channel VARCHAR(20) NOT NULL, 
+	template VARCHAR(50) NOT NULL, 
+	payload JSONB NOT NULL, 
+	content_hash VARCHAR(32), 
+	attempts INTEGER DEFAULT 0, 
+	last_error TEXT, 
+	created_at TIMESTAMP WITHOUT TIME ZONE, 
+	failed_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	CONSTRAINT notification_dead_letters_pkey PRIMARY KEY (dead_letter_id), 
+	CONSTRAINT notification_dead_letters_order_id_fkey FOREIGN KEY(order_id) REFERENCES orders (order_id) ON DELETE CASCADE
+)
+
+
+CREATE INDEX idx_notification_dead_letters_failed ON notification_dead_letters (failed_at DESC, dead_letter_id DESC)
+
+
+
+CREATE TABLE message_templates (
+	channel VARCHAR(20) NOT NULL, 
+	template_key VARCHAR(50) NOT NULL, 
+	language VARCHAR(5) NOT NULL, 
+	body TEXT NOT NULL, 
+	updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	CONSTRAINT message_templates_pkey PRIMARY KEY (channel, template_key, language)
+)
+
+
+
+CREATE TABLE message_deliveries (
+	message_sid VARCHAR(64) NOT NULL, 
+	channel VARCHAR(20) NOT NULL, 
+	to_number VARCHAR(32) NOT NULL, 
+	status VARCHAR(20) NOT NULL, 
+	error_code VARCHAR(10), 
+	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	CONSTRAINT message_deliveries_pkey PRIMARY KEY (message_sid)
+)
+
+
+CREATE INDEX idx_message_deliveries_to_number ON message_deliveries (to_number, updated_at)
+
+
+
+CREATE TABLE daily_order_rollup (
+	day DATE NOT NULL, 
+	delivery_day DATE NOT NULL, 
+	cloth_type VARCHAR(100) NOT NULL, 
+	status VARCHAR(50) NOT NULL, 
+	order_count INTEGER DEFAULT 0 NOT NULL, 
+	revenue NUMERIC(14, 2) DEFAULT 0 NOT NULL, 
+	discount NUMERIC(14, 2) DEFAULT 0 NOT NULL, 
+	material_cost NUMERIC(14, 2) DEFAULT 0 NOT NULL, 
+	labor_cost NUMERIC(14, 2) DEFAULT 0 NOT NULL, 
+	profit NUMERIC(14, 2) DEFAULT 0 NOT NULL, 
+	CONSTRAINT daily_order_rollup_pkey PRIMARY KEY (day, delivery_day, cloth_type, status)
+)
+
+
+
+CREATE TABLE razorpay_webhook_events (
+	event_id VARCHAR(100) NOT NULL, 
+	event_type VARCHAR(50) NOT NULL, 
+	payload JSONB NOT NULL, 
+	status VARCHAR(20) DEFAULT 'pending'::character varying, 
+	received_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	processed_at TIMESTAMP WITHOUT TIME ZONE, 
+	CONSTRAINT razorpay_webhook_events_pkey PRIMARY KEY (event_id)
+)
+
+
+CREATE INDEX idx_razorpay_webhook_events_pending ON razorpay_webhook_events (received_at, event_id) WHERE status = 'pending'
+
+
+
+CREATE OR REPLACE FUNCTION set_orders_updated_at() RETURNS trigger AS $$
+BEGIN
+	NEW.updated_at := CAST(clock_timestamp() AS timestamp);
+	RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+
+
+CREATE TRIGGER orders_set_updated_at BEFORE INSERT OR UPDATE ON orders FOR EACH ROW EXECUTE FUNCTION set_orders_updated_at()
+
+
+CREATE OR REPLACE FUNCTION record_order_tombstone() RETURNS trigger AS $$
+BEGIN
+	INSERT INTO order_tombstones (order_id, deleted_at)
+	VALUES (OLD.order_id, CAST(clock_timestamp() AS timestamp))
+	ON CONFLICT (order_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+	RETURN OLD;
+END;
+$$ LANGUAGE plpgsql
+
+
+CREATE TRIGGER orders_record_tombstone AFTER DELETE ON orders FOR EACH ROW EXECUTE FUNCTION record_order_tombstone()
+
+
+CREATE OR REPLACE FUNCTION maintain_worker_open_order_count() RETURNS trigger AS $$
+DECLARE
+	old_worker INTEGER;
+	new_worker INTEGER;
+BEGIN
+	IF TG_OP <> 'INSERT' AND OLD.status NOT IN ('delivered', 'cancelled') THEN
+		old_worker := OLD.assigned_worker;
+	END IF;
+	IF TG_OP <> 'DELETE' AND NEW.status NOT IN ('delivered', 'cancelled') THEN
+		new_worker := NEW.assigned_worker;
+	END IF;
+	IF old_worker IS NOT DISTINCT FROM new_worker THEN
+		RETURN NULL;
+	END IF;
+	UPDATE workers
+	SET open_order_count = open_order_count + CASE WHEN worker_id = new_worker THEN 1 ELSE -1 END
+	WHERE worker_id IN (old_worker, new_worker);
+	RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+
+
+CREATE TRIGGER orders_maintain_worker_open_order_count AFTER INSERT OR DELETE OR UPDATE OF assigned_worker, status ON orders FOR EACH ROW EXECUTE FUNCTION maintain_worker_open_order_count()
+
+
+CREATE OR REPLACE FUNCTION maintain_daily_order_rollup() RETURNS trigger AS $$
+BEGIN
+	IF TG_OP = 'INSERT' THEN
+		INSERT INTO daily_order_rollup AS r (day, delivery_day, cloth_type, status, order_count, revenue, discount, material_cost, labor_cost, profit)
+		SELECT COALESCE(order_date, '-infinity'), COALESCE(delivery_date, '-infinity'), COALESCE(cloth_type, ''), COALESCE(status, ''), COUNT(*),
+			SUM(COALESCE(total_amount, 0)), SUM(COALESCE(discount_amount, 0)),
+			SUM(COALESCE(material_cost, 0)), SUM(COALESCE(labor_cost, 0)), SUM(COALESCE(profit, 0))
+		FROM new_rows
+		GROUP BY 1, 2, 3, 4
+		ON CONFLICT (day, delivery_day, cloth_type, status) DO UPDATE
+		SET order_count = r.order_count + EXCLUDED.order_count,
+			revenue = r.revenue + EXCLUDED.revenue,
+			discount = r.discount + EXCLUDED.discount,
+			material_cost = r.material_cost + EXCLUDED.material_cost,
+			labor_cost = r.labor_cost + EXCLUDED.labor_cost,
+			profit = r.profit + EXCLUDED.profit;
+	ELSIF TG_OP = 'DELETE' THEN
+		INSERT INTO daily_order_rollup AS r (day, delivery_day, cloth_type, status, order_count, revenue, discount, material_cost, labor_cost, profit)
+		SELECT COALESCE(order_date, '-infinity'), COALESCE(delivery_date, '-infinity'), COALESCE(cloth_type, ''), COALESCE(status, ''), -COUNT(*),
+			-SUM(COALESCE(total_amount, 0)), -SUM(COALESCE(discount_amount, 0)),
+			-SUM(COALESCE(material_cost, 0)), -SUM(COALESCE(labor_cost, 0)), -SUM(COALESCE(profit, 0))
+		FROM old_rows
+		GROUP BY 1, 2, 3, 4
+		ON CONFLICT (day, delivery_day, cloth_type, status) DO UPDATE
+		SET order_count = r.order_count + EXCLUDED.order_count,
+			revenue = r.revenue + EXCLUDED.revenue,
+			discount = r.discount + EXCLUDED.discount,
+			material_cost = r.material_cost + EXCLUDED.material_cost,
+			labor_cost = r.labor_cost + EXCLUDED.labor_cost,
+			profit = r.profit + EXCLUDED.profit;
+	ELSE
+		WITH changed AS (
+			SELECT o.order_id
+			FROM old_rows o
+			JOIN new_rows n ON n.order_id = o.order_id
+			WHERE (o.order_date, o.delivery_date, o.cloth_type, o.status, o.total_amount, o.discount_amount, o.material_cost, o.labor_cost, o.profit)
+				IS DISTINCT FROM (n.order_date, n.delivery_date, n.cloth_type, n.status, n.total_amount, n.discount_amount, n.material_cost, n.labor_cost, n.profit)
+		),
+		deltas AS (
+			SELECT n.order_date, n.delivery_date, n.cloth_type, n.status, 1 AS sign,
+				n.total_amount, n.discount_amount, n.material_cost, n.labor_cost, n.profit
+			FROM new_rows n JOIN changed USING (order_id)
+			UNION ALL
+			SELECT o.order_date, o.delivery_date, o.cloth_type, o.status, -1 AS sign,
+				o.total_amount, o.discount_amount, o.material_cost, o.labor_cost, o.profit
+			FROM old_rows o JOIN changed USING (order_id)
+		)
+		INSERT INTO daily_order_rollup AS r (day, delivery_day, cloth_type, status, order_count, revenue, discount, material_cost, labor_cost, profit)
+		SELECT COALESCE(order_date, '-infinity'), COALESCE(delivery_date, '-infinity'), COALESCE(cloth_type, ''), COALESCE(status, ''), SUM(sign),
+			SUM(sign * COALESCE(total_amount, 0)), SUM(sign * COALESCE(discount_amount, 0)),
+			SUM(sign * COALESCE(material_cost, 0)), SUM(sign * COALESCE(labor_cost, 0)), SUM(sign * COALESCE(profit, 0))
+		FROM deltas
+		GROUP BY 1, 2, 3, 4
+		ON CONFLICT (day, delivery_day, cloth_type, status) DO UPDATE
+		SET order_count = r.order_count + EXCLUDED.order_count,
+			revenue = r.revenue + EXCLUDED.revenue,
+			discount = r.discount + EXCLUDED.discount,
+			material_cost = r.material_cost + EXCLUDED.material_cost,
+			labor_cost = r.labor_cost + EXCLUDED.labor_cost,
+			profit = r.profit + EXCLUDED.profit;
+	END IF;
+	RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+
+
+CREATE TRIGGER orders_rollup_insert AFTER INSERT ON orders REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION maintain_daily_order_rollup()
+CREATE TRIGGER orders_rollup_update AFTER UPDATE ON orders REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION maintain_daily_order_rollup()
+CREATE TRIGGER orders_rollup_delete AFTER DELETE ON orders REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION maintain_daily_order_rollup()
+
+
+CREATE OR REPLACE FUNCTION notify_dashboard_changed() RETURNS trigger AS $$
+BEGIN
+	PERFORM pg_notify('dashboard_changed', TG_TABLE_NAME);
+	RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+
+
+CREATE TRIGGER orders_notify_dashboard_changed AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON orders FOR EACH STATEMENT EXECUTE FUNCTION notify_dashboard_changed()
+CREATE TRIGGER materials_notify_dashboard_changed AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON materials FOR EACH STATEMENT EXECUTE FUNCTION notify_dashboard_changed()
+CREATE TRIGGER transactions_notify_dashboard_changed AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON transactions FOR EACH STATEMENT EXECUTE FUNCTION notify_dashboard_changed()
\ No newline at end of file